@@ -0,0 +1,86 @@
+"""
+Users/second for precomputing every user's top-k list.
+
+Compares a per-user get_recommendations loop with the matrix-batched
+RecommendationModel.recommend_users, in-process and over the process pool of
+models.batch_recommendations, on the bundled ratings (data/ratings.csv, with
+a synthetic catalog and stand-in embeddings) and on a 10x synthetic set.
+Pool timings include starting the workers and loading the model in each.
+
+    python -m benchmarks.bench_batch [--top-k 10] [--workers 2] [--loop-users 300]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.load import BACKEND_DIR
+from benchmarks.synthetic import make_ratings, write_dataset
+from models.artifacts import compile_artifacts
+from models.batch_recommendations import batch_size_for, recommend_all
+from models.data_processor import DataProcessor
+from models.recommendation_model import RecommendationModel
+
+
+def bench(label: str, data_dir: str, args):
+    compile_artifacts(data_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = RecommendationModel(DataProcessor(data_dir))
+    user_ids = model.ratings_store.user_ids.tolist()
+    print(f"{label}: {len(user_ids)} users, {len(model.movie_ids)} movies, {model.ratings_store.nnz} ratings")
+
+    # Per-user loop on a sample, as the online endpoint would do it
+    sample = user_ids[:args.loop_users]
+    start = time.perf_counter()
+    loop_results = [model.get_recommendations(str(user_id), top_k=args.top_k) for user_id in sample]
+    loop_rate = len(sample) / (time.perf_counter() - start)
+    print(f"  per-user loop            {loop_rate:8.0f} users/s")
+
+    batch_size = batch_size_for(len(model.movie_ids), 256)
+    start = time.perf_counter()
+    batches = list(recommend_all(data_dir, user_ids, top_k=args.top_k, batch_size=batch_size, model=model))
+    batch_rate = len(user_ids) / (time.perf_counter() - start)
+    print(f"  matrix batches ({batch_size:>4}/batch) {batch_rate:8.0f} users/s   ({batch_rate / loop_rate:.1f}x)")
+
+    # Same lists as the online path
+    batched = {}
+    for batch_user_ids, movie_ids, _ in batches:
+        for user_id, row in zip(batch_user_ids.tolist(), movie_ids.tolist()):
+            batched[user_id] = [str(movie_id) for movie_id in row]
+    mismatches = sum(batched[user_id] != result for user_id, result in zip(sample, loop_results))
+    print(f"  parity with get_recommendations: {mismatches}/{len(sample)} mismatches")
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        start = time.perf_counter()
+        users = sum(len(batch[0]) for batch in recommend_all(data_dir, user_ids, top_k=args.top_k,
+                                                             workers=args.workers, batch_size=batch_size))
+    pool_rate = users / (time.perf_counter() - start)
+    print(f"  process pool ({args.workers} workers)  {pool_rate:8.0f} users/s   (incl. worker start-up)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--loop-users", type=int, default=300)
+    args = parser.parse_args()
+
+    bundled = pd.read_csv(os.path.join(BACKEND_DIR, "data", "ratings.csv"))
+    n_users, n_movies = bundled['userId'].nunique(), bundled['movieId'].nunique()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_dataset(data_dir, n_movies=int(bundled['movieId'].max()), ratings=bundled)
+        bench("bundled ratings", data_dir, args)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_dataset(data_dir, n_users=10 * n_users, n_movies=n_movies, n_ratings=10 * len(bundled),
+                      ratings=make_ratings(10 * n_users, n_movies, 10 * len(bundled)))
+        bench("10x synthetic", data_dir, args)
+
+
+if __name__ == "__main__":
+    main()
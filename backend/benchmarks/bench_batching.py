@@ -0,0 +1,48 @@
+"""
+Inline vs micro-batched /api/recommendations under concurrent load.
+
+Starts uvicorn on a synthetic dataset once with RECOMMENDATION_BATCHING off
+and once with it on, and drives each with a local HTTP load generator.
+
+    python -m benchmarks.bench_batching [--requests 400] [--concurrency 1 8 32]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+from benchmarks.load import format_result, run_load, serve
+from benchmarks.synthetic import write_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=610)
+    args = parser.parse_args()
+
+    async def send(client, i):
+        return await client.post("/api/recommendations", json={"user_id": str(i % args.users + 1)})
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        write_dataset(os.path.join(root_dir, "data"), n_users=args.users)
+
+        modes = (
+            ("inline", {"RECOMMENDATION_BATCHING": "false"}),
+            ("micro-batch", {"RECOMMENDATION_BATCHING": "true",
+                             "RECOMMENDATION_BATCH_SIZE": str(args.batch_size),
+                             "RECOMMENDATION_BATCH_WAIT_MS": str(args.wait_ms)}),
+        )
+        for label, env in modes:
+            with serve(root_dir, env=env) as base_url:
+                asyncio.run(run_load(None, send, 4, 20, base_url=base_url))  # warm-up
+                for concurrency in args.concurrency:
+                    result = asyncio.run(run_load(None, send, concurrency, args.requests, base_url=base_url))
+                    print(format_result(f"{label:<11} c={concurrency}", result))
+
+
+if __name__ == "__main__":
+    main()
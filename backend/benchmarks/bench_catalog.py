@@ -0,0 +1,92 @@
+"""
+Per-request CSV I/O and latency of the catalog-backed endpoints.
+
+Counts pandas.read_csv calls made while serving each endpoint and times
+DataProcessor.get_movie_details against the previous read-the-CSVs-per-call
+implementation.
+
+    python -m benchmarks.bench_catalog [--requests 50]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+import pandas as pd
+
+from benchmarks.load import load_app, run_load
+from benchmarks.measure import mean_ms
+
+
+def legacy_movie_details(data_dir, movie_ids):
+    """get_movie_details as it was before the in-memory catalog"""
+    movies_df = pd.read_csv(os.path.join(data_dir, 'movies.csv'))
+    links_df = pd.read_csv(os.path.join(data_dir, 'links.csv'))
+    tmdb_df = pd.read_csv(os.path.join(data_dir, 'tmdb_data.csv'))
+    details = []
+    for movie_id in movie_ids:
+        movie_row = movies_df[movies_df['movieId'] == int(movie_id)]
+        if movie_row.empty:
+            continue
+        detail = {'id': str(movie_id), 'movieId': str(movie_id), 'title': movie_row['title'].iloc[0]}
+        link_row = links_df[links_df['movieId'] == int(movie_id)]
+        if not link_row.empty:
+            tmdb_row = tmdb_df[tmdb_df['id'] == link_row['tmdbId'].iloc[0]]
+            if not tmdb_row.empty:
+                detail['poster_path'] = tmdb_row['poster_path'].iloc[0]
+                detail['overview'] = tmdb_row['overview'].iloc[0]
+                detail['vote_average'] = float(tmdb_row['vote_average'].iloc[0])
+        details.append(detail)
+    return details
+
+
+class ReadCsvCounter:
+    """Counts pandas.read_csv calls while active"""
+
+    def __init__(self):
+        self.calls = 0
+        self._original = pd.read_csv
+
+    def __enter__(self):
+        def counting_read_csv(*args, **kwargs):
+            self.calls += 1
+            return self._original(*args, **kwargs)
+        pd.read_csv = counting_read_csv
+        return self
+
+    def __exit__(self, *exc):
+        pd.read_csv = self._original
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        app = load_app(root_dir)
+        state = app.state.registry.load()
+
+        data_processor = state.data_processor
+        movie_ids = [str(m) for m in state.recommendation_model.movie_ids[:10]]
+
+        endpoints = {
+            "GET /api/genres": lambda c, i: c.get("/api/genres"),
+            "GET /api/movies": lambda c, i: c.get("/api/movies", params={"genre": "Drama", "limit": 20}),
+            "POST /api/user_ratings": lambda c, i: c.post("/api/user_ratings", json={"user_id": str(i % 50 + 1)}),
+            "POST /api/recommendations": lambda c, i: c.post("/api/recommendations", json={"user_id": str(i % 50 + 1)}),
+        }
+        for name, send in endpoints.items():
+            with ReadCsvCounter() as counter:
+                result = asyncio.run(run_load(app, send, 1, args.requests))
+            print(f"{name:<26} read_csv/request {counter.calls / args.requests:4.1f}   "
+                  f"p50 {result['p50_ms']:8.2f} ms   p99 {result['p99_ms']:8.2f} ms")
+
+        legacy_ms = mean_ms(lambda: legacy_movie_details(data_processor.data_dir, movie_ids), args.requests)
+        catalog_ms = mean_ms(lambda: data_processor.get_movie_details(movie_ids), args.requests)
+
+        print(f"get_movie_details(10 ids): legacy {legacy_ms:8.3f} ms   catalog {catalog_ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
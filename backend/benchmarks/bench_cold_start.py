@@ -0,0 +1,71 @@
+"""
+Cold start: fake top-5 ratings + full model scoring vs Bayesian popularity rankings.
+
+The previous path gave a user without ratings five 5-star ratings on the
+movies with the highest raw mean and scored the whole catalogue with the
+model. The new path reads the precomputed smoothed rankings (optionally per
+genre). Reports latency and how many of the recommended movies have few
+ratings (the raw mean puts movies with a single 5-star rating first).
+
+    python -m benchmarks.bench_cold_start [--ratings 100000 1000000] [--repeat 500]
+"""
+import argparse
+import contextlib
+import io
+import tempfile
+
+import numpy as np
+
+from benchmarks.measure import mean_ms
+from benchmarks.synthetic import write_dataset
+from models.artifacts import compile_artifacts
+from models.data_processor import DataProcessor
+from models.recommendation_model import RecommendationModel
+
+
+def legacy_cold_start(model: RecommendationModel, raw_popular: np.ndarray, top_k: int = 10) -> np.ndarray:
+    user_vector = np.zeros(len(model.movie_ids), dtype=np.float32)
+    user_vector[raw_popular[:5]] = 5.0
+    predictions = model.backend.score(user_vector[np.newaxis, :])[0]
+    predictions[raw_popular[:5]] = -np.inf
+    top = np.argpartition(-predictions, top_k - 1)[:top_k]
+    return top[np.argsort(-predictions[top], kind='stable')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratings", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    for n_ratings in args.ratings:
+        with tempfile.TemporaryDirectory() as data_dir, contextlib.redirect_stdout(io.StringIO()):
+            write_dataset(data_dir, n_users=max(610, n_ratings // 160), n_movies=max(9724, n_ratings // 20),
+                          n_ratings=n_ratings)
+            compile_artifacts(data_dir)
+            model = RecommendationModel(DataProcessor(data_dir))
+
+        sums, counts = model._rating_sums, model._rating_counts
+        raw_popular = np.argsort(-(sums / np.maximum(counts, 1)), kind='stable')
+        legacy = legacy_cold_start(model, raw_popular)
+        smoothed = model.popular_indices[:10]
+        genre = model.cold_start.genre_rankings[next(iter(model.cold_start.genre_rankings))][0][:10]
+
+        timings = {
+            "legacy": mean_ms(lambda: legacy_cold_start(model, raw_popular), args.repeat, warmup=1),
+            "bayesian": mean_ms(lambda: model.get_recommendations("new-user"), args.repeat, warmup=1),
+            "bayesian+genres": mean_ms(
+                lambda: model.get_recommendations("new-user", genres=["Drama", "Comedy"]), args.repeat, warmup=1),
+        }
+        print(f"{n_ratings:>9} ratings  prior mean {model.cold_start.prior_mean:.2f}  "
+              f"prior weight {model.cold_start.prior_weight:.0f}")
+        for label, ms in timings.items():
+            print(f"          {label:<16} {ms:8.3f} ms/request")
+        for label, top in (("raw mean top 5", raw_popular[:5]), ("legacy top 10", legacy),
+                           ("bayesian top 10", smoothed), ("genre top 10", genre)):
+            print(f"          {label:<16} median ratings per movie {np.median(counts[top]):7.0f}   "
+                  f"movies with <5 ratings {int((counts[top] < 5).sum())}/{len(top)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Genre index vs the previous per-request catalog scans.
+
+    python -m benchmarks.bench_genres [--movies 9724] [--repeat 20]
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.measure import mean_us
+from benchmarks.synthetic import write_dataset
+from models.catalog import MovieCatalog
+
+
+def legacy_movies_by_genre(df, genre, limit):
+    matching = []
+    for _, movie in df.iterrows():
+        if isinstance(movie.genres, str) and genre in movie.genres.split('|'):
+            matching.append({"id": movie.get("movieId", ""), "title": movie.get("title", ""),
+                             "genres": movie.get("genres", "").split('|')})
+    return random.sample(matching, limit) if len(matching) > limit else matching
+
+
+def legacy_genres(df):
+    genres_set = set()
+    for genre_str in df['genres'].dropna():
+        genres_set.update(g.strip() for g in genre_str.split('|') if g.strip())
+    return sorted(genres_set)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movies", type=int, default=9724)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_dataset(data_dir, n_movies=args.movies, n_ratings=10_000)
+        start = time.perf_counter()
+        catalog = MovieCatalog(data_dir)
+        print(f"catalog + genre index load: {(time.perf_counter() - start) * 1000:.1f} ms for {len(catalog)} movies")
+
+    df, index = catalog.movies_df, catalog.genre_index
+    rows = (
+        ("genres (legacy scan)", lambda: legacy_genres(df), args.repeat),
+        ("genres (precomputed)", lambda: catalog.genres, 10_000),
+        ("Drama x20 (legacy iterrows)", lambda: legacy_movies_by_genre(df, "Drama", 20), max(1, args.repeat // 10)),
+        ("Drama x20 (index sample)", lambda: index.sample(["Drama"], 20), 10_000),
+        ("Drama OR War x20", lambda: index.sample(["Drama", "War"], 20), 1_000),
+        ("Drama AND War x20", lambda: index.sample(["Drama", "War"], 20, match_all=True), 1_000),
+        ("Drama seeded page 5", lambda: index.page(["Drama"], seed=42, page=5), 10_000),
+    )
+    for label, fn, repeat in rows:
+        print(f"{label:<28} {mean_us(fn, repeat):12.1f} us")
+
+
+if __name__ == "__main__":
+    main()
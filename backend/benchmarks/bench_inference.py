@@ -0,0 +1,90 @@
+"""
+Inference backends: import time, startup time, memory and latency (numpy vs torch).
+
+Each backend runs in a fresh interpreter that imports the FastAPI app, loads
+the registry (data + model) and scores a sample of users. It reports import
+and load wall time, whether torch ended up in sys.modules, RSS and private
+memory from /proc/self/smaps_rollup, single-user latency and batch
+throughput. Both backends read the same compiled artifacts; rankings are
+checked for equality.
+
+    python -m benchmarks.bench_inference [--ratings 100000 1000000] [--users 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.load import BACKEND_DIR
+from benchmarks.synthetic import write_dataset
+from models.artifacts import compile_artifacts
+
+CHILD = r"""
+import contextlib, io, json, sys, time
+from benchmarks.measure import process_memory_mb
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    state = main.app.state.registry.load()
+loaded = time.perf_counter()
+model = state.recommendation_model
+
+user_ids = model.user_ids[:int(sys.argv[1])]
+with contextlib.redirect_stdout(io.StringIO()):
+    model.get_recommendations(str(user_ids[0]))
+    begin = time.perf_counter()
+    rankings = [model.get_recommendations(str(user_id)) for user_id in user_ids]
+    single = time.perf_counter() - begin
+    begin = time.perf_counter()
+    batches = list(model.recommend_users(model.user_ids, top_k=10, batch_size=256))
+    batch = time.perf_counter() - begin
+
+memory = process_memory_mb()
+print(json.dumps({
+    "backend": model.backend.name,
+    "import_s": imported - start,
+    "load_s": loaded - imported,
+    "torch_imported": "torch" in sys.modules,
+    "rss_mb": memory["rss_mb"],
+    "private_mb": memory["private_mb"],
+    "single_ms": single / len(user_ids) * 1000,
+    "batch_users_s": len(model.user_ids) / batch,
+    "rankings": rankings,
+}))
+"""
+
+
+def measure(data_dir: str, backend: str, users: int) -> dict:
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, DATA_DIR=data_dir, INFERENCE_BACKEND=backend)
+    output = subprocess.run([sys.executable, "-c", CHILD, str(users)], env=env, check=True,
+                            capture_output=True, text=True, cwd=BACKEND_DIR).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratings", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    for n_ratings in args.ratings:
+        with tempfile.TemporaryDirectory() as data_dir:
+            write_dataset(data_dir, n_users=max(610, n_ratings // 160), n_movies=max(9724, n_ratings // 20),
+                          n_ratings=n_ratings)
+            compile_artifacts(data_dir)
+
+            results = [measure(data_dir, backend, args.users) for backend in ("torch", "numpy")]
+            for result in results:
+                print(f"{n_ratings:>9} ratings  {result['backend']:<6} import {result['import_s']:5.2f} s   "
+                      f"load {result['load_s']:5.2f} s   torch loaded {str(result['torch_imported']):<5}  "
+                      f"RSS {result['rss_mb']:6.1f} MB   private {result['private_mb']:6.1f} MB   "
+                      f"{result['single_ms']:6.3f} ms/user   batch {result['batch_users_s']:7.0f} users/s")
+            same = results[0]["rankings"] == results[1]["rankings"]
+            print(f"          identical rankings for {args.users} users: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Online ratings ingestion: POST /api/ratings throughput, read-after-write
+latency and the cost of compacting the delta into the base store.
+
+Drives the app in-process with its lifespan (periodic compaction disabled) on
+a synthetic dataset. Read-after-write checks that the rated movie is excluded
+from the very next /api/recommendations response and shows up first in
+/api/user_ratings.
+
+    python -m benchmarks.bench_ingest [--ratings 1000000] [--writes 2000]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.load import format_result, load_app, run_load
+
+
+async def read_after_write(client, user_ids):
+    """Latency of the first reads after a write, and whether they reflect it"""
+    write_ms, recommend_ms, timeline_ms, stale = [], [], [], 0
+    for user_id in user_ids:
+        # Rate the user's current top recommendation, then read it back
+        before = await client.post("/api/recommendations", json={"user_id": str(user_id)})
+        movie_id = before.json()["recommendations"][0]["movieId"]
+
+        start = time.perf_counter()
+        await client.post("/api/ratings", json={"user_id": int(user_id), "ratings": {movie_id: 4.0},
+                                                "timestamp": 2_000_000_000})
+        write_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        after = await client.post("/api/recommendations", json={"user_id": str(user_id)})
+        recommend_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        timeline = await client.post("/api/user_ratings", json={"user_id": str(user_id), "limit": 10})
+        timeline_ms.append((time.perf_counter() - start) * 1000)
+
+        recommended = {m["movieId"] for m in after.json()["recommendations"]}
+        if movie_id in recommended or timeline.json()["ratings"][0]["movieId"] != movie_id:
+            stale += 1
+    return np.mean(write_ms), np.mean(recommend_ms), np.mean(timeline_ms), stale
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory() as root_dir:
+        n_users = max(610, args.ratings // 160)
+        app = load_app(root_dir, n_users=n_users, n_movies=max(9724, args.ratings // 20), n_ratings=args.ratings)
+
+        async with app.router.lifespan_context(app):
+            registry = app.state.registry
+            state = registry.current
+            movie_ids = np.array(state.recommendation_model.movie_ids)
+            rng = np.random.default_rng(0)
+
+            # 1. Ingest throughput: 90% existing users, 10% new ones, 5 ratings per request
+            def send(client, i):
+                user_id = int(rng.integers(1, n_users + 1)) if i % 10 else n_users + 1 + i
+                ratings = {str(m): float(rng.integers(1, 11) / 2) for m in rng.choice(movie_ids, 5)}
+                return client.post("/api/ratings", json={"user_id": user_id, "ratings": ratings})
+
+            result = await run_load(app, send, concurrency=16, total_requests=args.writes)
+            print(format_result("POST /api/ratings", result) + f"   ({5 * result['throughput_rps']:.0f} ratings/s)")
+            print(f"pending after ingest: {state.ratings_store.pending} ratings")
+
+            # 2. Read-after-write on users with pending deltas
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+                user_ids = rng.choice(np.arange(1, n_users + 1), args.users, replace=False)
+                write, recommend, timeline, stale = await read_after_write(client, user_ids)
+                print(f"read-after-write (delta)      write {write:6.2f} ms   recommendations {recommend:6.2f} ms   "
+                      f"user_ratings {timeline:6.2f} ms   stale reads {stale}/{len(user_ids)}")
+
+                # 3. Compaction: persist to the ratings log and merge into the CSR arrays
+                pending = state.ratings_store.pending
+                start = time.perf_counter()
+                await registry.compact()
+                print(f"compaction of {pending} ratings into {state.ratings_store.nnz} total: "
+                      f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+                user_ids = rng.choice(np.arange(1, n_users + 1), args.users, replace=False)
+                write, recommend, timeline, stale = await read_after_write(client, user_ids)
+                print(f"read-after-write (compacted)  write {write:6.2f} ms   recommendations {recommend:6.2f} ms   "
+                      f"user_ratings {timeline:6.2f} ms   stale reads {stale}/{len(user_ids)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratings", type=int, default=1_000_000)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=100, help="users in the read-after-write check")
+    args = parser.parse_args()
+    os.environ["RATINGS_COMPACTION_INTERVAL"] = "0"
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Isolation under load: /api/genres latency while /api/recommendations is saturated.
+
+Serves the app out of process (one worker, result cache disabled) and probes
+/api/genres sequentially, first on an idle server and then while
+`--concurrency` clients keep /api/recommendations busy. With
+COMPUTE_THREADS=0 scoring runs on the event loop as before, so every genre
+request waits behind it. With the thread pool the loop stays free, and the
+per-endpoint limit and timeout bound the recommendation queue. The load
+generator runs on the same machine, so with few cores it competes with the
+server and genre latency cannot stay fully flat.
+
+    python -m benchmarks.bench_isolation [--ratings 1000000] [--concurrency 32] [--probes 200]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+from benchmarks.load import format_result, run_load, serve
+from benchmarks.synthetic import write_dataset
+from models.artifacts import compile_artifacts
+
+CONFIGS = {
+    "event loop": {"COMPUTE_THREADS": "0"},
+    "thread pool": {},
+    "thread pool, 8 in flight": {"ENDPOINT_CONCURRENCY": "8"},
+}
+
+
+async def measure(base_url: str, n_users: int, concurrency: int, requests: int, probes: int) -> dict:
+    async def recommendations(client, i):
+        return await client.post("/api/recommendations", json={"user_id": str(i % n_users + 1)})
+
+    async def genres(client, i):
+        return await client.get("/api/genres")
+
+    idle = await run_load(None, genres, 1, probes, base_url=base_url)
+    saturating = asyncio.ensure_future(run_load(None, recommendations, concurrency, requests, base_url=base_url))
+    await asyncio.sleep(0.5)
+    loaded = await run_load(None, genres, 1, probes, base_url=base_url)
+    return {"idle": idle, "loaded": loaded, "recommendations": await saturating}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratings", type=int, default=1_000_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--probes", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        data_dir = os.path.join(root_dir, "data")
+        n_users = max(610, args.ratings // 160)
+        write_dataset(data_dir, n_users=n_users, n_movies=max(9724, args.ratings // 20), n_ratings=args.ratings)
+        compile_artifacts(data_dir)
+
+        for label, env in CONFIGS.items():
+            with serve(root_dir, env=dict(env, RECOMMENDATION_CACHE_SIZE="0")) as base_url:
+                result = asyncio.run(measure(base_url, n_users, args.concurrency, args.requests, args.probes))
+            print(f"[{label}]")
+            print(format_result("  genres, idle", result["idle"]))
+            print(format_result("  genres, saturated", result["loaded"]))
+            print(format_result(f"  recommendations c={args.concurrency}", result["recommendations"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Ratings loading: whole-file pandas read vs streaming chunked loader.
+
+Writes MovieLens-shaped ratings.csv files (sorted by userId, movieId like the
+25M/32M releases) and builds the RatingsStore in a fresh interpreter with
+each loader, reporting load time, peak RSS (VmHWM) and the size of the
+resulting arrays. The "pandas" column is the previous path:
+pd.read_csv(ratings.csv) followed by RatingsStore.from_dataframe.
+
+    python -m benchmarks.bench_load_ratings [--ratings 1000000 5000000 10000000] [--shuffled]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.load import BACKEND_DIR
+
+CHILD = r"""
+import json, sys, time
+import pandas as pd
+from benchmarks.measure import peak_rss_mb
+from models.ratings_store import RatingsStore
+
+baseline = peak_rss_mb()
+start = time.perf_counter()
+if sys.argv[2] == "pandas":
+    store = RatingsStore.from_dataframe(pd.read_csv(sys.argv[1]))
+else:
+    store = RatingsStore.from_csv(sys.argv[1])
+store.movie_totals()
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "load_s": elapsed,
+    "peak_mb": peak_rss_mb(),
+    "baseline_mb": baseline,
+    "store_mb": store.nbytes / 2**20,
+    "nnz": store.nnz,
+}))
+"""
+
+
+def write_ratings(path: str, n_ratings: int, shuffled: bool = False, seed: int = 0):
+    """Unique (userId, movieId) pairs with half-star ratings, written in chunks"""
+    rng = np.random.default_rng(seed)
+    n_users = max(610, n_ratings // 150)
+    n_movies = max(9724, n_ratings // 400)
+    keys = np.unique(rng.integers(0, n_users * n_movies, size=int(n_ratings * 1.02), dtype=np.int64))[:n_ratings]
+    if shuffled:
+        rng.shuffle(keys)
+
+    header = True
+    for start in range(0, len(keys), 1_000_000):
+        block = keys[start:start + 1_000_000]
+        pd.DataFrame({
+            "userId": block // n_movies + 1,
+            "movieId": block % n_movies + 1,
+            "rating": rng.integers(1, 11, size=len(block)) / 2.0,
+            "timestamp": rng.integers(800_000_000, 1_700_000_000, size=len(block)),
+        }).to_csv(path, mode="w" if header else "a", header=header, index=False)
+        header = False
+
+
+def measure(path: str, loader: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    output = subprocess.run([sys.executable, "-c", CHILD, path, loader], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratings", type=int, nargs="+", default=[1_000_000, 5_000_000, 10_000_000])
+    parser.add_argument("--shuffled", action="store_true", help="unsorted rows (general sort path)")
+    parser.add_argument("--loaders", nargs="+", default=["pandas", "streaming"])
+    args = parser.parse_args()
+
+    for n_ratings in args.ratings:
+        with tempfile.TemporaryDirectory() as data_dir:
+            path = os.path.join(data_dir, "ratings.csv")
+            write_ratings(path, n_ratings, shuffled=args.shuffled)
+            size_mb = os.path.getsize(path) / 2**20
+            for loader in args.loaders:
+                result = measure(path, loader)
+                print(f"{n_ratings:>10} ratings ({size_mb:6.0f} MB csv)  {loader:<9} load {result['load_s']:6.2f} s   "
+                      f"peak RSS {result['peak_mb']:7.0f} MB (+{result['peak_mb'] - result['baseline_mb']:6.0f})   "
+                      f"store {result['store_mb']:6.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
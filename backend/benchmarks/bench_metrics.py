@@ -0,0 +1,57 @@
+"""
+Instrumentation overhead: the timed decorator and the metrics middleware.
+
+Times a trivial function bare and wrapped with @timed, then serves the app
+out of process with METRICS_ENABLED=false, with metrics, and with metrics
+plus Server-Timing, driving POST /api/recommendations for known users.
+
+    python -m benchmarks.bench_metrics [--ratings 100000] [--requests 2000] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import timeit
+
+from benchmarks.load import format_result, run_load, serve
+from benchmarks.synthetic import write_dataset
+from models.artifacts import compile_artifacts
+from models.metrics import timed
+
+
+def decorator_overhead_us(number: int = 1_000_000) -> float:
+    def bare():
+        return None
+
+    wrapped = timed("bench")(bare)
+    return (timeit.timeit(wrapped, number=number) - timeit.timeit(bare, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratings", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"@timed overhead: {decorator_overhead_us():.2f} us/call")
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        data_dir = os.path.join(root_dir, "data")
+        n_users = max(610, args.ratings // 160)
+        write_dataset(data_dir, n_users=n_users, n_movies=max(9724, args.ratings // 20), n_ratings=args.ratings)
+        compile_artifacts(data_dir)
+
+        async def send(client, i):
+            return await client.post("/api/recommendations", json={"user_id": str(i % n_users + 1)})
+
+        for label, env in (("metrics off", {"METRICS_ENABLED": "false"}),
+                           ("metrics on", {"METRICS_ENABLED": "true"}),
+                           ("metrics + Server-Timing", {"METRICS_ENABLED": "true", "SERVER_TIMING": "true"})):
+            with serve(root_dir, env=env) as base_url:
+                result = asyncio.run(run_load(None, send, args.concurrency, args.requests, base_url=base_url))
+            print(format_result(label, result))
+
+
+if __name__ == "__main__":
+    main()
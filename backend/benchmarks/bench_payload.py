@@ -0,0 +1,118 @@
+"""
+Bytes on the wire and serialization CPU of the list endpoints.
+
+Wire bytes are measured through the full ASGI app (middleware included) for
+each endpoint: uncompressed, gzip, gzip with `?fields=`, and the 304 a client
+gets when revalidating with If-None-Match. Serialization time compares
+FastAPI's own path (`serialize_response` with the route's response model,
+then JSONResponse for routes without one) against CompactJSONResponse with
+orjson and with the stdlib fallback, on the same payloads.
+
+    python -m benchmarks.bench_payload [--repeat 2000]
+"""
+import argparse
+import asyncio
+import tempfile
+
+import httpx
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import serialize_response
+
+from benchmarks.load import load_app
+from benchmarks.measure import mean_us
+from routers import genres, movies, recommendations, responses
+from routers.responses import CompactJSONResponse
+
+RECOMMENDATION_FIELDS = "movieId,title,poster_path,predicted_rating"
+
+CASES = [
+    # label, method, path, params, JSON body, fields
+    ("genres", "GET", "/api/genres", {}, None, None),
+    ("movies limit=20", "GET", "/api/movies", {"genre": "Drama", "limit": 20, "seed": 1}, None, "id,title"),
+    ("movies limit=200", "GET", "/api/movies", {"genre": "Drama", "limit": 200, "seed": 1}, None, "id,title"),
+    ("recommendations top_k=10", "POST", "/api/recommendations", {}, {"user_id": "1", "top_k": 10},
+     RECOMMENDATION_FIELDS),
+    ("recommendations top_k=100", "POST", "/api/recommendations", {}, {"user_id": "1", "top_k": 100},
+     RECOMMENDATION_FIELDS),
+]
+
+
+def wire_bytes(response: httpx.Response) -> int:
+    # httpx decodes gzip, so read the transferred size from Content-Length
+    return int(response.headers.get("content-length", len(response.content)))
+
+
+async def measure_wire(app) -> dict:
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, method, path, params, body, fields in CASES:
+            async def send(headers, extra_params=None):
+                return await client.request(method, path, params=dict(params, **(extra_params or {})),
+                                            json=body, headers=headers)
+
+            plain = await send({"Accept-Encoding": "identity"})
+            gzipped = await send({"Accept-Encoding": "gzip"})
+            row = {"identity": wire_bytes(plain), "gzip": wire_bytes(gzipped), "content": plain.json()}
+            if fields:
+                row["gzip+fields"] = wire_bytes(await send({"Accept-Encoding": "gzip"}, {"fields": fields}))
+            etag = plain.headers.get("etag")
+            if etag:
+                revalidated = await send({"Accept-Encoding": "gzip", "If-None-Match": etag})
+                row["304"] = wire_bytes(revalidated) if revalidated.status_code == 304 else None
+            results[label] = row
+    return results
+
+
+def run_sync(coroutine):
+    """Result of a coroutine that never suspends, without the cost of an event loop"""
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("coroutine suspended")
+
+
+def framework_serializer(path: str):
+    """FastAPI's serialization for the route: response model validation + dump, or jsonable_encoder + json"""
+    routes = recommendations.router.routes + movies.router.routes + genres.router.routes
+    field = next(route.response_field for route in routes if "/api" + route.path == path)
+    if field is not None:
+        return lambda content: Response(
+            run_sync(serialize_response(field=field, response_content=content, dump_json=True)),
+            media_type="application/json")
+    return lambda content: JSONResponse(run_sync(serialize_response(response_content=content)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        app = load_app(root_dir)
+        app.state.registry.load()
+        wire = asyncio.run(measure_wire(app))
+
+        print("bytes on the wire")
+        print(f"  {'':<27} {'identity':>9} {'gzip':>9} {'gzip+fields':>12} {'304':>6}")
+        for label, row in wire.items():
+            print(f"  {label:<27} {row['identity']:>9} {row['gzip']:>9} "
+                  f"{row.get('gzip+fields', '-'):>12} {row.get('304') if row.get('304') is not None else '-':>6}")
+
+        orjson = responses.orjson
+        print("\nserialization, us/response")
+        print(f"  {'':<27} {'framework':>10} {'orjson':>9} {'json':>9}")
+        for (label, _, path, _, _, _), row in zip(CASES, wire.values()):
+            content = row["content"]
+            framework = framework_serializer(path)
+            timings = [mean_us(lambda: framework(content), args.repeat, warmup=1)]
+            timings.append(mean_us(lambda: CompactJSONResponse(content), args.repeat, warmup=1) if orjson else float("nan"))
+            responses.orjson = None
+            timings.append(mean_us(lambda: CompactJSONResponse(content), args.repeat, warmup=1))
+            responses.orjson = orjson
+            print(f"  {label:<27} " + " ".join(f"{t:>9.1f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
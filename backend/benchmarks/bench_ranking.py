@@ -0,0 +1,70 @@
+"""
+Ranking stage: previous argsort/list.index implementation vs the mask +
+argpartition rewrite, for top_k from 10 to 1000.
+
+    python -m benchmarks.bench_ranking [--movies 9724] [--ratings 100000]
+"""
+import argparse
+import tempfile
+
+import numpy as np
+
+from benchmarks.measure import mean_ms
+from benchmarks.synthetic import write_dataset
+from models.data_processor import DataProcessor
+from models.recommendation_model import RecommendationModel
+
+
+def legacy_rank(model, user_id, predictions, top_k):
+    """Ranking as get_recommendations did it before the rewrite"""
+    rated_movies = set()
+    user_idx = model.user_id_to_idx[int(user_id)]
+    indices, ratings = model.ratings_store.user_items(user_idx)
+    rated_movies.update(indices[ratings > 0].tolist())
+    for idx in rated_movies:
+        if idx < len(predictions):
+            predictions[idx] = float('-inf')
+
+    top_indices = np.argsort(predictions)[::-1][:top_k]
+    top_movie_ids = [str(model.movie_ids[idx]) for idx in top_indices if idx < len(model.movie_ids)]
+    if len(top_movie_ids) < top_k:
+        popular_movies = model.data_processor.ratings_df.groupby('movieId')['rating'].mean().sort_values(ascending=False)
+        for movie_id in popular_movies.index:
+            if str(movie_id) not in top_movie_ids:
+                top_movie_ids.append(str(movie_id))
+                if len(top_movie_ids) >= top_k:
+                    break
+    top_movie_ids = top_movie_ids[:top_k]
+
+    scores = {}
+    for movie_id in top_movie_ids:
+        idx = model.movie_ids.index(int(movie_id)) if int(movie_id) in model.movie_ids else -1
+        scores[movie_id] = float(predictions[idx]) if 0 <= idx < len(predictions) else 0.0
+    return top_movie_ids, scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=610)
+    parser.add_argument("--movies", type=int, default=9724)
+    parser.add_argument("--ratings", type=int, default=100_000)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_dataset(data_dir, n_users=args.users, n_movies=args.movies, n_ratings=args.ratings)
+        model = RecommendationModel(DataProcessor(data_dir))
+
+    user_id = str(model.user_ids[0])
+    predictions = model._predict_with_model(model._get_user_vector(user_id))
+    print(f"catalog: {len(model.movie_ids)} movies")
+
+    for top_k in args.top_k:
+        legacy = mean_ms(lambda: legacy_rank(model, user_id, predictions.copy(), top_k), max(1, args.repeat // 10))
+        rewritten = mean_ms(lambda: model._rank_predictions(user_id, {}, predictions.copy(), top_k, True), args.repeat)
+        print(f"top_k={top_k:<5} legacy {legacy:9.3f} ms   rewritten {rewritten:9.3f} ms   x{legacy / rewritten:.0f}")
+
+
+if __name__ == "__main__":
+    main()
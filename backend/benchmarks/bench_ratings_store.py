@@ -0,0 +1,85 @@
+"""
+Memory and latency of the CSR RatingsStore at MovieLens scale.
+
+Defaults to a MovieLens-25M-sized synthetic dataset (162,541 users, 59,047
+movies, 25M ratings). With --compare-dense the legacy dense pivot is also
+built and its cell-by-cell row access timed; only use it at small scales.
+
+    python -m benchmarks.bench_ratings_store [--ratings 25000000] [--compare-dense]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.measure import call_latencies_ms, peak_rss_mb
+from models.ratings_store import RatingsStore
+
+
+def make_rating_arrays(n_users: int, n_movies: int, n_ratings: int, seed: int = 0):
+    """Column arrays shaped like ratings.csv, generated without going through pandas"""
+    rng = np.random.default_rng(seed)
+    movie_weights = 1.0 / np.arange(1, n_movies + 1) ** 0.8
+    movie_weights /= movie_weights.sum()
+    users = rng.integers(1, n_users + 1, size=n_ratings, dtype=np.int64)
+    movies = rng.choice(n_movies, size=n_ratings, p=movie_weights).astype(np.int64) + 1
+    ratings = (rng.integers(1, 11, size=n_ratings) / 2.0).astype(np.float32)
+    return users, movies, ratings
+
+
+def percentiles(samples_ms):
+    return np.percentile(samples_ms, 50), np.percentile(samples_ms, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=162_541)
+    parser.add_argument("--movies", type=int, default=59_047)
+    parser.add_argument("--ratings", type=int, default=25_000_000)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--compare-dense", action="store_true")
+    args = parser.parse_args()
+
+    users, movies, ratings = make_rating_arrays(args.users, args.movies, args.ratings)
+    rss_before = peak_rss_mb()
+
+    start = time.perf_counter()
+    store = RatingsStore.from_arrays(users, movies, ratings)
+    build_s = time.perf_counter() - start
+
+    dense_bytes = store.n_users * store.n_movies * 8  # pivot().fillna(0) is float64
+    print(f"dataset    : {store.n_users} users x {store.n_movies} movies, {store.nnz} ratings")
+    print(f"build      : {build_s:.2f} s (peak RSS +{peak_rss_mb() - rss_before:.0f} MB)")
+    print(f"CSR arrays : {store.nbytes / 2**20:10.1f} MB")
+    print(f"dense pivot: {dense_bytes / 2**20:10.1f} MB (estimated)")
+
+    rng = np.random.default_rng(1)
+    sample_users = [(int(u),) for u in rng.integers(0, store.n_users, size=args.samples)]
+    sample_ids = [(int(store.user_ids[u]),) for (u,) in sample_users]
+    row_nnz = np.diff(store.indptr)
+    print(f"row nnz    : mean {row_nnz.mean():.1f}, max {row_nnz.max()}")
+
+    for name, fn, call_args in (
+        ("has_user", store.has_user, sample_ids),
+        ("user_items", store.user_items, sample_users),
+        ("user_vector", store.user_vector, sample_users),
+    ):
+        p50, p99 = percentiles(call_latencies_ms(fn, call_args))
+        print(f"{name:<11}: p50 {p50 * 1000:8.1f} us   p99 {p99 * 1000:8.1f} us")
+
+    if args.compare_dense:
+        df = pd.DataFrame({"userId": users, "movieId": movies, "rating": ratings})
+        df = df.drop_duplicates(subset=["userId", "movieId"])
+        matrix = df.pivot(index="userId", columns="movieId", values="rating").fillna(0)
+        columns = matrix.columns.tolist()
+
+        def dense_row(user_idx):
+            return [matrix.iloc[user_idx][movie_id] for movie_id in columns]
+
+        p50, p99 = percentiles(call_latencies_ms(dense_row, sample_users[:5]))
+        print(f"dense row  : p50 {p50:8.1f} ms   p99 {p99:8.1f} ms (legacy iloc loop)")
+
+
+if __name__ == "__main__":
+    main()
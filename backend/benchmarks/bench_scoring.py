@@ -0,0 +1,85 @@
+"""
+Parity check and micro-benchmark for the vectorized scoring engine.
+
+Compares ScoringEngine against the original per-item loop that
+RecommendationModel._predict_with_model used, then times single-user and
+batched scoring. The parity itself is covered by tests/test_scoring.py.
+
+    python -m benchmarks.bench_scoring [--users 610] [--movies 9724] [--ratings 100000]
+"""
+import argparse
+import tempfile
+
+import numpy as np
+import torch
+
+from benchmarks.measure import mean_ms
+from benchmarks.synthetic import write_dataset
+from models.data_processor import DataProcessor
+from models.recommendation_model import RecommendationModel
+
+
+def reference_scores(model: RecommendationModel, user_vector: np.ndarray) -> np.ndarray:
+    """The per-item loop previously used for state_dict models"""
+    device = model.backend.device
+    item_embeddings = model.backend.scoring_engine.item_embeddings
+    user_vector = torch.from_numpy(user_vector).to(device).unsqueeze(0)
+    rated_indices = torch.nonzero(user_vector[0]).flatten()
+
+    user_profile = torch.zeros(item_embeddings.size(1), device=device)
+    for idx in rated_indices:
+        if idx < item_embeddings.size(0):
+            user_profile += user_vector[0, idx] * item_embeddings[idx]
+    user_profile = user_profile / len(rated_indices)
+
+    similarities = torch.zeros(len(model.movie_ids), device=device)
+    for i in range(len(model.movie_ids)):
+        if i < item_embeddings.size(0):
+            item_emb = item_embeddings[i]
+            similarities[i] = torch.dot(user_profile, item_emb) / (
+                torch.norm(user_profile) * torch.norm(item_emb) + 1e-8
+            )
+    return similarities.cpu().numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=610)
+    parser.add_argument("--movies", type=int, default=9724)
+    parser.add_argument("--ratings", type=int, default=100_000)
+    parser.add_argument("--parity-users", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_dataset(data_dir, n_users=args.users, n_movies=args.movies, n_ratings=args.ratings)
+        model = RecommendationModel(DataProcessor(data_dir), backend="torch")
+
+    user_ids = model.user_ids[:args.parity_users]
+    vectors = [model._get_user_vector(str(uid)) for uid in user_ids]
+
+    # Parity: same top-k ranking and scores within float32 tolerance
+    for uid, vector in zip(user_ids, vectors):
+        expected = reference_scores(model, vector)
+        actual = model._predict_with_model(vector)
+        np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-5)
+        expected_top = np.argsort(expected)[::-1][:args.top_k]
+        actual_top = np.argsort(actual)[::-1][:args.top_k]
+        np.testing.assert_array_equal(actual_top, expected_top, err_msg=f"Ranking mismatch for user {uid}")
+    print(f"parity: OK ({len(user_ids)} users, top-{args.top_k})")
+
+    loop_ms = mean_ms(lambda: reference_scores(model, vectors[0]), repeat=1)
+    single_ms = mean_ms(lambda: model._predict_with_model(vectors[0]), repeat=50)
+    engine = model.backend.scoring_engine
+    print(f"catalog: {len(model.movie_ids)} movies, dim={engine.dim}")
+    print(f"per-item loop         : {loop_ms:9.2f} ms/user")
+    print(f"engine, single user   : {single_ms:9.3f} ms/user")
+
+    for batch_size in (8, 64, 256):
+        batch = torch.from_numpy(np.stack([vectors[i % len(vectors)] for i in range(batch_size)]))
+        batch_ms = mean_ms(lambda: engine.score(batch), repeat=10)
+        print(f"engine, batch of {batch_size:<4} : {batch_ms / batch_size:9.3f} ms/user")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+"More like this": offline neighbour build and GET /api/movies/{movieId}/similar latency.
+
+Builds the top-M similarity index on synthetic datasets (embeddings only and
+blended with co-rating counts), checks it against a brute-force cosine ranking
+and times the endpoint through the ASGI app with and without the precomputed
+index.
+
+    python -m benchmarks.bench_similar [--movies 9724 50000] [--top-m 50] [--requests 2000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.measure import call_latencies_ms
+from benchmarks.synthetic import write_dataset
+from models.artifacts import artifacts_dir, compile_artifacts
+from models.registry import DataRegistry
+from models.similarity import SIMILARITY_MANIFEST, build_similarity_index
+
+
+def recall(index, normalized: np.ndarray, sample: int = 200, seed: int = 0) -> float:
+    """Fraction of the exact top-M neighbours present in the index"""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(normalized), size=min(sample, len(normalized)), replace=False)
+    top_m = index.top_m
+    hits = 0
+    for row in rows:
+        similarities = normalized @ normalized[row]
+        similarities[row] = -np.inf
+        exact = set(np.argpartition(-similarities, top_m - 1)[:top_m].tolist())
+        hits += len(exact & set(np.asarray(index.neighbors[row]).tolist()))
+    return hits / (len(rows) * top_m)
+
+
+def endpoint_latency(data_dir: str, movie_ids, requests: int) -> dict:
+    """Median and p99 latency of the endpoint in ms, via an in-process client"""
+    from fastapi.testclient import TestClient
+
+    from main import app
+    app.state.registry = DataRegistry(data_dir)
+
+    with contextlib.redirect_stdout(io.StringIO()), TestClient(app) as client:
+        for movie_id in movie_ids[:50]:
+            client.get(f"/api/movies/{movie_id}/similar")
+        timings = []
+        for movie_id in random.Random(0).choices(movie_ids, k=requests):
+            start = time.perf_counter()
+            response = client.get(f"/api/movies/{movie_id}/similar", params={"limit": 10})
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+
+        # Lookup alone, without HTTP/JSON overhead
+        model = app.state.registry.current.recommendation_model
+        lookup_us = statistics.fmean(call_latencies_ms(model.similar_movies,
+                                                       [(movie_id, 10) for movie_id in movie_ids[:requests]])) * 1000
+
+    timings.sort()
+    return {"p50": statistics.median(timings), "p99": timings[int(len(timings) * 0.99) - 1], "lookup_us": lookup_us}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movies", type=int, nargs="+", default=[9724, 50_000])
+    parser.add_argument("--top-m", type=int, default=50)
+    parser.add_argument("--co-rating-weight", type=float, default=0.3)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    for n_movies in args.movies:
+        with tempfile.TemporaryDirectory() as data_dir:
+            write_dataset(data_dir, n_users=610, n_movies=n_movies, n_ratings=max(100_000, n_movies * 10))
+            with contextlib.redirect_stdout(io.StringIO()):
+                compile_artifacts(data_dir)
+                blended = build_similarity_index(data_dir, top_m=args.top_m,
+                                                 co_rating_weight=args.co_rating_weight,
+                                                 out_dir=os.path.join(data_dir, "blended"))
+                index = build_similarity_index(data_dir, top_m=args.top_m)
+
+            normalized = np.load(os.path.join(artifacts_dir(data_dir), "item_embeddings_normalized.npy"))
+            size_mb = (index.neighbors.nbytes + index.scores.nbytes) / 2**20
+            print(f"{n_movies:>6} movies  build {index.manifest['build_seconds']:5.2f} s "
+                  f"(blended {blended.manifest['build_seconds']:5.2f} s)  {size_mb:5.1f} MB  "
+                  f"recall@{index.top_m} {recall(index, normalized[:len(index.movie_ids)]):.3f}")
+
+            movie_ids = index.movie_ids.tolist()
+            with_index = endpoint_latency(data_dir, movie_ids, args.requests)
+            os.remove(os.path.join(artifacts_dir(data_dir), SIMILARITY_MANIFEST))
+            without_index = endpoint_latency(data_dir, movie_ids, args.requests)
+            for label, result in (("precomputed", with_index), ("on the fly", without_index)):
+                print(f"        {label:<12} lookup {result['lookup_us']:7.1f} us   "
+                      f"endpoint p50 {result['p50']:6.2f} ms   p99 {result['p99']:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Cold-start time and memory: CSV path vs compiled mmap artifacts.
+
+Each measurement runs in a fresh interpreter that builds DataProcessor and
+RecommendationModel and reports wall time plus RSS and private (unshared)
+memory from /proc/self/smaps_rollup. Private memory is what each additional
+uvicorn worker costs.
+
+    python -m benchmarks.bench_startup [--ratings 100000 1000000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.load import BACKEND_DIR
+from benchmarks.synthetic import write_dataset
+from models.artifacts import compile_artifacts
+
+CHILD = r"""
+import json, sys, time
+from benchmarks.measure import process_memory_mb
+start = time.perf_counter()
+from models.data_processor import DataProcessor
+from models.recommendation_model import RecommendationModel
+imported = time.perf_counter()
+model = RecommendationModel(DataProcessor(sys.argv[1]))
+loaded = time.perf_counter()
+
+memory = process_memory_mb()
+print(json.dumps({
+    "import_s": imported - start,
+    "load_s": loaded - imported,
+    "rss_mb": memory["rss_mb"],
+    "private_mb": memory["private_mb"],
+}))
+"""
+
+
+def measure(data_dir: str, use_artifacts: bool) -> dict:
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, DATA_ARTIFACTS="true" if use_artifacts else "false")
+    output = subprocess.run([sys.executable, "-c", CHILD, data_dir], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratings", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    for n_ratings in args.ratings:
+        with tempfile.TemporaryDirectory() as data_dir:
+            n_users = max(610, n_ratings // 160)
+            write_dataset(data_dir, n_users=n_users, n_movies=max(9724, n_ratings // 20), n_ratings=n_ratings)
+            compile_artifacts(data_dir)
+
+            for label, use_artifacts in (("csv", False), ("compiled", True)):
+                result = measure(data_dir, use_artifacts)
+                print(f"{n_ratings:>9} ratings  {label:<9} import {result['import_s']:5.2f} s   "
+                      f"load {result['load_s']:6.2f} s   RSS {result['rss_mb']:7.1f} MB   "
+                      f"private {result['private_mb']:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
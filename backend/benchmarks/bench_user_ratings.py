@@ -0,0 +1,62 @@
+"""
+Deep /api/user_ratings pagination: per-request filter+sort vs the timeline index.
+
+    python -m benchmarks.bench_user_ratings [--ratings 1000000] [--limit 10]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.measure import mean_us
+from benchmarks.synthetic import make_ratings
+from models.ratings_store import RatingsStore
+
+
+def legacy_page(ratings_df, user_id, offset, limit):
+    user_ratings = ratings_df[ratings_df['userId'] == user_id]
+    user_ratings = user_ratings.sort_values(by='timestamp', ascending=False)
+    return user_ratings.iloc[offset:offset + limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--movies", type=int, default=20000)
+    parser.add_argument("--ratings", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    ratings_df = make_ratings(args.users, args.movies, args.ratings)
+    start = time.perf_counter()
+    store = RatingsStore.from_dataframe(ratings_df)
+    print(f"index build: {(time.perf_counter() - start) * 1000:.0f} ms for {store.nnz} ratings, "
+          f"{store.nbytes / 2**20:.1f} MB")
+
+    # Heaviest rater, paging from the first to the last page
+    heavy_idx = int(np.argmax(np.diff(store.indptr)))
+    heavy_id = int(store.user_ids[heavy_idx])
+    total = store.user_count(heavy_idx)
+    print(f"heaviest user {heavy_id}: {total} ratings")
+
+    for label, offset in (("first page", 0), ("middle page", total // 2), ("last page", total - args.limit)):
+        legacy = mean_us(lambda: legacy_page(ratings_df, heavy_id, offset, args.limit), 5)
+        indexed = mean_us(lambda: store.user_timeline(heavy_idx, offset, args.limit), 1000)
+        print(f"{label:<12} legacy {legacy:10.1f} us   timeline {indexed:8.1f} us")
+
+    # Cursor walk through every page
+    cursor, pages = None, 0
+    start = time.perf_counter()
+    while True:
+        movie_ids, _, timestamps = store.user_timeline(heavy_idx, limit=args.limit, after=cursor)
+        if len(movie_ids) == 0:
+            break
+        pages += 1
+        cursor = (int(timestamps[-1]), int(movie_ids[-1]))
+    per_page = (time.perf_counter() - start) * 1e6 / max(pages, 1)
+    print(f"cursor walk  {pages} pages, {per_page:.1f} us/page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Memory per worker and throughput scaling from 1 to N workers.
+
+Serves the app out of process with each configuration and worker count,
+waits for every worker to finish loading and reports RSS, PSS and private
+memory per worker plus POST /api/recommendations throughput and tail
+latency. PSS splits shared pages between the processes that map them; the
+total over the process tree (workers plus the supervisor or preloading
+parent) shows what each extra worker really costs.
+
+Configurations:
+- uvicorn-csv: `uvicorn --workers N` with the CSV loader (DATA_ARTIFACTS=false)
+- uvicorn: `uvicorn --workers N` with the compiled mmap artifacts
+- preload: serve.py, which loads once and forks the workers
+
+    python -m benchmarks.bench_workers [--ratings 1000000] [--workers 4] [--configs uvicorn preload]
+    python -m benchmarks.bench_workers --backend-dir /path/to/other/checkout/backend
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.load import BACKEND_DIR, child_pids, run_load, serve_process
+from benchmarks.measure import process_memory_mb
+from benchmarks.synthetic import write_dataset
+from models.artifacts import compile_artifacts
+
+CONFIGS = {
+    "uvicorn-csv": ("uvicorn", {"DATA_ARTIFACTS": "false"}),
+    "uvicorn": ("uvicorn", {"DATA_ARTIFACTS": "true"}),
+    "preload": ("preload", {"DATA_ARTIFACTS": "true"}),
+}
+
+
+def wait_until_settled(pids, interval: float = 1.0, timeout: float = 300.0):
+    """Wait until the workers' memory stops growing, i.e. every worker finished loading"""
+    previous = None
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        current = sum(process_memory_mb(pid)["rss_mb"] for pid in pids)
+        if previous is not None and abs(current - previous) < 1.0:
+            return
+        previous = current
+
+
+def measure(root_dir: str, config: str, workers: int, backend_dir: str, n_users: int, requests: int,
+            concurrency: int) -> dict:
+    server, env = CONFIGS[config]
+    # The cache would turn repeated users into hits; score every request
+    env = dict(env, RECOMMENDATION_CACHE_SIZE="0")
+    with serve_process(root_dir, env=env, workers=workers, backend_dir=backend_dir,
+                       server=server) as (base_url, process):
+        pids = child_pids(process.pid) if server == "preload" or workers > 1 else [process.pid]
+        # Exercise the data path once per worker so lazily built structures are counted
+        for user_id in range(1, 2 * workers + 1):
+            httpx.post(base_url + "/api/recommendations", json={"user_id": str(user_id)}, timeout=60.0)
+        wait_until_settled(pids)
+
+        async def send(client, i):
+            return await client.post("/api/recommendations", json={"user_id": str(i % n_users + 1)})
+
+        result = asyncio.run(run_load(None, send, concurrency, requests, base_url=base_url))
+        per_worker = [process_memory_mb(pid) for pid in pids]
+        result.update({key: sum(m[key] for m in per_worker) / len(per_worker) for key in per_worker[0]})
+        # The whole tree: the supervisor or preloading parent holds memory too
+        tree = per_worker if pids == [process.pid] else per_worker + [process_memory_mb(process.pid)]
+        result["total_pss_mb"] = sum(m["pss_mb"] for m in tree)
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratings", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=2, help="largest worker count (from 1)")
+    parser.add_argument("--configs", nargs="+", default=["uvicorn", "preload"], choices=sorted(CONFIGS))
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--backend-dir", default=BACKEND_DIR, help="backend directory to serve")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        data_dir = os.path.join(root_dir, "data")
+        n_users = max(610, args.ratings // 160)
+        write_dataset(data_dir, n_users=n_users, n_movies=max(9724, args.ratings // 20), n_ratings=args.ratings)
+        compile_artifacts(data_dir)
+
+        print(f"{args.ratings} ratings, {os.cpu_count()} CPUs")
+        for config in args.configs:
+            baseline = None
+            for workers in range(1, args.workers + 1):
+                result = measure(root_dir, config, workers, args.backend_dir, n_users, args.requests,
+                                 args.concurrency)
+                total_pss = result["total_pss_mb"]
+                baseline = total_pss if baseline is None else baseline
+                extra = (total_pss - baseline) / (workers - 1) if workers > 1 else 0.0
+                print(f"{config:<12} {workers} workers  total PSS {total_pss:7.1f} MB (+{extra:6.1f} MB/extra worker)   "
+                      f"per worker: RSS {result['rss_mb']:7.1f} MB   private {result['private_mb']:7.1f} MB   "
+                      f"{result['throughput_rps']:7.1f} req/s   "
+                      f"p99 {result['p99_ms']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Offline recall@k of the IVF index against exact scoring on data/ratings.csv.
+
+Item embeddings come from the model checkpoint when --model points to one;
+otherwise a truncated SVD of the ratings matrix stands in for them, which
+gives the clustered structure that real BERT+GAT embeddings have (random
+vectors would understate recall).
+
+    python -m benchmarks.eval_ann_recall [--ratings data/ratings.csv] [--model PATH] [--k 10]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import svds
+
+from models.ann_index import IVFIndex
+from models.ratings_store import RatingsStore, decode_ratings
+from models.scoring import ScoringEngine
+
+
+def load_item_embeddings(model_path, store: RatingsStore, dim: int) -> torch.Tensor:
+    if model_path:
+        state = torch.load(model_path, map_location="cpu")
+        for key, value in state.items():
+            if 'item' in key.lower() and 'embedding' in key.lower():
+                return value
+        raise ValueError(f"No item embeddings found in {model_path}")
+
+    matrix = csr_matrix((decode_ratings(store.ratings), store.indices, store.indptr), shape=(store.n_users, store.n_movies))
+    _, singular_values, vt = svds(matrix.astype(np.float64), k=dim)
+    return torch.from_numpy((vt.T * np.sqrt(singular_values)).astype(np.float32))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratings", default="data/ratings.csv")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    store = RatingsStore.from_dataframe(pd.read_csv(args.ratings))
+    engine = ScoringEngine(load_item_embeddings(args.model, store, args.dim), store.n_movies)
+
+    start = time.perf_counter()
+    index = IVFIndex.build(engine.normalized_embeddings.numpy(), n_lists=args.lists)
+    print(f"{store.n_users} users, {engine.n_items} items, {index.n_lists} lists, "
+          f"build {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    user_vectors = torch.from_numpy(np.stack([store.user_vector(u) for u in range(store.n_users)]))
+    profiles = engine.user_profiles(user_vectors).numpy()
+    profiles /= np.maximum(np.linalg.norm(profiles, axis=1, keepdims=True), 1e-12)
+    rated = [store.user_items(u)[0].astype(np.int64) for u in range(store.n_users)]
+
+    # Exact top-k with the same exclusion of rated movies
+    start = time.perf_counter()
+    exact = []
+    for u in range(store.n_users):
+        scores = engine.score(user_vectors[u])[0]
+        scores[rated[u]] = -np.inf
+        exact.append(set(np.argpartition(-scores, args.k)[:args.k].tolist()))
+    exact_us = (time.perf_counter() - start) * 1e6 / store.n_users
+    print(f"exact        recall@{args.k} 1.000   {exact_us:8.1f} us/query")
+
+    for n_probe in args.probes:
+        if n_probe > index.n_lists:
+            continue
+        start = time.perf_counter()
+        hits = 0
+        for u in range(store.n_users):
+            found, _ = index.search(profiles[u], args.k, exclude=rated[u], n_probe=n_probe)
+            hits += len(exact[u].intersection(found.tolist()))
+        ann_us = (time.perf_counter() - start) * 1e6 / store.n_users
+        recall = hits / (args.k * store.n_users)
+        print(f"ivf probe={n_probe:<3} recall@{args.k} {recall:.3f}   {ann_us:8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""In-process ASGI load driver shared by the backend benchmarks."""
+import asyncio
+import contextlib
+import importlib
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import write_dataset
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app(root_dir: str, **dataset_kwargs):
+    """
+    Write a synthetic dataset to root_dir/data and import the FastAPI app
+    from inside root_dir, since the routers resolve data/ relative to the cwd
+    """
+    write_dataset(os.path.join(root_dir, "data"), **dataset_kwargs)
+    os.chdir(root_dir)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    return importlib.import_module("main").app
+
+
+def summarize(latencies_ms, elapsed_s: float) -> Dict[str, float]:
+    latencies = np.asarray(latencies_ms)
+    return {
+        "requests": int(len(latencies)),
+        "throughput_rps": float(len(latencies) / elapsed_s) if elapsed_s > 0 else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p90_ms": float(np.percentile(latencies, 90)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+    }
+
+
+@contextlib.contextmanager
+def serve(root_dir: str, env: Dict[str, str] = None, workers: int = 1, timeout: float = 120.0):
+    """
+    Run uvicorn in a subprocess from root_dir and yield its base URL
+
+    Out-of-process serving keeps the load generator off the server's event
+    loop, so a blocked loop shows up as latency instead of being hidden.
+    """
+    with serve_process(root_dir, env=env, workers=workers, timeout=timeout) as (base_url, _):
+        yield base_url
+
+
+@contextlib.contextmanager
+def serve_process(root_dir: str, env: Dict[str, str] = None, workers: int = 1, timeout: float = 120.0,
+                  backend_dir: str = BACKEND_DIR, server: str = "uvicorn"):
+    """
+    Like serve(), but yield (base_url, process) and optionally serve another
+    checkout's backend; server="preload" runs serve.py (load once, fork workers)
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    if server == "preload":
+        command = [sys.executable, os.path.join(backend_dir, "serve.py"), "--host", "127.0.0.1"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app"]
+    process_env = dict(os.environ, PYTHONPATH=backend_dir, **(env or {}))
+    process = subprocess.Popen(
+        command + ["--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=root_dir, env=process_env, stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if httpx.get(base_url + "/").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.2)
+        yield base_url, process
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def run_load(app, send: Callable, concurrency: int, total_requests: int,
+                   base_url: str = None) -> Dict[str, float]:
+    """
+    Drive the app with `concurrency` workers until total_requests have been sent
+
+    Args:
+        app: ASGI application driven in-process, or None to use base_url
+        send: async callable (client, request_number) -> httpx.Response
+        concurrency: Number of concurrent in-flight requests
+        total_requests: Requests to send across all workers
+        base_url: URL of an out-of-process server (see serve())
+    """
+    latencies = []
+    errors = 0
+    counter = iter(range(total_requests))
+
+    if app is not None:
+        client_kwargs = {"transport": httpx.ASGITransport(app=app), "base_url": "http://bench"}
+    else:
+        client_kwargs = {"base_url": base_url, "timeout": 60.0,
+                         "limits": httpx.Limits(max_connections=concurrency)}
+
+    async with httpx.AsyncClient(**client_kwargs) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                response = await send(client, i)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    result = summarize(latencies, elapsed)
+    result["errors"] = errors
+    return result
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process, e.g. the uvicorn workers under the supervisor"""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The parent pid follows the parenthesised command name
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if parent == pid:
+            children.append(int(entry))
+    return children
+
+
+def format_result(label: str, result: Dict[str, float]) -> str:
+    return (f"{label:<28} {result['throughput_rps']:8.1f} req/s   "
+            f"p50 {result['p50_ms']:8.2f} ms   p99 {result['p99_ms']:8.2f} ms   errors {result['errors']}")
@@ -0,0 +1,70 @@
+"""
+Timing and memory helpers shared by the backend benchmarks.
+
+Standard library only, so the child interpreters that measure import time
+and memory (bench_startup, bench_inference, bench_load_ratings) can use it
+without skewing their own numbers.
+"""
+import time
+from typing import Callable, Dict, List, Sequence, Union
+
+
+def mean_ms(func: Callable, repeat: int = 1, warmup: int = 0) -> float:
+    """Mean wall time of func() in milliseconds, after `warmup` untimed calls"""
+    for _ in range(warmup):
+        func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def mean_us(func: Callable, repeat: int = 1, warmup: int = 0) -> float:
+    """Mean wall time of func() in microseconds, after `warmup` untimed calls"""
+    return mean_ms(func, repeat, warmup) * 1000
+
+
+def call_latencies_ms(func: Callable, arguments: Sequence[tuple], warmup: int = 0) -> List[float]:
+    """Wall time in milliseconds of func(*args) for each entry of arguments, after `warmup` untimed calls"""
+    for args in arguments[:warmup]:
+        func(*args)
+    latencies = []
+    for args in arguments:
+        start = time.perf_counter()
+        func(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def _proc_fields(path: str) -> Dict[str, int]:
+    """`Name: value kB` lines of a /proc file, in kB; empty where /proc is not available"""
+    fields = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        pass
+    return fields
+
+
+def rss_mb(pid: Union[int, str] = "self") -> float:
+    """Current resident set size (VmRSS)"""
+    return _proc_fields(f"/proc/{pid}/status").get("VmRSS", 0) / 1024
+
+
+def peak_rss_mb(pid: Union[int, str] = "self") -> float:
+    """Peak resident set size (VmHWM); starts over at exec, unlike ru_maxrss, which keeps the parent's peak"""
+    return _proc_fields(f"/proc/{pid}/status").get("VmHWM", 0) / 1024
+
+
+def process_memory_mb(pid: Union[int, str] = "self") -> Dict[str, float]:
+    """RSS, PSS (shared pages split between sharers) and private memory from smaps_rollup"""
+    fields = _proc_fields(f"/proc/{pid}/smaps_rollup")
+    return {
+        "rss_mb": fields.get("Rss", 0) / 1024,
+        "pss_mb": fields.get("Pss", 0) / 1024,
+        "private_mb": (fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024,
+    }
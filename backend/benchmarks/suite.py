@@ -0,0 +1,232 @@
+"""
+Reproducible benchmark suite for the backend, with JSON results for comparing commits.
+
+For each scale a synthetic MovieLens-shaped dataset and a stand-in model
+artifact are written (fixed seed) and compiled, then a fresh interpreter
+measures:
+
+- startup: importing the app and loading data + model, RSS afterwards
+- model: RecommendationModel.get_recommendations for existing and new
+  users, DataProcessor.get_movie_details
+- endpoints: /api/recommendations, /api/movies, /api/genres and deep
+  /api/user_ratings pages through the in-process ASGI load driver, at each
+  concurrency level (throughput and p50/p90/p99)
+
+The recommendation cache is disabled so repeated users are scored again.
+
+    python -m benchmarks.suite [--scales small medium] [--concurrency 1 8 32] [--output results.json]
+    python -m benchmarks.suite --compare baseline.json results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict
+
+import numpy as np
+
+from benchmarks.load import BACKEND_DIR, run_load, summarize
+from benchmarks.measure import call_latencies_ms, rss_mb
+
+# (users, movies, ratings) of each scale
+SCALES = {
+    "small": (610, 9_724, 100_000),
+    "medium": (6_250, 50_000, 1_000_000),
+    "large": (31_250, 100_000, 5_000_000),
+}
+
+# Metrics where lower is better; everything else (throughput) is higher-is-better
+LOWER_IS_BETTER = ("_s", "_ms", "_mb")
+
+
+def git_revision() -> Dict[str, object]:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+
+def timed_calls(func, arguments, warmup: int = 3) -> Dict[str, float]:
+    """Call func(*args) for each entry and summarize the per-call latency"""
+    start = time.perf_counter()
+    latencies = call_latencies_ms(func, arguments, warmup)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def run_scale(root_dir: str, concurrency, requests: int, samples: int, seed: int = 0) -> dict:
+    """Measurements for one dataset; runs in its own interpreter (see measure_scale)"""
+    os.chdir(root_dir)
+    sys.path.insert(0, BACKEND_DIR)
+    rng = random.Random(seed)
+
+    start = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        state = main.app.state.registry.load()
+    loaded = time.perf_counter()
+    results = {"startup": {"import_s": imported - start, "load_s": loaded - imported, "rss_mb": rss_mb()}}
+
+    model = state.recommendation_model
+    data_processor = state.data_processor
+    user_ids = [str(user_id) for user_id in model.user_ids]
+    movie_ids = [str(movie_id) for movie_id in model.movie_ids]
+
+    existing = [(rng.choice(user_ids),) for _ in range(samples)]
+    new_users = [(f"new-{i}", {movie_id: float(rng.randint(1, 10)) / 2
+                               for movie_id in rng.sample(movie_ids, rng.randint(5, 20))})
+                 for i in range(samples)]
+    details = [(rng.sample(movie_ids, 10),) for _ in range(samples)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["model"] = {
+            "recommendations_existing_user": timed_calls(model.get_recommendations, existing),
+            "recommendations_new_user": timed_calls(model.get_recommendations, new_users),
+            "movie_details_10": timed_calls(data_processor.get_movie_details, details),
+        }
+
+    genres = [genre for genre in state.catalog.genres if genre != "(no genres listed)"]
+    # Deep pages: the most active users, up to their last page
+    ratings_store = state.ratings_store
+    heavy_users = np.argsort(-np.diff(ratings_store.indptr))[:50].tolist()
+
+    async def recommendations(client, i):
+        return await client.post("/api/recommendations", json={"user_id": rng.choice(user_ids)})
+
+    async def movies(client, i):
+        return await client.get("/api/movies", params={"genre": rng.choice(genres), "limit": 20, "seed": 1,
+                                                       "page": rng.randint(1, 10)})
+
+    async def genre_list(client, i):
+        return await client.get("/api/genres")
+
+    async def user_ratings(client, i):
+        user_idx = rng.choice(heavy_users)
+        last_page = max(1, ratings_store.user_count(user_idx) // 10)
+        user_id = int(ratings_store.user_ids[user_idx])
+        return await client.post("/api/user_ratings", json={"user_id": str(user_id), "limit": 10,
+                                                            "page": rng.randint(1, last_page)})
+
+    endpoints = {"recommendations": recommendations, "movies": movies, "genres": genre_list,
+                 "user_ratings": user_ratings}
+    results["endpoints"] = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, send in endpoints.items():
+            results["endpoints"][name] = {
+                str(level): asyncio.run(run_load(main.app, send, level, requests)) for level in concurrency}
+    return results
+
+
+def measure_scale(root_dir: str, args) -> dict:
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, RECOMMENDATION_CACHE_SIZE="0", SERVER_TIMING="false")
+    command = [sys.executable, "-m", "benchmarks.suite", "--child", root_dir, "--requests", str(args.requests),
+               "--samples", str(args.samples), "--concurrency", *map(str, args.concurrency)]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True,
+                            cwd=BACKEND_DIR).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """Print metric changes between two result files; returns the number of regressions"""
+    print(f"baseline {baseline['meta'].get('commit')}  current {current['meta'].get('commit')}")
+    old, new = flatten(baseline["scales"]), flatten(current["scales"])
+    regressions = 0
+    for name in sorted(old.keys() & new.keys()):
+        metric = name.rsplit(".", 1)[1]
+        if ".dataset." in name or metric in ("requests", "errors") or old[name] == 0:
+            continue
+        change = (new[name] - old[name]) / old[name]
+        # The maximum is a single sample: shown, never flagged
+        worse = metric != "max_ms" and (change > threshold if metric.endswith(LOWER_IS_BETTER)
+                                        else change < -threshold)
+        regressions += worse
+        print(f"{name:<60} {old[name]:12.3f} {new[name]:12.3f} {change:+8.1%}{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def report(name: str, result: dict):
+    startup = result["startup"]
+    print(f"[{name}] startup: import {startup['import_s']:.2f} s  load {startup['load_s']:.2f} s  "
+          f"RSS {startup['rss_mb']:.0f} MB")
+    for label, stats in result["model"].items():
+        print(f"[{name}] {label:<32} p50 {stats['p50_ms']:8.3f} ms  p99 {stats['p99_ms']:8.3f} ms")
+    for endpoint, levels in result["endpoints"].items():
+        for level, stats in levels.items():
+            print(f"[{name}] {endpoint:<16} c={level:<4} {stats['throughput_rps']:8.1f} req/s  "
+                  f"p50 {stats['p50_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  errors {stats['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", default=["small", "medium"], choices=sorted(SCALES))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint and concurrency level")
+    parser.add_argument("--samples", type=int, default=200, help="calls per model-level measurement")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change flagged as regression")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scale(args.child, args.concurrency, args.requests, args.samples)))
+        return
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+    from benchmarks.synthetic import write_dataset
+    from models.artifacts import compile_artifacts
+
+    results = {
+        "meta": {**git_revision(), "python": platform.python_version(), "numpy": np.__version__,
+                 "machine": platform.machine(), "cpus": os.cpu_count(),
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "concurrency": args.concurrency,
+                 "requests": args.requests, "samples": args.samples},
+        "scales": {},
+    }
+    for name in args.scales:
+        n_users, n_movies, n_ratings = SCALES[name]
+        with tempfile.TemporaryDirectory() as root_dir:
+            data_dir = os.path.join(root_dir, "data")
+            with contextlib.redirect_stdout(io.StringIO()):
+                write_dataset(data_dir, n_users=n_users, n_movies=n_movies, n_ratings=n_ratings)
+                compile_artifacts(data_dir)
+            result = measure_scale(root_dir, args)
+        result["dataset"] = {"users": n_users, "movies": n_movies, "ratings": n_ratings}
+        results["scales"][name] = result
+        report(name, result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
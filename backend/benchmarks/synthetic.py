@@ -0,0 +1,84 @@
+"""Synthetic MovieLens-shaped datasets for the backend benchmarks."""
+import os
+import numpy as np
+import pandas as pd
+
+GENRES = [
+    "Action", "Adventure", "Animation", "Children", "Comedy", "Crime", "Documentary",
+    "Drama", "Fantasy", "Film-Noir", "Horror", "IMAX", "Musical", "Mystery",
+    "Romance", "Sci-Fi", "Thriller", "War", "Western",
+]
+
+MODEL_FILENAME = "bert_gat_with_graphsage_finetuned.pt"
+
+
+def make_ratings(n_users: int, n_movies: int, n_ratings: int, seed: int = 0) -> pd.DataFrame:
+    """Generate a ratings frame with a long-tailed user/movie activity distribution"""
+    rng = np.random.default_rng(seed)
+
+    # Zipf-like popularity so that a few movies and users dominate, as in MovieLens
+    movie_weights = 1.0 / np.arange(1, n_movies + 1) ** 0.8
+    movie_weights /= movie_weights.sum()
+    user_weights = 1.0 / np.arange(1, n_users + 1) ** 0.5
+    user_weights /= user_weights.sum()
+
+    users = rng.choice(n_users, size=n_ratings, p=user_weights).astype(np.int64) + 1
+    movies = rng.choice(n_movies, size=n_ratings, p=movie_weights).astype(np.int64) + 1
+    ratings = (rng.integers(1, 11, size=n_ratings) / 2.0).astype(np.float64)
+    timestamps = rng.integers(800_000_000, 1_700_000_000, size=n_ratings).astype(np.int64)
+
+    df = pd.DataFrame({"userId": users, "movieId": movies, "rating": ratings, "timestamp": timestamps})
+    # A user rates a movie at most once
+    return df.drop_duplicates(subset=["userId", "movieId"]).reset_index(drop=True)
+
+
+def make_movies(movie_ids, seed: int = 0) -> pd.DataFrame:
+    """Generate movies.csv rows with one to three pipe-separated genres"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for movie_id in movie_ids:
+        n_genres = int(rng.integers(1, 4))
+        genres = rng.choice(GENRES, size=n_genres, replace=False)
+        rows.append({
+            "movieId": int(movie_id),
+            "title": f"Movie {movie_id} ({1950 + movie_id % 70})",
+            "genres": "|".join(genres),
+        })
+    return pd.DataFrame(rows)
+
+
+def write_dataset(data_dir: str, n_users: int = 610, n_movies: int = 9724, n_ratings: int = 100_000,
+                  embedding_dim: int = 64, seed: int = 0, ratings: pd.DataFrame = None) -> str:
+    """
+    Write ratings.csv, movies.csv, links.csv, tmdb_data.csv and a stand-in
+    state_dict model artifact into data_dir
+    """
+    # torch only for the stand-in checkpoint, so the benchmarks' load driver does not import it
+    import torch
+
+    os.makedirs(data_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    if ratings is None:
+        ratings = make_ratings(n_users, n_movies, n_ratings, seed=seed)
+    ratings.to_csv(os.path.join(data_dir, "ratings.csv"), index=False)
+
+    movie_ids = np.arange(1, n_movies + 1)
+    make_movies(movie_ids, seed=seed).to_csv(os.path.join(data_dir, "movies.csv"), index=False)
+
+    tmdb_ids = movie_ids + 100_000
+    pd.DataFrame({"movieId": movie_ids, "imdbId": movie_ids + 1_000_000, "tmdbId": tmdb_ids}).to_csv(
+        os.path.join(data_dir, "links.csv"), index=False)
+    pd.DataFrame({
+        "id": tmdb_ids,
+        "poster_path": [f"/poster_{m}.jpg" for m in movie_ids],
+        "overview": [f"Overview of movie {m}" for m in movie_ids],
+        "vote_average": np.round(rng.uniform(1, 10, size=n_movies), 1),
+    }).to_csv(os.path.join(data_dir, "tmdb_data.csv"), index=False)
+
+    # One embedding row per rated movie, in the same order as the model's movie index
+    n_items = ratings["movieId"].nunique()
+    item_embeddings = torch.from_numpy(rng.standard_normal((n_items, embedding_dim)).astype(np.float32))
+    torch.save({"item_embedding.weight": item_embeddings}, os.path.join(data_dir, MODEL_FILENAME))
+
+    return data_dir
@@ -1,9 +1,27 @@
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from routers import recommendations, user_ratings, genres, movies
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+from models.executor import ComputeTimeout
+from models.metrics import MetricsMiddleware
+from models.registry import DataRegistry
+from routers import recommendations, user_ratings, genres, movies, admin, metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load data and model once per worker, shared by every router
+    app.state.registry.load()
+    app.state.registry.start()
+    yield
+    await app.state.registry.close()
 
 
-app = FastAPI(title="Movie Recommendation API")
+app = FastAPI(title="Movie Recommendation API", lifespan=lifespan)
+app.state.registry = DataRegistry(os.getenv("DATA_DIR", "data"))
 
 # Add CORS middleware
 app.add_middleware(
@@ -14,11 +32,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large lists (movies, recommendations, batch NDJSON) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1024")), compresslevel=5)
+
+# Request counters and latency histograms; SERVER_TIMING=true adds per-stage Server-Timing headers
+app.add_middleware(MetricsMiddleware, server_timing=os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes"))
+
+@app.exception_handler(ComputeTimeout)
+async def compute_timeout_handler(request: Request, exc: ComputeTimeout):
+    # Over the endpoint's concurrency/time budget: ask the client to retry shortly
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 # Include routers
 app.include_router(recommendations.router, prefix="/api", tags=["recommendations"])
 app.include_router(user_ratings.router, prefix="/api" , tags=["user_ratings"])
 app.include_router(genres.router, prefix="/api", tags=["genres"])
 app.include_router(movies.router, prefix="/api", tags=["movies"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
+app.include_router(metrics.router, tags=["metrics"])
 
 @app.get("/")
 async def root():
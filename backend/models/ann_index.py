@@ -0,0 +1,114 @@
+import numpy as np
+from typing import Optional, Tuple
+
+
+class IVFIndex:
+    def __init__(self, centroids: np.ndarray, list_offsets: np.ndarray, list_items: np.ndarray,
+                 list_vectors: np.ndarray, n_probe: int = 8):
+        """
+        Índice IVF (inverted file) para búsqueda aproximada por similitud coseno
+
+        Los embeddings normalizados se agrupan con k-means esférico; una consulta
+        solo puntúa las películas de las n_probe listas cuyos centroides son más
+        similares. Más listas exploradas = mayor recall y mayor latencia.
+
+        Args:
+            centroids: Matriz (n_lists, dim) de centroides normalizados
+            list_offsets: Desplazamientos de inicio de cada lista (n_lists + 1)
+            list_items: Índices de película agrupados por lista
+            list_vectors: Embeddings normalizados en el mismo orden que list_items
+            n_probe: Número de listas exploradas por consulta
+        """
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_items = list_items
+        self.list_vectors = list_vectors
+        self.n_probe = n_probe
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, normalized_embeddings: np.ndarray, n_lists: Optional[int] = None, n_probe: int = 8,
+              n_iter: int = 10, seed: int = 0) -> "IVFIndex":
+        """
+        Entrena los centroides con k-means esférico y construye las listas invertidas
+
+        Args:
+            normalized_embeddings: Matriz (n_items, dim) con filas de norma 1
+            n_lists: Número de listas; por defecto sqrt(n_items)
+            n_probe: Número de listas exploradas por consulta
+            n_iter: Iteraciones de k-means
+            seed: Semilla para la inicialización
+        """
+        vectors = np.ascontiguousarray(normalized_embeddings, dtype=np.float32)
+        n_items = len(vectors)
+        n_lists = max(1, min(n_lists or int(np.sqrt(n_items)), n_items))
+        rng = np.random.default_rng(seed)
+
+        centroids = vectors[rng.choice(n_items, size=n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, vectors)
+            counts = np.bincount(assignments, minlength=n_lists)
+
+            # Las listas vacías se reinician con un elemento al azar
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = vectors[rng.choice(n_items, size=int(empty.sum()), replace=False)]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind='stable')
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=list_offsets[1:])
+
+        return cls(
+            centroids=centroids.astype(np.float32),
+            list_offsets=list_offsets,
+            list_items=order.astype(np.int64),
+            list_vectors=vectors[order],
+            n_probe=n_probe,
+        )
+
+    def search(self, query: np.ndarray, top_k: int, exclude: Optional[np.ndarray] = None,
+               n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busca las películas más similares a la consulta
+
+        Args:
+            query: Vector (dim,) normalizado (p. ej. el perfil del usuario)
+            top_k: Número de resultados
+            exclude: Índices de película a excluir (ya calificadas)
+            n_probe: Listas a explorar; por defecto el valor del índice
+
+        Returns:
+            Tupla (índices de película, similitudes) ordenada de mayor a menor
+        """
+        query = np.asarray(query, dtype=np.float32).ravel()
+        n_probe = max(1, min(n_probe or self.n_probe, self.n_lists))
+
+        centroid_scores = self.centroids @ query
+        if n_probe < self.n_lists:
+            probes = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        else:
+            probes = np.arange(self.n_lists)
+
+        ranges = [slice(self.list_offsets[p], self.list_offsets[p + 1]) for p in probes]
+        candidates = np.concatenate([self.list_items[r] for r in ranges])
+        scores = np.concatenate([self.list_vectors[r] @ query for r in ranges])
+
+        if exclude is not None and len(exclude) > 0:
+            scores[np.isin(candidates, exclude)] = -np.inf
+
+        k = min(top_k, len(candidates))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        top = top[np.isfinite(scores[top])]
+        return candidates[top], scores[top]
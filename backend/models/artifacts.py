@@ -0,0 +1,210 @@
+"""
+Formato binario de arranque rápido para calificaciones, catálogo y embeddings
+
+Un paso de "compilación" escribe en data/compiled/ arrays NumPy (.npy) que el
+servicio abre con mmap al arrancar, en lugar de parsear los CSV, pivotar y
+cargar el checkpoint completo con torch.load. Varios workers de uvicorn que
+abren los mismos ficheros comparten las páginas en memoria.
+
+    python -m models.artifacts [--data-dir data] [--out data/compiled]
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from models.ratings_store import RatingsStore
+
+FORMAT_VERSION = 3
+MODEL_FILENAME = "bert_gat_with_graphsage_finetuned.pt"
+SOURCE_FILES = ('ratings.csv', 'movies.csv', 'links.csv', 'tmdb_data.csv')
+MANIFEST_FILENAME = "manifest.json"
+EMBEDDINGS_FILENAME = "item_embeddings.npy"
+NORMALIZED_FILENAME = "item_embeddings_normalized.npy"
+
+
+def file_fingerprint(paths: Iterable[str]) -> str:
+    """Hash corto del tamaño y la fecha de modificación de los ficheros indicados"""
+    digest = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+def source_fingerprint(data_dir: str) -> str:
+    return file_fingerprint(os.path.join(data_dir, name) for name in SOURCE_FILES)
+
+
+def artifacts_dir(data_dir: str) -> str:
+    """Directorio de artefactos: DATA_ARTIFACTS_DIR o data_dir/compiled"""
+    return os.getenv("DATA_ARTIFACTS_DIR") or os.path.join(data_dir, "compiled")
+
+
+class CompiledArtifacts:
+    def __init__(self, path: str, manifest: Dict):
+        self.path = path
+        self.manifest = manifest
+
+    @classmethod
+    def open(cls, data_dir: str) -> Optional["CompiledArtifacts"]:
+        """
+        Abre los artefactos del directorio de datos si existen y están al día
+
+        Si los CSV de origen siguen presentes y han cambiado desde la compilación
+        los artefactos se ignoran (devuelve None) y el servicio vuelve a los CSV.
+        Si no hay CSV (imagen de despliegue reducida) se usan tal cual.
+        """
+        if os.getenv("DATA_ARTIFACTS", "true").lower() in ("0", "false", "no"):
+            return None
+
+        path = artifacts_dir(data_dir)
+        manifest_path = os.path.join(path, MANIFEST_FILENAME)
+        if not os.path.exists(manifest_path):
+            return None
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != FORMAT_VERSION:
+            return None
+
+        has_sources = any(os.path.exists(os.path.join(data_dir, name)) for name in SOURCE_FILES)
+        if has_sources and manifest.get('source_fingerprint') != source_fingerprint(data_dir):
+            print(f"Artefactos compilados en {path} desactualizados; se usarán los CSV")
+            return None
+
+        return cls(path, manifest)
+
+    @property
+    def data_version(self) -> str:
+        return self.manifest['source_fingerprint']
+
+    @property
+    def has_embeddings(self) -> bool:
+        return self.manifest.get('model_fingerprint') is not None
+
+    @property
+    def model_fingerprint(self) -> Optional[str]:
+        return self.manifest.get('model_fingerprint')
+
+    def _load_array(self, name: str, mmap_mode: str = 'r') -> np.ndarray:
+        return np.load(os.path.join(self.path, name), mmap_mode=mmap_mode)
+
+    def ratings_store(self) -> RatingsStore:
+        """Almacén de calificaciones sobre arrays mapeados en memoria (sin copia)"""
+        arrays = {name: self._load_array(f"ratings_{name}.npy") for name in self.manifest['ratings_arrays']}
+        return RatingsStore(**arrays)
+
+    def catalog_movies(self):
+        """Entradas del catálogo sobre columnas mapeadas en memoria (ColumnarMovies)"""
+        from models.catalog import ColumnarMovies
+        return ColumnarMovies({name: self._load_array(f"catalog_{name}.npy")
+                               for name in self.manifest['catalog_arrays']})
+
+    def item_embeddings(self):
+        """
+        Embeddings de películas y su versión normalizada
+
+        Se abren en modo copy-on-write para que torch.from_numpy pueda
+        envolverlos sin copiar ni advertir sobre arrays de solo lectura.
+        """
+        return self._load_array(EMBEDDINGS_FILENAME, 'c'), self._load_array(NORMALIZED_FILENAME, 'c')
+
+
+def _save_array(out_dir: str, name: str, array: np.ndarray):
+    np.save(os.path.join(out_dir, name), np.ascontiguousarray(array))
+
+
+def compile_artifacts(data_dir: str = "data", out_dir: Optional[str] = None) -> Dict:
+    """
+    Compila calificaciones, mapeos de IDs, catálogo y embeddings a formato .npy
+
+    Args:
+        data_dir: Directorio con los CSV y el checkpoint del modelo
+        out_dir: Directorio de salida (por defecto data_dir/compiled)
+
+    Returns:
+        El manifiesto escrito
+    """
+    from models.catalog import MovieCatalog, catalog_arrays
+
+    out_dir = out_dir or artifacts_dir(data_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    fingerprint = source_fingerprint(data_dir)
+
+    # Sin manifiesto los artefactos se ignoran, así que nadie lee una compilación a medias
+    manifest_path = os.path.join(out_dir, MANIFEST_FILENAME)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    # Calificaciones: el almacén CSR incluye los mapeos userId/movieId <-> índice
+    store = RatingsStore.from_csv(os.path.join(data_dir, 'ratings.csv'))
+    ratings_arrays = store.arrays()
+    for name, array in ratings_arrays.items():
+        _save_array(out_dir, f"ratings_{name}.npy", array)
+
+    # Catálogo con los datos de TMDb ya unidos, por columnas: se abre con mmap y sin deserializar
+    catalog = MovieCatalog(data_dir)
+    catalog_columns = catalog_arrays(catalog.movies)
+    for name, array in catalog_columns.items():
+        _save_array(out_dir, f"catalog_{name}.npy", array)
+
+    # Embeddings de películas del checkpoint (solo para state_dicts)
+    model_path = os.path.join(data_dir, MODEL_FILENAME)
+    model_fingerprint = None
+    embedding_shape = None
+    if os.path.exists(model_path):
+        import torch
+        from models.scoring import find_item_embeddings, normalize_rows
+
+        model_data = torch.load(model_path, map_location="cpu")
+        item_embeddings = find_item_embeddings(model_data) if isinstance(model_data, dict) else None
+        if item_embeddings is not None:
+            embeddings = item_embeddings.detach().to(torch.float32)[:store.n_movies]
+            _save_array(out_dir, EMBEDDINGS_FILENAME, embeddings.numpy())
+            _save_array(out_dir, NORMALIZED_FILENAME, normalize_rows(embeddings).numpy())
+            model_fingerprint = file_fingerprint([model_path])
+            embedding_shape = list(embeddings.shape)
+        else:
+            print("El checkpoint no es un state_dict con embeddings; se seguirá cargando con torch.load")
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'created_at': time.time(),
+        'source_fingerprint': fingerprint,
+        'model_fingerprint': model_fingerprint,
+        'ratings_arrays': sorted(ratings_arrays),
+        'catalog_arrays': sorted(catalog_columns),
+        'n_users': store.n_users,
+        'n_movies': store.n_movies,
+        'n_ratings': store.nnz,
+        'n_catalog_movies': len(catalog),
+        'embedding_shape': embedding_shape,
+    }
+    # El manifiesto se escribe al final y de forma atómica
+    with open(manifest_path + ".tmp", 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = compile_artifacts(args.data_dir, args.out)
+    print(f"Artefactos compilados en {args.out or artifacts_dir(args.data_dir)} "
+          f"({time.perf_counter() - start:.1f} s): {manifest['n_ratings']} calificaciones, "
+          f"{manifest['n_catalog_movies']} películas, embeddings {manifest['embedding_shape']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Precálculo masivo de recomendaciones para todos los usuarios (o una lista)
+
+Reparte los usuarios en bloques entre un pool de procesos; cada proceso carga
+el modelo una vez (con los artefactos compilados las páginas se comparten) y
+puntúa sus bloques en lotes matriciales con RecommendationModel.recommend_users.
+Como mucho hay 2 bloques en vuelo por proceso, así que la memoria no crece con
+el número de usuarios. Los resultados se escriben en orden como NDJSON o Parquet.
+
+    python -m models.batch_recommendations [--data-dir data] [--top-k 10] [--workers 4]
+        [--users 1,2,3 | --users-file ids.txt] [--format ndjson|parquet] [--output out.ndjson]
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+Batch = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+# Memoria aproximada por celda (usuario, película) de un lote: calificaciones,
+# predicciones, candidatos, máscara y argpartition
+BYTES_PER_CELL = 24
+
+
+def batch_size_for(n_movies: int, memory_mb: float) -> int:
+    """Usuarios por lote para no superar memory_mb por proceso"""
+    return max(1, int(memory_mb * 2**20 // (max(n_movies, 1) * BYTES_PER_CELL)))
+
+
+def ndjson_lines(batch: Batch) -> str:
+    """
+    Una línea JSON por usuario: {"userId", "recommendations": [{"movieId", "predicted_rating"}]}
+
+    Formato reducido: a diferencia de /api/recommendations no incluye los
+    datos del catálogo (id de TMDb, título, póster, actual_rating), que el
+    consumidor puede unir por movieId.
+    """
+    user_ids, movie_ids, scores = batch
+    lines = []
+    for user_id, row_ids, row_scores in zip(user_ids.tolist(), movie_ids.tolist(), scores.tolist()):
+        recommendations = [
+            {"movieId": str(movie_id), "predicted_rating": score}
+            for movie_id, score in zip(row_ids, row_scores) if movie_id >= 0
+        ]
+        lines.append(json.dumps({"userId": user_id, "recommendations": recommendations}))
+    return "\n".join(lines) + "\n"
+
+
+class ParquetWriter:
+    def __init__(self, path: str):
+        """
+        Escribe los lotes en formato largo (userId, rank, movieId, score)
+
+        Requiere pyarrow, que es opcional.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("La salida Parquet requiere pyarrow (pip install pyarrow)")
+        self._pa = pa
+        self._schema = pa.schema([("userId", pa.int64()), ("rank", pa.int32()),
+                                  ("movieId", pa.int64()), ("score", pa.float32())])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, batch: Batch):
+        user_ids, movie_ids, scores = batch
+        valid = movie_ids >= 0
+        rows, ranks = np.nonzero(valid)
+        table = self._pa.Table.from_arrays([
+            self._pa.array(user_ids[rows]),
+            self._pa.array((ranks + 1).astype(np.int32)),
+            self._pa.array(movie_ids[valid]),
+            self._pa.array(scores[valid]),
+        ], schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        self._writer.close()
+
+
+# Estado de cada proceso del pool
+_worker_model = None
+
+
+def _init_worker(data_dir: str, threads: int):
+    global _worker_model
+    from models.data_processor import DataProcessor
+    from models.recommendation_model import RecommendationModel
+
+    # Los mensajes de carga van a stderr para no mezclarse con la salida NDJSON;
+    # cada proceso usa pocos hilos para no competir por los núcleos
+    sys.stdout = sys.stderr
+    _worker_model = RecommendationModel(DataProcessor(data_dir))
+    _worker_model.backend.limit_threads(threads)
+
+
+def _score_block(user_ids: List[int], top_k: int, batch_size: int) -> List[Batch]:
+    return list(_worker_model.recommend_users(user_ids, top_k=top_k, batch_size=batch_size))
+
+
+def _blocks(user_ids: List[int], size: int) -> Iterator[List[int]]:
+    for start in range(0, len(user_ids), size):
+        yield user_ids[start:start + size]
+
+
+def recommend_all(data_dir: str, user_ids: Optional[Iterable[int]] = None, top_k: int = 10,
+                  workers: int = 1, batch_size: Optional[int] = None, memory_mb: float = 256,
+                  model=None) -> Iterator[Batch]:
+    """
+    Genera las recomendaciones de los usuarios en lotes, en el orden dado
+
+    Args:
+        data_dir: Directorio de datos del modelo
+        user_ids: Usuarios a puntuar; por defecto todos los del dataset
+        top_k: Recomendaciones por usuario
+        workers: Procesos del pool; con 1 se puntúa en este proceso
+        batch_size: Usuarios por lote; por defecto según memory_mb
+        memory_mb: Memoria aproximada por lote y proceso
+        model: RecommendationModel ya cargado para workers=1
+
+    Returns:
+        Iterador de lotes (userIds, movieIds, puntuaciones)
+    """
+    from models.data_processor import DataProcessor
+    from models.recommendation_model import RecommendationModel
+
+    if model is None and workers <= 1:
+        model = RecommendationModel(DataProcessor(data_dir))
+    # Con el pool, este proceso solo necesita las calificaciones para listar usuarios
+    store = model.ratings_store if model is not None else DataProcessor(data_dir).ratings_store
+
+    if user_ids is None:
+        user_ids = store.user_ids.tolist()
+    user_ids = [int(user_id) for user_id in user_ids]
+    batch_size = batch_size or batch_size_for(store.n_movies, memory_mb)
+
+    if workers <= 1:
+        yield from model.recommend_users(user_ids, top_k=top_k, batch_size=batch_size)
+        return
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_dir, threads)) as pool:
+        pending = []
+        for block in _blocks(user_ids, batch_size):
+            pending.append(pool.submit(_score_block, block, top_k, batch_size))
+            # Limitar los bloques en vuelo para acotar la memoria
+            if len(pending) >= 2 * workers:
+                yield from pending.pop(0).result()
+        for future in pending:
+            yield from future.result()
+
+
+def write_recommendations(batches: Iterable[Batch], output: IO, output_format: str = "ndjson",
+                          path: Optional[str] = None) -> int:
+    """Escribe los lotes en output (NDJSON) o en path (Parquet); devuelve el número de usuarios"""
+    users = 0
+    if output_format == "parquet":
+        writer = ParquetWriter(path)
+        try:
+            for batch in batches:
+                writer.write(batch)
+                users += len(batch[0])
+        finally:
+            writer.close()
+        return users
+
+    for batch in batches:
+        output.write(ndjson_lines(batch))
+        users += len(batch[0])
+    return users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--memory-mb", type=float, default=256, help="memoria aproximada por lote y proceso")
+    parser.add_argument("--users", default=None, help="IDs separados por comas; por defecto todos")
+    parser.add_argument("--users-file", default=None, help="fichero con un ID por línea")
+    parser.add_argument("--format", choices=("ndjson", "parquet"), default="ndjson")
+    parser.add_argument("--output", default=None, help="fichero de salida; NDJSON por defecto a stdout")
+    args = parser.parse_args()
+
+    user_ids = None
+    if args.users:
+        user_ids = [int(user_id) for user_id in args.users.split(",") if user_id.strip()]
+    elif args.users_file:
+        with open(args.users_file) as f:
+            user_ids = [int(line) for line in f if line.strip()]
+
+    if args.format == "parquet" and not args.output:
+        parser.error("--output es obligatorio con --format parquet")
+
+    start = time.perf_counter()
+    model = None
+    if args.workers <= 1:
+        from models.data_processor import DataProcessor
+        from models.recommendation_model import RecommendationModel
+        with contextlib.redirect_stdout(sys.stderr):
+            model = RecommendationModel(DataProcessor(args.data_dir))
+
+    batches = recommend_all(args.data_dir, user_ids, top_k=args.top_k, workers=args.workers,
+                            batch_size=args.batch_size, memory_mb=args.memory_mb, model=model)
+    if args.format == "parquet":
+        users = write_recommendations(batches, None, "parquet", path=args.output)
+    elif args.output:
+        with open(args.output, "w") as f:
+            users = write_recommendations(batches, f)
+    else:
+        users = write_recommendations(batches, sys.stdout)
+
+    elapsed = time.perf_counter() - start
+    print(f"{users} usuarios en {elapsed:.1f} s ({users / elapsed:.0f} usuarios/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+
+class RecommendationBatcher:
+    def __init__(self, recommendation_model, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """
+        Agrupa solicitudes de recomendación concurrentes en micro-lotes
+
+        Las solicitudes que llegan dentro de la ventana max_wait_ms (o hasta
+        completar max_batch_size) se puntúan juntas en un hilo de trabajo, de
+        modo que el cálculo no bloquea el event loop.
+
+        Args:
+            recommendation_model: Instancia de RecommendationModel
+            max_batch_size: Número máximo de solicitudes por lote
+            max_wait_ms: Tiempo máximo de espera para completar un lote
+        """
+        self.recommendation_model = recommendation_model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recommendation-batcher")
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_started(self):
+        """Arranca el bucle de agrupación en el event loop actual"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, user_id: str, user_ratings: Dict[str, float] = None, top_k: int = 10,
+                     exclude: List[str] = None, recommendation_model=None,
+                     genres: List[str] = None) -> Tuple[List[str], Dict[str, float]]:
+        """
+        Encola una solicitud y espera su resultado
+
+        Args:
+            genres: Géneros preferidos, para usuarios sin calificaciones
+            recommendation_model: Modelo con el que puntuar la solicitud; por defecto
+                el del batcher. Tras una recarga en caliente, las solicitudes en curso
+                terminan con el modelo con el que empezaron
+
+        Returns:
+            Tupla (IDs recomendados, puntuaciones), igual que
+            RecommendationModel.get_recommendations con return_scores=True
+
+        Si se cancela (p. ej. al vencer el tiempo del endpoint) la solicitud se
+        descarta si aún no se ha puntuado; si su lote ya está en curso, la
+        cancelación no termina hasta que el lote acaba, para que quien limita
+        la concurrencia (ComputeExecutor.guard) conserve la plaza mientras tanto.
+        """
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        # future: resultado; settled: la solicitud ya salió del batcher (puntuada o descartada)
+        future, settled = loop.create_future(), loop.create_future()
+        model = recommendation_model if recommendation_model is not None else self.recommendation_model
+        await self._queue.put((user_id, user_ratings or {}, exclude, top_k, model, genres, future, settled))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            await settled
+            raise
+
+    async def _collect_batch(self) -> list:
+        """Espera la primera solicitud y agrupa las que lleguen dentro de la ventana"""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+
+            # Las solicitudes abandonadas mientras esperaban no se puntúan
+            for *_, future, settled in batch:
+                if future.done():
+                    settled.set_result(None)
+            batch = [item for item in batch if not item[6].done()]
+
+            # Las solicitudes con distinto top_k o modelo se puntúan en sub-lotes separados
+            groups: Dict[tuple, list] = {}
+            for item in batch:
+                groups.setdefault((item[4], item[3]), []).append(item)
+
+            for (model, top_k), items in groups.items():
+                requests = [(user_id, user_ratings, exclude, genres)
+                            for user_id, user_ratings, exclude, _, _, genres, _, _ in items]
+                try:
+                    results = await loop.run_in_executor(
+                        self._executor,
+                        lambda: model.get_recommendations_batch(
+                            requests, top_k=top_k, return_scores=True
+                        ),
+                    )
+                except Exception as e:
+                    for *_, future, _ in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                else:
+                    for (*_, future, _), result in zip(items, results):
+                        if not future.done():
+                            future.set_result(result)
+                finally:
+                    for *_, settled in items:
+                        settled.set_result(None)
+
+    async def close(self):
+        """Detiene el bucle de agrupación y libera el hilo de trabajo"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,299 @@
+import os
+import numpy as np
+import pandas as pd
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from models.genre_index import GenreIndex
+
+# Columnas de texto del catálogo compilado: bytes UTF-8 concatenados, desplazamientos y nulos
+CATALOG_TEXT_FIELDS = ('title', 'genres', 'poster_path', 'overview')
+
+
+def _clean(value):
+    """Convierte los NaN de pandas en None para que la respuesta sea JSON válido"""
+    return None if pd.isna(value) else value
+
+
+def _encode_texts(values: Iterable[Optional[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Textos -> (bytes UTF-8 concatenados, desplazamientos n+1, máscara de nulos)"""
+    encoded = [value.encode('utf-8') if isinstance(value, str) else None for value in values]
+    lengths = np.array([len(value) if value is not None else 0 for value in encoded], dtype=np.int64)
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    data = np.frombuffer(b''.join(value for value in encoded if value is not None), dtype=np.uint8)
+    return data, offsets, np.array([value is None for value in encoded], dtype=bool)
+
+
+def _float_or_none(value) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+def catalog_arrays(movies: Dict[int, Dict]) -> Dict[str, np.ndarray]:
+    """
+    Columnas del catálogo para los artefactos compilados, ordenadas por movieId
+
+    Los números van en arrays de tipo fijo (NaN o -1 = sin valor) y los textos
+    en bytes UTF-8 concatenados con sus desplazamientos, de modo que se pueden
+    abrir con mmap y leer fila a fila sin deserializar nada.
+    """
+    entries = [movies[movie_id] for movie_id in sorted(movies)]
+    tmdb = [entry['tmdb'] or {} for entry in entries]
+
+    def floats(values):
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+    arrays = {
+        'movie_id': np.array([entry['movieId'] for entry in entries], dtype=np.int64),
+        'vote_average': floats(entry['vote_average'] for entry in entries),
+        'tmdb_id': np.array([details.get('tmdbId', -1) for details in tmdb], dtype=np.int64),
+        'tmdb_vote_average': floats(details.get('vote_average') for details in tmdb),
+    }
+    texts = {
+        'title': (_clean(entry['title']) for entry in entries),
+        'genres': (_clean(entry['genres']) for entry in entries),
+        'poster_path': (details.get('poster_path') for details in tmdb),
+        'overview': (details.get('overview') for details in tmdb),
+    }
+    for field in CATALOG_TEXT_FIELDS:
+        arrays[f'{field}_data'], arrays[f'{field}_offsets'], arrays[f'{field}_null'] = _encode_texts(texts[field])
+    return arrays
+
+
+class ColumnarMovies(Mapping):
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        """
+        Entradas del catálogo leídas de las columnas compiladas (catalog_arrays)
+
+        Se comporta como el diccionario movieId -> entrada del catálogo, pero
+        cada entrada se construye al consultarla a partir de los arrays, que
+        pueden estar mapeados en memoria y compartidos entre workers.
+
+        Args:
+            arrays: Columnas por nombre, ordenadas por movieId
+        """
+        self._arrays = arrays
+        self._ids = arrays['movie_id']
+
+    def _row(self, movie_id: int) -> Optional[int]:
+        row = int(np.searchsorted(self._ids, movie_id))
+        return row if row < len(self._ids) and self._ids[row] == movie_id else None
+
+    def _text(self, field: str, row: int) -> Optional[str]:
+        if self._arrays[f'{field}_null'][row]:
+            return None
+        offsets = self._arrays[f'{field}_offsets']
+        return self._arrays[f'{field}_data'][offsets[row]:offsets[row + 1]].tobytes().decode('utf-8')
+
+    def texts(self, field: str) -> Iterator[Optional[str]]:
+        """Valores de una columna de texto, en el orden de los movieIds"""
+        return (self._text(field, row) for row in range(len(self._ids)))
+
+    def tmdb_to_movie(self) -> Dict[int, int]:
+        tmdb_ids = self._arrays['tmdb_id']
+        has_tmdb = tmdb_ids >= 0
+        return dict(zip(tmdb_ids[has_tmdb].tolist(), self._ids[has_tmdb].tolist()))
+
+    def __getitem__(self, movie_id) -> Dict:
+        row = self._row(int(movie_id))
+        if row is None:
+            raise KeyError(movie_id)
+        tmdb = None
+        if self._arrays['tmdb_id'][row] >= 0:
+            tmdb = {
+                'tmdbId': int(self._arrays['tmdb_id'][row]),
+                'poster_path': self._text('poster_path', row),
+                'overview': self._text('overview', row),
+                'vote_average': _float_or_none(self._arrays['tmdb_vote_average'][row]),
+            }
+        return {
+            'movieId': int(self._ids[row]),
+            'title': self._text('title', row),
+            'genres': self._text('genres', row),
+            'vote_average': _float_or_none(self._arrays['vote_average'][row]),
+            'tmdb': tmdb,
+        }
+
+    def __contains__(self, movie_id) -> bool:
+        return self._row(int(movie_id)) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids.tolist())
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class MovieCatalog:
+    def __init__(self, data_dir: str = "data", movies: Optional[Mapping] = None):
+        """
+        Catálogo de películas en memoria con los datos de TMDb ya unidos
+
+        Se carga una sola vez y permite buscar por movieId o tmdbId en O(1).
+
+        Args:
+            data_dir: Directorio con movies.csv y, opcionalmente, links.csv y tmdb_data.csv
+            movies: Entradas ya unidas (p. ej. ColumnarMovies de los artefactos
+                compilados); si se indican no se leen los CSV
+        """
+        self.data_dir = data_dir
+        self._movies_df: Optional[pd.DataFrame] = None
+        if movies is None:
+            self._load()
+        else:
+            self._index(movies)
+
+    @property
+    def movies_df(self) -> pd.DataFrame:
+        """movieId, título y géneros; sin CSV se construye en el primer uso"""
+        if self._movies_df is None:
+            if isinstance(self.movies, ColumnarMovies):
+                rows = zip(self.movies, self.movies.texts('title'), self.movies.texts('genres'))
+            else:
+                rows = ((m['movieId'], m['title'], m['genres']) for m in self.movies.values())
+            self._movies_df = pd.DataFrame(list(rows), columns=['movieId', 'title', 'genres'])
+        return self._movies_df
+
+    def _load(self):
+        movies_path = os.path.join(self.data_dir, 'movies.csv')
+        links_path = os.path.join(self.data_dir, 'links.csv')
+        tmdb_path = os.path.join(self.data_dir, 'tmdb_data.csv')
+
+        if not os.path.exists(movies_path):
+            raise FileNotFoundError(f"Movies data file not found in {self.data_dir}")
+
+        self._movies_df = pd.read_csv(movies_path)
+        has_vote_average = 'vote_average' in self._movies_df.columns
+
+        # Unir movies -> links -> tmdb una sola vez (primera coincidencia, como antes)
+        tmdb_by_movie = {}
+        if os.path.exists(links_path) and os.path.exists(tmdb_path):
+            links_df = pd.read_csv(links_path)
+            tmdb_df = pd.read_csv(tmdb_path)
+            if 'tmdbId' in links_df.columns:
+                links_df = links_df.drop_duplicates(subset='movieId')[['movieId', 'tmdbId']].dropna()
+                tmdb_df = tmdb_df.drop_duplicates(subset='id')
+                joined = links_df.merge(tmdb_df, left_on='tmdbId', right_on='id', how='inner')
+                for row in joined.to_dict('records'):
+                    tmdb_by_movie[int(row['movieId'])] = {
+                        'tmdbId': int(row['tmdbId']),
+                        'poster_path': _clean(row.get('poster_path')),
+                        'overview': _clean(row.get('overview')),
+                        'vote_average': float(row['vote_average']) if _clean(row.get('vote_average')) is not None else None,
+                    }
+
+        movies = {}
+        for row in self._movies_df.drop_duplicates(subset='movieId').to_dict('records'):
+            movie_id = int(row['movieId'])
+            vote_average = _clean(row.get('vote_average')) if has_vote_average else None
+            movies[movie_id] = {
+                'movieId': movie_id,
+                'title': row['title'],
+                'genres': row.get('genres'),
+                'vote_average': float(vote_average) if vote_average is not None else None,
+                'tmdb': tmdb_by_movie.get(movie_id),
+            }
+        self._index(movies)
+
+    def _index(self, movies: Mapping):
+        """Construye los índices por movieId, tmdbId y género"""
+        self.movies = movies
+        if isinstance(movies, ColumnarMovies):
+            # Solo se leen las columnas necesarias, sin construir cada entrada
+            self.tmdb_to_movie = movies.tmdb_to_movie()
+            self.genre_index = GenreIndex.from_genres(zip(movies, movies.texts('genres')))
+            return
+
+        self.tmdb_to_movie: Dict[int, int] = {}
+        for movie_id, entry in movies.items():
+            if entry['tmdb'] is not None:
+                self.tmdb_to_movie[entry['tmdb']['tmdbId']] = movie_id
+
+        # Índice invertido de géneros para /api/genres y /api/movies
+        self.genre_index = GenreIndex.from_movies(self.movies)
+
+    @property
+    def genres(self) -> List[str]:
+        """Géneros únicos ordenados alfabéticamente"""
+        return self.genre_index.genres
+
+    def __len__(self) -> int:
+        return len(self.movies)
+
+    def __contains__(self, movie_id) -> bool:
+        return self.get(movie_id) is not None
+
+    def get(self, movie_id) -> Optional[Dict]:
+        """Busca una película por su movieId de MovieLens"""
+        try:
+            return self.movies.get(int(movie_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_by_tmdb_id(self, tmdb_id) -> Optional[Dict]:
+        """Busca una película por su ID de TMDb"""
+        try:
+            movie_id = self.tmdb_to_movie.get(int(tmdb_id))
+        except (TypeError, ValueError):
+            return None
+        return self.movies.get(movie_id) if movie_id is not None else None
+
+    def title(self, movie_id, default: str = "Unknown Movie") -> str:
+        entry = self.get(movie_id)
+        if entry is None or _clean(entry['title']) is None:
+            return default
+        return entry['title']
+
+    def movie_details(self, movie_ids) -> List[Dict]:
+        """
+        Devuelve los detalles de las películas en el formato esperado por el frontend
+
+        Las películas desconocidas se omiten, igual que antes.
+        """
+        movie_details = []
+        for movie_id in movie_ids:
+            if not isinstance(movie_id, (int, str)):
+                continue
+
+            entry = self.get(movie_id)
+            if entry is None:
+                continue
+
+            movie_detail = {
+                'id': str(movie_id),  # TMDb ID for frontend
+                'movieId': str(entry['movieId']),  # Keep the MovieLens ID for matching with predictions
+                'title': entry['title'],
+                'vote_average': entry['vote_average'],
+            }
+
+            # Add TMDb details if available
+            tmdb = entry['tmdb']
+            if tmdb is not None:
+                movie_detail['poster_path'] = tmdb['poster_path']
+                movie_detail['overview'] = tmdb['overview']
+                movie_detail['vote_average'] = tmdb['vote_average']
+
+            movie_details.append(movie_detail)
+
+        return movie_details
+
+
+_catalogs: Dict[str, MovieCatalog] = {}
+
+
+def get_catalog(data_dir: str = "data", reload: bool = False) -> MovieCatalog:
+    """
+    Devuelve el catálogo compartido del directorio, cargándolo la primera vez
+
+    Con reload=True se vuelve a leer de disco y reemplaza al compartido; quien
+    ya tenga una referencia al anterior puede seguir usándolo.
+    """
+    key = os.path.abspath(data_dir)
+    if reload or key not in _catalogs:
+        # Preferir los artefactos compilados si están al día
+        from models.artifacts import CompiledArtifacts
+        artifacts = CompiledArtifacts.open(data_dir)
+        if artifacts is not None:
+            _catalogs[key] = MovieCatalog(data_dir, movies=artifacts.catalog_movies())
+        else:
+            _catalogs[key] = MovieCatalog(data_dir)
+    return _catalogs[key]
@@ -0,0 +1,150 @@
+"""
+Recomendaciones para usuarios sin calificaciones
+
+La calificación media sin más premia a las películas con una sola
+calificación de 5 estrellas. Aquí la media se suaviza con un prior bayesiano
+(media ponderada con m calificaciones ficticias de valor μ):
+
+    puntuación = (suma + m·μ) / (n + m)
+
+Para el ranking global μ es la media de todas las calificaciones; para cada
+género, la media de las calificaciones de sus películas. m es
+COLD_START_PRIOR_WEIGHT o, por defecto, la mediana de calificaciones por
+película. Los rankings por género se precalculan al cargar los datos (y por
+tanto en cada recarga), así que una recomendación solo recorre las primeras
+posiciones de unas listas ya ordenadas, sin puntuar con el modelo.
+
+Estas puntuaciones son medias suavizadas en la escala de las calificaciones
+(0.5-5) y no se pueden comparar con las del modelo (similitud coseno), así
+que se devuelven como PopularityScores y la API las publica en
+popularity_score en lugar de predicted_rating.
+"""
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+class PopularityScores(dict):
+    """movieId -> media suavizada de un ranking por popularidad (no es una predicción del modelo)"""
+
+
+def bayesian_means(sums, counts, prior_mean: float, prior_weight: float):
+    """Media suavizada (suma + m·μ) / (n + m); las películas sin calificaciones quedan en 0"""
+    counts = np.asarray(counts, dtype=np.float64)
+    smoothed = (np.asarray(sums, dtype=np.float64) + prior_weight * prior_mean) / (counts + prior_weight)
+    return np.where(counts > 0, smoothed, 0.0)
+
+
+class ColdStartRanker:
+    def __init__(self, prior_mean: float, prior_weight: float,
+                 genre_rankings: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        """
+        Rankings de popularidad suavizada por género
+
+        El ranking global no se guarda aquí: es RecommendationModel.popular_indices,
+        que usa el mismo prior y se actualiza con cada calificación en línea.
+
+        Args:
+            prior_mean: Media global de las calificaciones (μ)
+            prior_weight: Peso del prior en calificaciones (m)
+            genre_rankings: Género -> (índices de películas, puntuaciones), en orden descendente
+        """
+        self.prior_mean = prior_mean
+        self.prior_weight = prior_weight
+        self.genre_rankings = genre_rankings
+
+    @classmethod
+    def build(cls, sums: np.ndarray, counts: np.ndarray, genre_postings: Dict[str, Iterable[int]],
+              movie_id_to_idx, prior_weight: float = None, depth: int = None) -> "ColdStartRanker":
+        """
+        Calcula el prior y los rankings por género
+
+        Args:
+            sums: Suma de calificaciones por índice de película
+            counts: Número de calificaciones por índice de película
+            genre_postings: Género -> movieIds (GenreIndex.postings)
+            movie_id_to_idx: Mapeo movieId -> índice de película
+            prior_weight: m; por defecto COLD_START_PRIOR_WEIGHT o la mediana de calificaciones por película
+            depth: Posiciones guardadas por género (COLD_START_GENRE_DEPTH)
+        """
+        counts = np.asarray(counts)
+        rated = counts > 0
+        total = float(counts.sum())
+        prior_mean = float(np.sum(sums)) / total if total else 0.0
+        if prior_weight is None:
+            prior_weight = float(os.getenv("COLD_START_PRIOR_WEIGHT", "0"))
+        if prior_weight <= 0:
+            prior_weight = float(np.median(counts[rated])) if rated.any() else 1.0
+        depth = depth or int(os.getenv("COLD_START_GENRE_DEPTH", "500"))
+
+        genre_rankings = {}
+        for genre, movie_ids in genre_postings.items():
+            indices = [movie_id_to_idx.get(int(movie_id)) for movie_id in movie_ids]
+            indices = np.array([idx for idx in indices if idx is not None and idx < len(counts)], dtype=np.int64)
+            indices = indices[rated[indices]]
+            if len(indices) == 0:
+                continue
+
+            # Prior propio del género: la media de las calificaciones de sus películas
+            genre_mean = float(np.sum(sums[indices]) / counts[indices].sum())
+            scores = bayesian_means(sums[indices], counts[indices], genre_mean, prior_weight)
+            order = np.lexsort((indices, -scores))[:depth]
+            genre_rankings[genre] = (indices[order], scores[order].astype(np.float32))
+
+        return cls(prior_mean, prior_weight, genre_rankings)
+
+    def smoothed(self, sums, counts):
+        """Media suavizada con el prior global"""
+        return bayesian_means(sums, counts, self.prior_mean, self.prior_weight)
+
+    def recommend(self, popular: np.ndarray, popular_scores: np.ndarray, top_k: int,
+                  genres: Optional[List[str]] = None, excluded: Set[int] = frozenset()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Las top_k películas más populares, primero de los géneros preferidos
+
+        Con varios géneros se alternan sus rankings para que todos aparezcan;
+        si no llegan a top_k se completa con el ranking global. El coste depende
+        de top_k y de las exclusiones, no del tamaño del catálogo.
+
+        Args:
+            popular: Ranking global (índices de películas, de más a menos popular)
+            popular_scores: Media suavizada por índice de película
+            top_k: Número de recomendaciones
+            genres: Géneros preferidos; los desconocidos se ignoran
+            excluded: Índices de películas que no deben recomendarse
+
+        Returns:
+            Tupla (índices de películas, puntuaciones)
+        """
+        chosen: List[int] = []
+        scores: List[float] = []
+        seen = set(excluded)
+
+        rankings = [self.genre_rankings[genre] for genre in dict.fromkeys(genres or []) if genre in self.genre_rankings]
+        positions = [0] * len(rankings)
+        while len(chosen) < top_k and rankings:
+            for r, (indices, genre_scores) in enumerate(rankings):
+                # Siguiente película de este género que no esté ya elegida ni excluida
+                while positions[r] < len(indices) and int(indices[positions[r]]) in seen:
+                    positions[r] += 1
+                if positions[r] < len(indices) and len(chosen) < top_k:
+                    idx = int(indices[positions[r]])
+                    chosen.append(idx)
+                    scores.append(float(genre_scores[positions[r]]))
+                    seen.add(idx)
+            rankings_left = [r for r, (indices, _) in enumerate(rankings) if positions[r] < len(indices)]
+            rankings = [rankings[r] for r in rankings_left]
+            positions = [positions[r] for r in rankings_left]
+
+        for idx in popular:
+            if len(chosen) >= top_k:
+                break
+            idx = int(idx)
+            if idx in seen or idx >= len(popular_scores):
+                continue
+            chosen.append(idx)
+            scores.append(float(popular_scores[idx]))
+            seen.add(idx)
+
+        return np.array(chosen, dtype=np.int64), np.array(scores, dtype=np.float32)
@@ -1,78 +1,123 @@
+import csv
+import hashlib
 import os
+import threading
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Any
+from models.artifacts import CompiledArtifacts, file_fingerprint, source_fingerprint
+from models.catalog import MovieCatalog, get_catalog
+from models.metrics import timed
+from models.ratings_store import RatingsStore, decode_ratings
+
+# Ratings received through POST /api/ratings, appended by compaction and replayed at startup
+RATINGS_LOG_FILENAME = 'ratings_delta.csv'
 
 class DataProcessor:
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", catalog: MovieCatalog = None):
         self.data_dir = data_dir
+        self.ratings_log_path = os.path.join(data_dir, RATINGS_LOG_FILENAME)
+        self._catalog = catalog
+        self._compaction_lock = threading.Lock()
         self._load_data()
 
     def _load_data(self):
-        """Load movies and ratings data"""
+        """Load movies and ratings data, from the compiled artifacts when they are up to date"""
         movies_path = os.path.join(self.data_dir, 'movies.csv')
         ratings_path = os.path.join(self.data_dir, 'ratings.csv')
 
-        if not os.path.exists(movies_path) or not os.path.exists(ratings_path):
-            raise FileNotFoundError(f"Required data files not found in {self.data_dir}")
+        self.artifacts = CompiledArtifacts.open(self.data_dir)
 
-        self.movies_df = pd.read_csv(movies_path)
-        self.ratings_df = pd.read_csv(ratings_path)
+        if self.artifacts is None and (not os.path.exists(movies_path) or not os.path.exists(ratings_path)):
+            raise FileNotFoundError(f"Required data files not found in {self.data_dir}")
 
-        # Create a movie lookup dictionary for faster access
-        self.movie_lookup = {str(row['movieId']): {
-            'title': row['title'],
-            'genres': row['genres']
-        } for _, row in self.movies_df.iterrows()}
+        # Movies, links and TMDb data are loaded once and shared with the routers
+        self.catalog = self._catalog if self._catalog is not None else get_catalog(self.data_dir)
+
+        if self.artifacts is not None:
+            # Memory-mapped arrays: no CSV parsing, pages shared between workers
+            self._ratings_df = None
+            self.ratings_store = self.artifacts.ratings_store()
+            self.data_version = self.artifacts.data_version
+        else:
+            # Sparse per-user index over the ratings, shared with the recommendation model.
+            # Streamed in chunks with compact dtypes; ratings_df is rebuilt from it on demand
+            self._ratings_df = None
+            self.ratings_store = RatingsStore.from_csv(ratings_path)
+
+            # Identifies this snapshot of the data files, e.g. for cache invalidation
+            self.data_version = source_fingerprint(self.data_dir)
+
+        self._replay_ratings_log()
+        self._movie_lookup = None
+
+    @property
+    def movies_df(self) -> pd.DataFrame:
+        return self.catalog.movies_df
+
+    @property
+    def movie_lookup(self) -> Dict[str, Dict]:
+        """Title and genres by movieId, built on first use so compiled catalogs are not decoded at startup"""
+        if self._movie_lookup is None:
+            self._movie_lookup = {str(movie_id): {
+                'title': movie['title'],
+                'genres': movie['genres']
+            } for movie_id, movie in self.catalog.movies.items()}
+        return self._movie_lookup
+
+    @property
+    def ratings_df(self) -> pd.DataFrame:
+        """Ratings as a DataFrame, rebuilt from the ratings store when loaded from artifacts or after a compaction"""
+        if self._ratings_df is None:
+            store = self.ratings_store
+            frame = {
+                'userId': np.repeat(store.user_ids, np.diff(store.indptr)),
+                'movieId': store.movie_ids[store.indices],
+                'rating': decode_ratings(store.ratings).astype(np.float64),
+            }
+            if store.timestamps is not None:
+                frame['timestamp'] = store.timestamps
+            self._ratings_df = pd.DataFrame(frame)
+        return self._ratings_df
+
+    def _replay_ratings_log(self):
+        """Apply the ratings persisted by earlier compactions on top of ratings.csv"""
+        if not os.path.exists(self.ratings_log_path):
+            return
+
+        log_df = pd.read_csv(self.ratings_log_path)
+        for user_id, movie_id, rating, timestamp in zip(log_df['userId'].tolist(), log_df['movieId'].tolist(),
+                                                        log_df['rating'].tolist(), log_df['timestamp'].tolist()):
+            self.ratings_store.add_ratings(user_id, {movie_id: rating}, timestamp)
+        self.ratings_store.compact()
+        self._ratings_df = None
+
+        log_version = file_fingerprint([self.ratings_log_path])
+        self.data_version = hashlib.blake2b(f"{self.data_version}:{log_version}".encode(), digest_size=8).hexdigest()
+
+    def compact_ratings(self) -> int:
+        """Persist pending online ratings to the ratings log and merge them into the ratings store"""
+        with self._compaction_lock:
+            upto, rows = self.ratings_store.pending_rows()
+            if not rows:
+                return 0
+
+            write_header = not os.path.exists(self.ratings_log_path)
+            with open(self.ratings_log_path, 'a', newline='') as f:
+                writer = csv.writer(f)
+                if write_header:
+                    writer.writerow(['userId', 'movieId', 'rating', 'timestamp'])
+                writer.writerows(rows)
+
+            self.ratings_store.compact(upto)
+            self._ratings_df = None
+            return len(rows)
 
     def preprocess_user_ratings(self, user_ratings: Dict[str, float]) -> Dict[str, float]:
         """Preprocess user ratings to ensure they're in the correct format"""
         return {str(movie_id): float(rating) for movie_id, rating in user_ratings.items()}
 
+    @timed("movie_details")
     def get_movie_details(self, movie_ids):
-        movies_path = os.path.join(self.data_dir, 'movies.csv')
-        movies_df = pd.read_csv(movies_path)
-
-        # Get TMDb data for posters, etc.
-        links_path = os.path.join(self.data_dir, 'links.csv')
-        tmdb_path = os.path.join(self.data_dir, 'tmdb_data.csv')
-
-        links_df = None
-        tmdb_df = None
-
-        if os.path.exists(links_path):
-            links_df = pd.read_csv(links_path)
-
-        if os.path.exists(tmdb_path):
-            tmdb_df = pd.read_csv(tmdb_path)
-
-        # Get details for requested movie IDs
-        movie_details = []
-        for movie_id in movie_ids:
-            if not isinstance(movie_id, (int, str)):
-                continue
-
-            movie_id_int = int(movie_id) if isinstance(movie_id, str) and movie_id.isdigit() else movie_id
-            movie_row = movies_df[movies_df['movieId'] == movie_id_int]
-
-            if not movie_row.empty:
-                movie_detail = {
-                    'id': str(movie_id),  # TMDb ID for frontend
-                    'movieId': str(movie_id_int),  # Keep the MovieLens ID for matching with predictions
-                    'title': movie_row['title'].iloc[0],
-                    'vote_average': float(movie_row['vote_average'].iloc[0]) if 'vote_average' in movie_row.columns else None,
-                }
-
-                # Add TMDb details if available
-                if links_df is not None and tmdb_df is not None:
-                    link_row = links_df[links_df['movieId'] == movie_id_int]
-                    if not link_row.empty and 'tmdbId' in link_row.columns:
-                        tmdb_id = link_row['tmdbId'].iloc[0]
-                        tmdb_row = tmdb_df[tmdb_df['id'] == tmdb_id]
-                        if not tmdb_row.empty:
-                            movie_detail['poster_path'] = tmdb_row['poster_path'].iloc[0] if 'poster_path' in tmdb_row.columns else None
-                            movie_detail['overview'] = tmdb_row['overview'].iloc[0] if 'overview' in tmdb_row.columns else None
-                            movie_detail['vote_average'] = float(tmdb_row['vote_average'].iloc[0]) if 'vote_average' in tmdb_row.columns else None
-
-                movie_details.append(movie_detail)
-
-        return movie_details
\ No newline at end of file
+        """Return frontend-ready details for the given MovieLens IDs from the in-memory catalog"""
+        return self.catalog.movie_details(movie_ids)
@@ -0,0 +1,231 @@
+"""
+Ejecución del cálculo y la E/S de las solicitudes fuera del event loop
+
+Los routers son async def: todo lo que bloquea (puntuar con el modelo,
+recorrer el catálogo o el almacén de calificaciones) se ejecuta en un pool de
+hilos acotado para que una solicitud lenta no detenga las demás. Cada
+endpoint tiene además un límite de solicitudes en curso y un tiempo máximo;
+al agotarlo se lanza ComputeTimeout y el router responde con un resultado
+degradado (caché o popularidad) o con 503.
+
+Configuración por variables de entorno:
+
+- COMPUTE_THREADS: hilos del pool (una por CPU, hasta 4); 0 ejecuta en el
+  event loop como antes
+- ENDPOINT_CONCURRENCY: solicitudes en curso por endpoint (el doble de hilos);
+  ENDPOINT_CONCURRENCY_<ENDPOINT> para uno concreto
+- REQUEST_TIMEOUT_MS: espera máxima, cola incluida (5000; 0 = sin límite);
+  REQUEST_TIMEOUT_MS_<ENDPOINT> para uno concreto. En las respuestas por
+  streaming (stream) solo acota la espera por la plaza
+"""
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from models.metrics import METRICS
+
+TIMEOUTS = METRICS.counter("compute_timeouts_total", "Requests that hit their concurrency/time budget",
+                           ("endpoint",))
+DEGRADED = METRICS.counter("degraded_responses_total", "Responses served from a fallback after a timeout",
+                           ("endpoint", "fallback"))
+
+
+class ComputeTimeout(Exception):
+    """El endpoint no obtuvo resultado dentro de su tiempo máximo (cola incluida)"""
+
+    def __init__(self, endpoint: str, timeout: float):
+        super().__init__(f"{endpoint} did not complete within {timeout * 1000:.0f} ms")
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+
+def _endpoint_setting(name: str, endpoint: str, default: str) -> str:
+    return os.getenv(f"{name}_{endpoint.upper()}", os.getenv(name, default))
+
+
+class ComputeExecutor:
+    def __init__(self, threads: int = 1, concurrency: int = 2, timeout_ms: float = 5000):
+        """
+        Pool de hilos acotado con límites de concurrencia y tiempo por endpoint
+
+        Args:
+            threads: Hilos del pool; 0 ejecuta las funciones en el event loop
+            concurrency: Solicitudes en curso por endpoint, salvo ENDPOINT_CONCURRENCY_<ENDPOINT>
+            timeout_ms: Tiempo máximo por solicitud, salvo REQUEST_TIMEOUT_MS_<ENDPOINT>; 0 = sin límite
+        """
+        self.threads = max(0, threads)
+        self.concurrency = max(1, concurrency)
+        self.timeout_ms = max(0.0, timeout_ms)
+        self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix="compute") if self.threads else None
+        # Semáforo de cada endpoint, ligado al event loop en el que se creó
+        self._limits: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+
+    @classmethod
+    def from_env(cls) -> "ComputeExecutor":
+        threads = int(os.getenv("COMPUTE_THREADS", str(min(4, os.cpu_count() or 1))))
+        return cls(
+            threads=threads,
+            # Lo justo para mantener ocupado el pool; el resto espera sin coste en el event loop
+            concurrency=int(os.getenv("ENDPOINT_CONCURRENCY", str(2 * max(1, threads)))),
+            timeout_ms=float(os.getenv("REQUEST_TIMEOUT_MS", "5000")),
+        )
+
+    def limit(self, endpoint: str) -> int:
+        return max(1, int(_endpoint_setting("ENDPOINT_CONCURRENCY", endpoint, str(self.concurrency))))
+
+    def timeout(self, endpoint: str) -> Optional[float]:
+        """Tiempo máximo en segundos, o None sin límite"""
+        timeout_ms = float(_endpoint_setting("REQUEST_TIMEOUT_MS", endpoint, str(self.timeout_ms)))
+        return timeout_ms / 1000 if timeout_ms > 0 else None
+
+    def _semaphore(self, endpoint: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        entry = self._limits.get(endpoint)
+        if entry is None or entry[0] is not loop:
+            entry = self._limits[endpoint] = (loop, asyncio.Semaphore(self.limit(endpoint)))
+        return entry[1]
+
+    async def _within_budget(self, endpoint: str, awaitable: Awaitable):
+        timeout = self.timeout(endpoint)
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            TIMEOUTS.inc(endpoint)
+            raise ComputeTimeout(endpoint, timeout) from None
+
+    async def run(self, endpoint: str, func: Callable, *args):
+        """
+        Ejecuta func(*args) en el pool respetando el límite y el tiempo del endpoint
+
+        Un hilo no se puede interrumpir: si vence el tiempo la solicitud
+        recibe ComputeTimeout, pero el cálculo termina en segundo plano y
+        conserva su plaza hasta entonces, así que el trabajo en curso nunca
+        supera el límite.
+
+        Raises:
+            ComputeTimeout: Si no terminó (o no obtuvo plaza) a tiempo
+        """
+        semaphore = self._semaphore(endpoint)
+
+        async def limited():
+            await semaphore.acquire()
+            if self._executor is None:
+                try:
+                    return func(*args)
+                finally:
+                    semaphore.release()
+            # Con el contexto de la solicitud, para que las etapas medidas lleguen a Server-Timing
+            context = contextvars.copy_context()
+            future = asyncio.get_running_loop().run_in_executor(self._executor, context.run, func, *args)
+            future.add_done_callback(lambda _: semaphore.release())
+            return await asyncio.shield(future)
+
+        return await self._within_budget(endpoint, limited())
+
+    async def guard(self, endpoint: str, factory: Callable[[], Awaitable]):
+        """
+        Aplica el límite y el tiempo del endpoint a una corrutina (p. ej. el micro-batcher)
+
+        Como en run, la plaza se libera cuando la corrutina termina de verdad:
+        si vence el tiempo se cancela, y la que no puede abandonar el trabajo
+        en curso (una solicitud cuyo lote ya se está puntuando) la conserva
+        hasta acabarlo.
+
+        Raises:
+            ComputeTimeout: Si no terminó (o no obtuvo plaza) a tiempo
+        """
+        semaphore = self._semaphore(endpoint)
+
+        async def limited():
+            await semaphore.acquire()
+            task = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda _: semaphore.release())
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+
+        return await self._within_budget(endpoint, limited())
+
+    async def stream(self, endpoint: str, iterator: Iterator) -> AsyncIterator:
+        """
+        Obtiene una plaza del endpoint y devuelve un iterador asíncrono que recorre iterator en el pool
+
+        La plaza se conserva durante todo el recorrido (p. ej. un trabajo por
+        lotes en streaming) y se libera al terminar, al cerrarse el iterador o,
+        si el cliente se desconecta a mitad de un paso, cuando ese paso acaba.
+        Un iterador que nunca llega a recorrerse (el cliente se desconectó
+        antes del primer fragmento) la libera al destruirse. Se obtiene antes
+        de devolver el iterador para poder responder 503 antes de empezar a
+        enviar la respuesta.
+
+        Raises:
+            ComputeTimeout: Si no obtuvo plaza a tiempo
+        """
+        semaphore = self._semaphore(endpoint)
+        await self._within_budget(endpoint, semaphore.acquire())
+        return _SlotIterator(self._executor, semaphore, iterator)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+def _release_after(step: Optional[asyncio.Future], semaphore: asyncio.Semaphore):
+    """Libera la plaza, o la deja para cuando acabe el paso que aún se ejecuta en el pool"""
+    if step is not None and not step.done():
+        step.add_done_callback(lambda _: semaphore.release())
+    else:
+        semaphore.release()
+
+
+class _SlotIterator:
+    """Iterador de ComputeExecutor.stream: cada paso en el pool y la plaza liberada una sola vez"""
+
+    _DONE = object()
+
+    def __init__(self, executor: Optional[ThreadPoolExecutor], semaphore: asyncio.Semaphore, iterator: Iterator):
+        self._loop = asyncio.get_running_loop()
+        self._executor = executor
+        self._semaphore = semaphore
+        self._iterator = iterator
+        self._step: Optional[asyncio.Future] = None
+        self._released = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._released:
+            raise StopAsyncIteration
+        try:
+            if self._executor is None:
+                item = next(self._iterator, self._DONE)
+            else:
+                context = contextvars.copy_context()
+                self._step = self._loop.run_in_executor(self._executor, context.run, next, self._iterator, self._DONE)
+                item = await asyncio.shield(self._step)
+        except BaseException:
+            self._release()
+            raise
+        if item is self._DONE:
+            self._release()
+            raise StopAsyncIteration
+        return item
+
+    async def aclose(self):
+        self._release()
+
+    def _release(self):
+        if not self._released:
+            self._released = True
+            _release_after(self._step, self._semaphore)
+
+    def __del__(self):
+        # Nunca recorrido hasta el final ni cerrado: la plaza se devuelve en el event loop
+        if not self._released and not self._loop.is_closed():
+            self._released = True
+            self._loop.call_soon_threadsafe(_release_after, self._step, self._semaphore)
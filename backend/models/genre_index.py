@@ -0,0 +1,121 @@
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class GenreIndex:
+    def __init__(self, postings: Dict[str, np.ndarray], max_cached_orders: int = 128):
+        """
+        Índice invertido género -> movieIds
+
+        Args:
+            postings: Lista ordenada de movieIds por género
+            max_cached_orders: Órdenes aleatorios con semilla que se mantienen en caché
+        """
+        self.postings = postings
+        self.genres = sorted(postings)
+        self.max_cached_orders = max_cached_orders
+        self._orders: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        # Las solicitudes se atienden en el pool de hilos: el LRU se comparte entre ellos
+        self._orders_lock = threading.Lock()
+
+    @classmethod
+    def from_movies(cls, movies: Dict[int, Dict]) -> "GenreIndex":
+        """Construye el índice a partir de las entradas del catálogo"""
+        return cls.from_genres((movie_id, movie.get('genres')) for movie_id, movie in movies.items())
+
+    @classmethod
+    def from_genres(cls, genres: Iterable[Tuple[int, Optional[str]]]) -> "GenreIndex":
+        """Construye el índice a partir de pares (movieId, géneros separados por '|')"""
+        postings: Dict[str, List[int]] = {}
+        for movie_id, genre_str in genres:
+            if not isinstance(genre_str, str):
+                continue
+            for genre in genre_str.split('|'):
+                genre = genre.strip()
+                if genre:
+                    postings.setdefault(genre, []).append(movie_id)
+
+        return cls({genre: np.unique(np.asarray(ids, dtype=np.int64)) for genre, ids in postings.items()})
+
+    def matching(self, genres: Iterable[str], match_all: bool = False) -> np.ndarray:
+        """
+        Devuelve los movieIds ordenados que cumplen la consulta de géneros
+
+        Args:
+            genres: Géneros consultados
+            match_all: Si es True exige todos los géneros (AND); si no, cualquiera (OR)
+        """
+        lists = [self.postings.get(genre, np.empty(0, dtype=np.int64)) for genre in genres]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        if len(lists) == 1:
+            return lists[0]
+
+        # Intersectar empezando por la lista más corta
+        lists.sort(key=len)
+        result = lists[0]
+        for posting in lists[1:]:
+            result = np.intersect1d(result, posting, assume_unique=True) if match_all else np.union1d(result, posting)
+        return result
+
+    def sample(self, genres: Iterable[str], limit: int, match_all: bool = False,
+               rng: Optional[random.Random] = None) -> List[int]:
+        """
+        Selecciona hasta limit películas al azar sin materializar todas las coincidencias
+
+        Para un único género el coste es O(limit): se muestrean posiciones de la
+        lista de publicación y solo esas se leen.
+        """
+        matches = self.matching(genres, match_all)
+        if limit <= 0:
+            return []
+        if len(matches) <= limit:
+            return matches.tolist()
+
+        positions = (rng or random).sample(range(len(matches)), limit)
+        return matches[positions].tolist()
+
+    def _seeded_order(self, key: tuple, matches: np.ndarray, seed: int) -> np.ndarray:
+        """Permutación estable de las coincidencias para una semilla, con caché LRU"""
+        cache_key = key + (seed,)
+        with self._orders_lock:
+            order = self._orders.get(cache_key)
+            if order is not None:
+                self._orders.move_to_end(cache_key)
+                return order
+
+        # La permutación se calcula fuera del cerrojo; si dos hilos coinciden, ambas son iguales
+        order = matches[np.random.default_rng(seed).permutation(len(matches))]
+        with self._orders_lock:
+            self._orders[cache_key] = order
+            if len(self._orders) > self.max_cached_orders:
+                self._orders.popitem(last=False)
+        return order
+
+    def page(self, genres: Iterable[str], seed: int, page: int = 1, limit: int = 20,
+             match_all: bool = False) -> List[int]:
+        """
+        Devuelve una página de un orden aleatorio reproducible
+
+        La misma semilla produce siempre el mismo orden, de modo que las páginas
+        sucesivas no se solapan ni repiten películas.
+
+        Raises:
+            ValueError: Si page o limit son menores que 1
+        """
+        if page < 1 or limit < 1:
+            raise ValueError("page y limit deben ser al menos 1")
+        genres = list(genres)
+        matches = self.matching(genres, match_all)
+        key = (tuple(sorted(set(genres))), match_all)
+        order = self._seeded_order(key, matches, seed)
+
+        offset = (page - 1) * limit
+        return order[offset:offset + limit].tolist()
+
+    def count(self, genres: Iterable[str], match_all: bool = False) -> int:
+        return len(self.matching(genres, match_all))
@@ -0,0 +1,174 @@
+"""
+Backends de inferencia intercambiables para puntuar películas
+
+RecommendationModel trabaja con arrays NumPy y delega la puntuación en un
+backend, elegido con la variable de entorno INFERENCE_BACKEND:
+
+- numpy: NumPy puro sobre los embeddings exportados por python -m models.artifacts.
+  No importa torch, así que una imagen de despliegue reducida arranca antes
+  y ocupa menos memoria.
+- torch: el camino original; carga el checkpoint con torch.load (o los
+  embeddings compilados) y admite modelos nn.Module completos y GPU.
+- auto (por defecto): numpy si hay embeddings compilados al día; si no, torch.
+"""
+import os
+from typing import Optional
+
+import numpy as np
+
+from models.artifacts import MODEL_FILENAME, CompiledArtifacts, file_fingerprint
+
+BACKENDS = ("auto", "numpy", "torch")
+
+
+def normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """Normaliza cada fila a norma 1; las filas nulas quedan en cero (ver scoring.normalize_rows)"""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return np.where(norms > 0, embeddings / np.maximum(norms, 1e-12), 0).astype(np.float32)
+
+
+class InferenceBackend:
+    """
+    Interfaz común de los backends
+
+    Las matrices de calificaciones son arrays (batch, n_movies) float32 y las
+    puntuaciones se devuelven como arrays (batch, n_movies) float32.
+    """
+    name = "base"
+
+    # Versión del modelo (huella del checkpoint), para invalidar cachés
+    version: Optional[str] = None
+    n_movies = 0
+    # Películas con embedding: las primeras n_items del vocabulario
+    n_items = 0
+
+    @property
+    def has_embeddings(self) -> bool:
+        """Si hay embeddings de películas (perfiles, ANN, similitud)"""
+        return False
+
+    @property
+    def normalized_embeddings(self) -> np.ndarray:
+        """Embeddings (n_items, dim) normalizados por filas"""
+        raise NotImplementedError(f"El backend {self.name} no tiene embeddings de películas")
+
+    def score(self, user_matrix: np.ndarray) -> np.ndarray:
+        """Puntúa todas las películas para cada fila de calificaciones"""
+        raise NotImplementedError
+
+    def score_sparse(self, indptr: np.ndarray, indices: np.ndarray, ratings: np.ndarray) -> np.ndarray:
+        """Igual que score, a partir de filas CSR; por defecto construye la matriz densa"""
+        n_rows = len(indptr) - 1
+        user_matrix = np.zeros((n_rows, self.n_movies), dtype=np.float32)
+        known = indices < self.n_movies
+        row_of = np.repeat(np.arange(n_rows), np.diff(indptr))
+        user_matrix[row_of[known], indices[known]] = ratings[known]
+        return self.score(user_matrix)
+
+    def user_profiles(self, user_matrix: np.ndarray) -> np.ndarray:
+        """Perfil (batch, dim) de cada usuario: media de los embeddings calificados, ponderada"""
+        raise NotImplementedError(f"El backend {self.name} no calcula perfiles de usuario")
+
+    def limit_threads(self, threads: int):
+        """Limita los hilos de cálculo del proceso (p. ej. en un pool de procesos)"""
+
+
+class NumpyBackend(InferenceBackend):
+    name = "numpy"
+
+    def __init__(self, artifacts: CompiledArtifacts, n_movies: int):
+        """
+        Puntuación por similitud coseno en NumPy puro
+
+        Equivale al ScoringEngine de torch para checkpoints state_dict, pero
+        trabaja sobre los arrays mapeados en memoria de los artefactos
+        compilados, sin torch.
+
+        Args:
+            artifacts: Artefactos compilados con embeddings
+            n_movies: Número de películas del catálogo de calificaciones
+        """
+        embeddings, normalized = artifacts.item_embeddings()
+        self.version = artifacts.model_fingerprint
+        self.n_movies = n_movies
+        # Solo las primeras n_movies filas corresponden a películas del catálogo
+        self.n_items = min(len(embeddings), n_movies)
+        self.item_embeddings = np.asarray(embeddings[:self.n_items], dtype=np.float32)
+        self._normalized = np.asarray(normalized[:self.n_items], dtype=np.float32)
+        print(f"Embeddings cargados desde {artifacts.path}")
+
+    @property
+    def has_embeddings(self) -> bool:
+        return True
+
+    @property
+    def normalized_embeddings(self) -> np.ndarray:
+        return self._normalized
+
+    @property
+    def dim(self) -> int:
+        return self.item_embeddings.shape[1]
+
+    def user_profiles(self, user_matrix: np.ndarray) -> np.ndarray:
+        user_matrix = np.atleast_2d(user_matrix)
+        counts = np.maximum(np.count_nonzero(user_matrix, axis=1), 1)[:, None]
+        return (user_matrix[:, :self.n_items] @ self.item_embeddings) / counts
+
+    def score(self, user_matrix: np.ndarray) -> np.ndarray:
+        return self._score_profiles(self.user_profiles(user_matrix))
+
+    def score_sparse(self, indptr: np.ndarray, indices: np.ndarray, ratings: np.ndarray) -> np.ndarray:
+        from scipy import sparse
+
+        counts = np.maximum(np.diff(indptr), 1).astype(np.float32)[:, None]
+        # Solo las películas con embedding contribuyen al perfil
+        user_matrix = sparse.csr_matrix(
+            (np.asarray(ratings, dtype=np.float32), np.asarray(indices), np.asarray(indptr)),
+            shape=(len(indptr) - 1, max(int(indices.max(initial=-1)) + 1, self.n_items)),
+        )[:, :self.n_items]
+        profiles = np.asarray(user_matrix @ self.item_embeddings, dtype=np.float32) / counts
+        return self._score_profiles(profiles)
+
+    def _score_profiles(self, profiles: np.ndarray) -> np.ndarray:
+        scores = np.zeros((len(profiles), self.n_movies), dtype=np.float32)
+        scores[:, :self.n_items] = normalize_rows(profiles) @ self._normalized.T
+        return scores
+
+
+def _compiled_embeddings(artifacts: Optional[CompiledArtifacts], model_path: str) -> bool:
+    """Si los artefactos tienen embeddings del checkpoint actual (o no hay checkpoint)"""
+    if artifacts is None or not artifacts.has_embeddings:
+        return False
+    return not os.path.exists(model_path) or artifacts.model_fingerprint == file_fingerprint([model_path])
+
+
+def load_backend(data_dir: str, artifacts: Optional[CompiledArtifacts], n_movies: int,
+                 name: str = None) -> InferenceBackend:
+    """
+    Crea el backend de inferencia configurado
+
+    Args:
+        data_dir: Directorio con el checkpoint del modelo
+        artifacts: Artefactos compilados abiertos por el DataProcessor (o None)
+        n_movies: Número de películas del catálogo de calificaciones
+        name: 'auto', 'numpy' o 'torch'; por defecto INFERENCE_BACKEND
+
+    Returns:
+        El backend listo para puntuar
+    """
+    name = (name or os.getenv("INFERENCE_BACKEND", "auto")).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"INFERENCE_BACKEND debe ser uno de {', '.join(BACKENDS)}: {name}")
+
+    model_path = os.path.join(data_dir, MODEL_FILENAME)
+    compiled = _compiled_embeddings(artifacts, model_path)
+    if name == "numpy" and not compiled:
+        raise RuntimeError("El backend numpy requiere embeddings compilados al día; "
+                           "ejecute python -m models.artifacts")
+
+    if name == "numpy" or (name == "auto" and compiled):
+        return NumpyBackend(artifacts, n_movies)
+
+    # Import diferido: solo el backend torch carga torch en el proceso
+    from models.scoring import TorchBackend
+    return TorchBackend(model_path, artifacts if compiled else None, n_movies)
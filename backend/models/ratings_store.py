@@ -0,0 +1,626 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+# Filas por bloque al leer ratings.csv y en los cálculos por bloques
+CHUNK_ROWS = 1_000_000
+# IDs mayores que este límite se codifican con np.unique en vez de una tabla densa
+DENSE_ID_LIMIT = 1 << 26
+# Calificaciones guardadas como medias estrellas (rating * 2) en un byte mientras todas lo sean
+HALF_STARS_DTYPE = np.uint8
+
+
+def decode_ratings(stored: np.ndarray) -> np.ndarray:
+    """Calificaciones en float32 a partir de su forma almacenada (medias estrellas uint8 o float32)"""
+    if stored.dtype == HALF_STARS_DTYPE:
+        return stored.astype(np.float32) / 2
+    return stored
+
+
+def encode_ratings(ratings: np.ndarray) -> np.ndarray:
+    """Medias estrellas uint8 si todas las calificaciones lo son (0-127.5 en pasos de 0.5); si no, float32"""
+    ratings = np.asarray(ratings)
+    if ratings.dtype == HALF_STARS_DTYPE:
+        return ratings
+    doubled = np.asarray(ratings, dtype=np.float64) * 2
+    if len(doubled) and (np.any(doubled != np.rint(doubled)) or doubled.min() < 0 or doubled.max() > 255):
+        return np.asarray(ratings, dtype=np.float32)
+    return doubled.astype(HALF_STARS_DTYPE)
+
+
+def _estimate_rows(path: str) -> int:
+    """Número aproximado de filas del CSV a partir de la longitud media de línea"""
+    with open(path, 'rb') as f:
+        f.readline()
+        sample = f.read(1 << 20)
+    lines = sample.count(b'\n')
+    if lines == 0:
+        return 1024
+    return int(os.path.getsize(path) / (len(sample) / lines) * 1.05) + 1024
+
+
+def _id_codes(raw: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    IDs únicos ordenados y código (posición) de cada fila
+
+    Con IDs no negativos y acotados se usa una tabla densa id -> código y los
+    códigos se escriben sobre raw por bloques, sin arrays temporales del
+    tamaño de la entrada.
+    """
+    if len(raw) == 0:
+        return np.empty(0, dtype=np.int64), raw.astype(np.int32)
+    max_id = int(raw.max())
+    if int(raw.min()) < 0 or max_id >= DENSE_ID_LIMIT:
+        unique, codes = np.unique(raw, return_inverse=True)
+        return unique.astype(np.int64), codes.astype(np.int32)
+
+    seen = np.zeros(max_id + 1, dtype=bool)
+    seen[raw] = True
+    unique = np.flatnonzero(seen)
+    lookup = np.zeros(max_id + 1, dtype=np.int32)
+    lookup[unique] = np.arange(len(unique), dtype=np.int32)
+    codes = raw if raw.dtype == np.int32 else raw.astype(np.int32)
+    for start in range(0, len(codes), CHUNK_ROWS):
+        codes[start:start + CHUNK_ROWS] = lookup[raw[start:start + CHUNK_ROWS]]
+    return unique.astype(np.int64), codes
+
+
+class RatingsStore:
+    def __init__(self, user_ids: np.ndarray, movie_ids: np.ndarray, indptr: np.ndarray,
+                 indices: np.ndarray, ratings: np.ndarray, timestamps: Optional[np.ndarray] = None,
+                 timeline: Optional[np.ndarray] = None):
+        """
+        Almacén compacto de calificaciones usuario-película en formato CSR
+
+        La fila de cada usuario es el tramo indices[indptr[u]:indptr[u + 1]],
+        ordenado por índice de película, con sus calificaciones en ratings.
+
+        Las calificaciones recibidas en línea (add_ratings) se guardan en un
+        delta en memoria que las lecturas combinan con la base; compact() las
+        incorpora a los arrays CSR. Los usuarios y películas nuevos reciben el
+        siguiente índice libre, de modo que los índices existentes (y su
+        correspondencia con los embeddings) no cambian nunca.
+
+        Args:
+            user_ids: IDs de usuario ordenados; la posición es el índice de fila
+            movie_ids: IDs de película ordenados; la posición es el índice de columna
+            indptr: Desplazamientos de inicio de fila (n_users + 1)
+            indices: Índices de película de cada calificación
+            ratings: Valor de cada calificación, como medias estrellas uint8
+                (ver encode_ratings) o float32; las lecturas las devuelven en float32
+            timestamps: Marca de tiempo de cada calificación (opcional)
+            timeline: Posiciones de cada fila ordenadas por timestamp descendente
+                y movieId ascendente; se calcula si no se proporciona
+        """
+        self.user_ids = user_ids
+        self.movie_ids = movie_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.ratings = ratings
+        self.timestamps = timestamps
+
+        # Índice por usuario de las calificaciones más recientes primero
+        if timestamps is not None and timeline is None:
+            timeline = self._build_timeline(indptr, indices, timestamps)
+        self.timeline = timeline
+
+        self.user_id_to_idx = {int(uid): idx for idx, uid in enumerate(user_ids)}
+        self.movie_id_to_idx = {int(mid): idx for idx, mid in enumerate(movie_ids)}
+        self._max_user_id = int(user_ids.max()) if len(user_ids) else None
+
+        # Delta en línea: user_idx -> {movie_idx: (rating, timestamp, seq)}
+        self._n_base_users = len(indptr) - 1
+        self._delta: Dict[int, Dict[int, Tuple[float, int, int]]] = {}
+        self._pending = 0
+        self._seq = 0
+        self._buffers: Dict[str, np.ndarray] = {}
+        self._lock = threading.RLock()
+
+        # (sumas, conteos) por película de la base CSR, si el cargador ya los calculó
+        self._movie_totals: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @staticmethod
+    def _build_timeline(indptr: np.ndarray, indices: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+        # Por bloques de filas completas para acotar la memoria temporal de lexsort
+        timeline = np.empty(len(indices), dtype=np.int64)
+        n_rows = len(indptr) - 1
+        row = 0
+        while row < n_rows:
+            end_row = int(np.searchsorted(indptr, indptr[row] + CHUNK_ROWS, side='right')) - 1
+            end_row = min(max(end_row, row + 1), n_rows)
+            start, end = int(indptr[row]), int(indptr[end_row])
+            row_of = np.repeat(np.arange(end_row - row, dtype=np.int32), np.diff(indptr[row:end_row + 1]))
+            timeline[start:end] = start + np.lexsort((indices[start:end], -timestamps[start:end], row_of))
+            row = end_row
+        return timeline
+
+    @classmethod
+    def from_arrays(cls, user_ids: np.ndarray, movie_ids: np.ndarray, ratings: np.ndarray,
+                    timestamps: Optional[np.ndarray] = None) -> "RatingsStore":
+        """Construye el almacén a partir de columnas paralelas (userId, movieId, rating[, timestamp])"""
+        unique_users, user_codes = np.unique(user_ids, return_inverse=True)
+        unique_movies, movie_codes = np.unique(movie_ids, return_inverse=True)
+        return cls._from_codes(unique_users, unique_movies, user_codes, movie_codes,
+                               encode_ratings(ratings), timestamps)
+
+    @classmethod
+    def _from_codes(cls, unique_users: np.ndarray, unique_movies: np.ndarray, user_codes: np.ndarray,
+                    movie_codes: np.ndarray, ratings: np.ndarray,
+                    timestamps: Optional[np.ndarray] = None) -> "RatingsStore":
+        """Ordena por (usuario, película) filas ya codificadas y construye el CSR"""
+        order = np.lexsort((movie_codes, user_codes))
+        # Si un usuario calificó la misma película varias veces, gana la última fila
+        keys = user_codes[order].astype(np.int64) * len(unique_movies) + movie_codes[order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = keys[1:] != keys[:-1]
+        order = order[last]
+
+        indptr = np.zeros(len(unique_users) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(user_codes[order], minlength=len(unique_users)), out=indptr[1:])
+
+        return cls(
+            user_ids=unique_users.astype(np.int64),
+            movie_ids=unique_movies.astype(np.int64),
+            indptr=indptr,
+            indices=movie_codes[order].astype(np.int32),
+            ratings=np.asarray(ratings)[order],
+            timestamps=np.asarray(timestamps, dtype=np.int64)[order] if timestamps is not None else None,
+        )
+
+    @classmethod
+    def from_csv(cls, path: str, chunk_rows: int = CHUNK_ROWS) -> "RatingsStore":
+        """
+        Construye el almacén leyendo ratings.csv por bloques, en una sola pasada
+
+        Cada bloque se lee con tipos compactos (IDs int32, calificaciones como
+        medias estrellas en uint8, que el almacén conserva y decodifica al
+        leer) y se copia en columnas preasignadas según el
+        tamaño del fichero, sin el DataFrame completo ni listas de bloques que
+        concatenar. En la misma pasada se acumulan la suma y el número de
+        calificaciones por película. Si el fichero está ordenado por
+        (userId, movieId), como los de MovieLens, el CSR se construye sin
+        reordenar; si no, se ordena como en from_arrays.
+
+        Args:
+            path: Ruta del CSV con columnas userId, movieId, rating[, timestamp]
+            chunk_rows: Filas por bloque; acota la memoria de lectura
+        """
+        columns = pd.read_csv(path, nrows=0).columns
+        has_timestamps = 'timestamp' in columns
+        dtypes = {'userId': np.int32, 'movieId': np.int32, 'rating': np.float32}
+        if has_timestamps:
+            dtypes['timestamp'] = np.int64
+
+        capacity = _estimate_rows(path)
+        users = np.empty(capacity, dtype=np.int32)
+        movies = np.empty(capacity, dtype=np.int32)
+        # Medias estrellas (rating * 2) mientras todas las calificaciones lo sean
+        half_stars: Optional[np.ndarray] = np.empty(capacity, dtype=HALF_STARS_DTYPE)
+        ratings: Optional[np.ndarray] = None
+        timestamps = np.empty(capacity, dtype=np.int64) if has_timestamps else None
+        sums = np.zeros(0, dtype=np.float64)
+        counts = np.zeros(0, dtype=np.int64)
+
+        n = 0
+        presorted = True
+        totals_valid = True
+        last_key = -1
+        for chunk in pd.read_csv(path, usecols=list(dtypes), dtype=dtypes, chunksize=chunk_rows):
+            size = len(chunk)
+            if n + size > capacity:
+                capacity = max(n + size, int(capacity * 1.5))
+                for column in (users, movies, half_stars, ratings, timestamps):
+                    if column is not None:
+                        column.resize(capacity, refcheck=False)
+
+            chunk_users = chunk['userId'].to_numpy()
+            chunk_movies = chunk['movieId'].to_numpy()
+            chunk_ratings = chunk['rating'].to_numpy()
+            users[n:n + size] = chunk_users
+            movies[n:n + size] = chunk_movies
+            if timestamps is not None:
+                timestamps[n:n + size] = chunk['timestamp'].to_numpy()
+
+            doubled = chunk_ratings * 2
+            if half_stars is not None and (np.any(doubled != np.rint(doubled)) or np.any(doubled < 0)
+                                           or np.any(doubled > 255)):
+                ratings = np.empty(capacity, dtype=np.float32)
+                ratings[:n] = half_stars[:n] / 2
+                half_stars = None
+            if half_stars is not None:
+                half_stars[n:n + size] = doubled
+            else:
+                ratings[n:n + size] = chunk_ratings
+
+            # Orden estricto por (userId, movieId): sin duplicados ni reordenación
+            if presorted and size:
+                keys = chunk_users.astype(np.int64) << 32 | chunk_movies.astype(np.int64)
+                presorted = bool(keys[0] > last_key and np.all(keys[1:] > keys[:-1]))
+                last_key = int(keys[-1])
+
+            # Agregados de popularidad por movieId, solo con IDs densos (mismo límite que _id_codes);
+            # si no, se calculan después con movie_totals
+            if size and totals_valid:
+                max_movie = int(chunk_movies.max())
+                totals_valid = int(chunk_movies.min()) >= 0 and max_movie < DENSE_ID_LIMIT
+            if size and totals_valid:
+                if max_movie >= len(sums):
+                    sums = np.concatenate([sums, np.zeros(max_movie + 1 - len(sums))])
+                    counts = np.concatenate([counts, np.zeros(max_movie + 1 - len(counts), dtype=np.int64)])
+                sums += np.bincount(chunk_movies, weights=chunk_ratings, minlength=len(sums))
+                counts += np.bincount(chunk_movies, minlength=len(counts))
+            n += size
+
+        for column in (users, movies, half_stars, ratings, timestamps):
+            if column is not None:
+                column.resize(n, refcheck=False)
+        # Las medias estrellas se conservan: un byte por calificación, decodificado al leer
+        if half_stars is not None:
+            ratings = half_stars
+
+        unique_users, user_codes = _id_codes(users)
+        unique_movies, movie_codes = _id_codes(movies)
+        del users, movies
+        if not presorted:
+            return cls._from_codes(unique_users, unique_movies, user_codes, movie_codes, ratings, timestamps)
+
+        indptr = np.zeros(len(unique_users) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(user_codes, minlength=len(unique_users)), out=indptr[1:])
+        del user_codes
+
+        store = cls(unique_users, unique_movies, indptr, movie_codes, ratings, timestamps)
+        if totals_valid:
+            store._movie_totals = (sums[unique_movies], counts[unique_movies])
+        return store
+
+    @classmethod
+    def from_dataframe(cls, ratings_df: pd.DataFrame) -> "RatingsStore":
+        """Construye el almacén a partir de un DataFrame con el formato de ratings.csv"""
+        return cls.from_arrays(
+            ratings_df['userId'].to_numpy(),
+            ratings_df['movieId'].to_numpy(),
+            ratings_df['rating'].to_numpy(),
+            ratings_df['timestamp'].to_numpy() if 'timestamp' in ratings_df.columns else None,
+        )
+
+    @property
+    def n_users(self) -> int:
+        return len(self.user_ids)
+
+    @property
+    def n_movies(self) -> int:
+        return len(self.movie_ids)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria ocupada por los arrays del almacén"""
+        return sum(a.nbytes for a in self.arrays().values())
+
+    def arrays(self) -> dict:
+        """Arrays que componen el almacén, por nombre (para serializarlo)"""
+        arrays = {
+            'user_ids': self.user_ids, 'movie_ids': self.movie_ids, 'indptr': self.indptr,
+            'indices': self.indices, 'ratings': self.ratings, 'timestamps': self.timestamps,
+            'timeline': self.timeline,
+        }
+        return {name: array for name, array in arrays.items() if array is not None}
+
+    def movie_totals(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Suma y número de calificaciones por película en la base CSR
+
+        Returns:
+            Tupla (sumas float64, conteos int64) de longitud n_movies; son copias
+        """
+        with self._lock:
+            totals = self._movie_totals
+            indices, ratings, n_movies = self.indices, self.ratings, self.n_movies
+        if totals is None:
+            sums = np.zeros(n_movies, dtype=np.float64)
+            counts = np.zeros(n_movies, dtype=np.int64)
+            # Por bloques: bincount con pesos convierte cada bloque a float64
+            for start in range(0, len(indices), CHUNK_ROWS):
+                block = indices[start:start + CHUNK_ROWS]
+                sums += np.bincount(block, weights=decode_ratings(ratings[start:start + CHUNK_ROWS]),
+                                    minlength=n_movies)
+                counts += np.bincount(block, minlength=n_movies)
+            return sums, counts
+
+        sums, counts = totals
+        padding = n_movies - len(sums)
+        return (np.concatenate([sums, np.zeros(padding)]),
+                np.concatenate([counts, np.zeros(padding, dtype=np.int64)]))
+
+    @property
+    def max_user_id(self) -> Optional[int]:
+        return self._max_user_id
+
+    @property
+    def pending(self) -> int:
+        """Calificaciones en el delta aún no incorporadas a la base"""
+        return self._pending
+
+    def has_user(self, user_id: int) -> bool:
+        return int(user_id) in self.user_id_to_idx
+
+    def user_index(self, user_id: int) -> Optional[int]:
+        return self.user_id_to_idx.get(int(user_id))
+
+    def _base_range(self, user_idx: int) -> Tuple[int, int]:
+        if user_idx >= self._n_base_users:
+            return 0, 0
+        return int(self.indptr[user_idx]), int(self.indptr[user_idx + 1])
+
+    def _merged_row(self, user_idx: int, row: Dict[int, Tuple[float, int, int]]):
+        """Combina la fila base con el delta del usuario; el delta tiene prioridad"""
+        start, end = self._base_range(user_idx)
+        indices = self.indices[start:end]
+        delta_indices = np.fromiter(row.keys(), dtype=indices.dtype, count=len(row))
+        keep = ~np.isin(indices, delta_indices)
+
+        merged = np.concatenate([indices[keep], delta_indices])
+        order = np.argsort(merged, kind='stable')
+        ratings = np.concatenate([
+            decode_ratings(self.ratings[start:end][keep]),
+            np.fromiter((value[0] for value in row.values()), dtype=np.float32, count=len(row)),
+        ])
+        timestamps = None
+        if self.timestamps is not None:
+            timestamps = np.concatenate([
+                self.timestamps[start:end][keep],
+                np.fromiter((value[1] for value in row.values()), dtype=self.timestamps.dtype, count=len(row)),
+            ])[order]
+        return merged[order], ratings[order], timestamps
+
+    def user_items(self, user_idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Devuelve las películas calificadas por un usuario y sus calificaciones
+
+        Args:
+            user_idx: Índice de fila del usuario
+
+        Returns:
+            Tupla (índices de película, calificaciones float32); los índices son
+            una vista sin copia salvo si el usuario tiene calificaciones
+            pendientes en el delta
+        """
+        with self._lock:
+            row = self._delta.get(user_idx)
+            if row:
+                indices, ratings, _ = self._merged_row(user_idx, row)
+                return indices, ratings
+            start, end = self._base_range(user_idx)
+            return self.indices[start:end], decode_ratings(self.ratings[start:end])
+
+    def user_vector(self, user_idx: int) -> np.ndarray:
+        """Vector denso (n_movies,) con las calificaciones del usuario"""
+        vector = np.zeros(self.n_movies, dtype=np.float32)
+        indices, ratings = self.user_items(user_idx)
+        vector[indices] = ratings
+        return vector
+
+    def user_count(self, user_idx: int) -> int:
+        with self._lock:
+            if self._delta.get(user_idx):
+                return len(self.user_items(user_idx)[0])
+            start, end = self._base_range(user_idx)
+            return end - start
+
+    def user_timeline(self, user_idx: int, offset: int = 0, limit: int = 10,
+                      after: Optional[Tuple[int, int]] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Devuelve una página de calificaciones del usuario, las más recientes primero
+
+        El coste es O(limit + log n) gracias al timeline precalculado.
+
+        Args:
+            user_idx: Índice de fila del usuario
+            offset: Número de calificaciones a saltar (paginación por página)
+            limit: Número máximo de calificaciones a devolver
+            after: Cursor (timestamp, movieId); si se indica, la página empieza
+                justo después de esa calificación y offset se ignora
+
+        Returns:
+            Tupla (movieIds, calificaciones, timestamps)
+        """
+        if self.timeline is None:
+            raise ValueError("El almacén no tiene timestamps")
+
+        with self._lock:
+            row = self._delta.get(user_idx)
+            if row:
+                return self._delta_timeline(user_idx, row, offset, limit, after)
+            start, end = self._base_range(user_idx)
+            timeline = self.timeline
+            indices, ratings, timestamps, movie_ids = self.indices, self.ratings, self.timestamps, self.movie_ids
+
+        if after is not None:
+            # Primer elemento con timestamp < cursor o, entre empates, movieId > cursor:
+            # búsqueda binaria sobre la clave (-timestamp, movieId) sin materializar las claves
+            after_key = (-int(after[0]), int(after[1]))
+            low, high = start, end
+            while low < high:
+                middle = (low + high) // 2
+                position = timeline[middle]
+                if (-int(timestamps[position]), int(movie_ids[indices[position]])) <= after_key:
+                    low = middle + 1
+                else:
+                    high = middle
+            begin = low
+        else:
+            begin = start + max(offset, 0)
+
+        positions = timeline[begin:min(begin + max(limit, 0), end)]
+        return movie_ids[indices[positions]], decode_ratings(ratings[positions]), timestamps[positions]
+
+    def _delta_timeline(self, user_idx: int, row: Dict[int, Tuple[float, int, int]], offset: int, limit: int,
+                        after: Optional[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Página del timeline de un usuario con calificaciones pendientes; O(n log n) sobre su fila"""
+        indices, ratings, timestamps = self._merged_row(user_idx, row)
+        movie_ids = self.movie_ids[indices]
+        order = np.lexsort((movie_ids, -timestamps))
+        movie_ids, ratings, timestamps = movie_ids[order], ratings[order], timestamps[order]
+
+        if after is not None:
+            after_timestamp, after_movie_id = after
+            later = (timestamps < after_timestamp) | ((timestamps == after_timestamp) & (movie_ids > after_movie_id))
+            begin = int(np.argmax(later)) if later.any() else len(order)
+        else:
+            begin = max(offset, 0)
+
+        end = begin + max(limit, 0)
+        return movie_ids[begin:end], ratings[begin:end], timestamps[begin:end]
+
+    def _append_id(self, name: str, value: int) -> int:
+        """Añade un ID al final de user_ids o movie_ids con crecimiento geométrico"""
+        current = getattr(self, name)
+        size = len(current)
+        buffer = self._buffers.get(name)
+        if buffer is None or len(buffer) <= size or not np.shares_memory(buffer, current):
+            buffer = np.empty(max(2 * size, 16), dtype=current.dtype)
+            buffer[:size] = current
+            self._buffers[name] = buffer
+        buffer[size] = value
+        # Se publica una vista nueva: quien tenga la anterior sigue viendo un array consistente
+        setattr(self, name, buffer[:size + 1])
+        return size
+
+    def add_ratings(self, user_id: int, ratings: Dict[int, float], timestamp: int) -> Tuple[int, List[Tuple[int, float, float]]]:
+        """
+        Añade o actualiza calificaciones de un usuario en el delta en memoria
+
+        Args:
+            user_id: ID del usuario; si es nuevo recibe el siguiente índice de fila
+            ratings: Diccionario movieId -> calificación; las películas nuevas
+                reciben el siguiente índice de columna
+            timestamp: Marca de tiempo de las calificaciones
+
+        Returns:
+            Tupla (índice del usuario, lista de (índice de película, calificación
+            anterior o 0.0, calificación nueva))
+        """
+        with self._lock:
+            user_id = int(user_id)
+            user_idx = self.user_id_to_idx.get(user_id)
+            if user_idx is None:
+                user_idx = self._append_id('user_ids', user_id)
+                self.user_id_to_idx[user_id] = user_idx
+                self._max_user_id = user_id if self._max_user_id is None else max(self._max_user_id, user_id)
+
+            row = self._delta.setdefault(user_idx, {})
+            start, end = self._base_range(user_idx)
+            base_indices = self.indices[start:end]
+
+            changes = []
+            for movie_id, rating in ratings.items():
+                movie_id = int(movie_id)
+                movie_idx = self.movie_id_to_idx.get(movie_id)
+                if movie_idx is None:
+                    movie_idx = self._append_id('movie_ids', movie_id)
+                    self.movie_id_to_idx[movie_id] = movie_idx
+
+                if movie_idx in row:
+                    previous = row[movie_idx][0]
+                else:
+                    self._pending += 1
+                    position = int(np.searchsorted(base_indices, movie_idx))
+                    found = position < len(base_indices) and base_indices[position] == movie_idx
+                    previous = 0.0
+                    if found:
+                        previous = float(decode_ratings(self.ratings[start + position:start + position + 1])[0])
+
+                self._seq += 1
+                row[movie_idx] = (float(rating), int(timestamp), self._seq)
+                changes.append((movie_idx, previous, float(rating)))
+
+            return user_idx, changes
+
+    def pending_rows(self) -> Tuple[int, List[Tuple[int, int, float, int]]]:
+        """
+        Instantánea de las calificaciones pendientes, en orden de llegada
+
+        Returns:
+            Tupla (último número de secuencia incluido, filas (userId, movieId,
+            rating, timestamp)); el número se pasa a compact()
+        """
+        with self._lock:
+            entries = [
+                (seq, user_idx, movie_idx, rating, timestamp)
+                for user_idx, row in self._delta.items()
+                for movie_idx, (rating, timestamp, seq) in row.items()
+            ]
+            user_ids, movie_ids, upto = self.user_ids, self.movie_ids, self._seq
+        entries.sort()
+        return upto, [
+            (int(user_ids[user_idx]), int(movie_ids[movie_idx]), rating, timestamp)
+            for _, user_idx, movie_idx, rating, timestamp in entries
+        ]
+
+    def compact(self, upto: Optional[int] = None) -> int:
+        """
+        Incorpora las calificaciones pendientes a los arrays CSR
+
+        El nuevo CSR se construye sin bloquear las lecturas y se publica de una
+        vez. Las calificaciones llegadas durante la construcción siguen en el
+        delta. Los índices de usuarios y películas se conservan.
+
+        Args:
+            upto: Último número de secuencia a incorporar (de pending_rows());
+                por defecto todo lo pendiente
+
+        Returns:
+            Número de calificaciones incorporadas
+        """
+        with self._lock:
+            upto = self._seq if upto is None else upto
+            entries = [
+                (user_idx, movie_idx, rating, timestamp)
+                for user_idx, row in self._delta.items()
+                for movie_idx, (rating, timestamp, seq) in row.items() if seq <= upto
+            ]
+            n_users, n_movies = len(self.user_ids), len(self.movie_ids)
+            indptr, indices, ratings, timestamps = self.indptr, self.indices, self.ratings, self.timestamps
+        if not entries:
+            return 0
+
+        delta_users, delta_movies, delta_ratings, delta_timestamps = (np.array(column) for column in zip(*entries))
+        base_rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int64), np.diff(indptr))
+        keep = ~np.isin(base_rows * n_movies + indices, delta_users.astype(np.int64) * n_movies + delta_movies)
+
+        rows = np.concatenate([base_rows[keep], delta_users.astype(np.int64)])
+        columns = np.concatenate([indices[keep], delta_movies.astype(indices.dtype)])
+        order = np.lexsort((columns, rows))
+
+        new_indptr = np.zeros(n_users + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_users), out=new_indptr[1:])
+        new_indices = columns[order]
+        # Siguen en medias estrellas salvo que llegue una calificación que no lo sea
+        delta_ratings = encode_ratings(delta_ratings)
+        if delta_ratings.dtype != ratings.dtype:
+            ratings, delta_ratings = decode_ratings(ratings), decode_ratings(delta_ratings).astype(np.float32)
+        new_ratings = np.concatenate([ratings[keep], delta_ratings])[order]
+        new_timestamps = new_timeline = None
+        if timestamps is not None:
+            new_timestamps = np.concatenate([timestamps[keep], delta_timestamps.astype(timestamps.dtype)])[order]
+            new_timeline = self._build_timeline(new_indptr, new_indices, new_timestamps)
+
+        with self._lock:
+            self.indptr, self.indices, self.ratings = new_indptr, new_indices, new_ratings
+            self.timestamps, self.timeline = new_timestamps, new_timeline
+            self._movie_totals = None
+            self._n_base_users = n_users
+            for user_idx in list(self._delta):
+                row = self._delta[user_idx]
+                for movie_idx in [m for m, (_, _, seq) in row.items() if seq <= upto]:
+                    del row[movie_idx]
+                    self._pending -= 1
+                if not row:
+                    del self._delta[user_idx]
+
+        return len(entries)
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+COLD_START_KEY = "__cold_start__"
+NEW_USER_KEY = "__new_user__"
+
+
+class RecommendationCache:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        """
+        Caché LRU con expiración para resultados de recomendación
+
+        Args:
+            max_entries: Número máximo de resultados guardados; 0 desactiva la caché
+            ttl_seconds: Segundos que un resultado se considera válido; 0 = sin expiración
+        """
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Invalidaciones (ver generation): contador global, última invalidación de cada usuario
+        # reciente y, para los demás, la más reciente de las olvidadas
+        self._clock = 0
+        self._user_invalidations: "OrderedDict[str, int]" = OrderedDict()
+        self._forgotten_invalidation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.discarded_puts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(user_id: str, user_ratings: Optional[Dict[str, float]], top_k: int,
+                 exclude: Optional[List[str]] = None, version: str = "", known_user: bool = True,
+                 genres: Optional[List[str]] = None) -> tuple:
+        """
+        Construye la clave de caché
+
+        Las calificaciones enviadas se resumen en un hash estable. Para usuarios
+        que no están en el dataset el resultado solo depende de esas
+        calificaciones, así que el user_id no forma parte de la clave; los que
+        no envían calificaciones comparten el resultado por popularidad de
+        los géneros elegidos, en el orden en que se eligieron.
+        """
+        exclude_key = tuple(sorted(str(movie_id) for movie_id in exclude)) if exclude else ()
+        genres_key = tuple(dict.fromkeys(genres)) if genres else ()
+
+        ratings_hash = ""
+        if user_ratings:
+            payload = json.dumps(sorted((str(k), float(v)) for k, v in user_ratings.items()))
+            ratings_hash = hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+        if known_user:
+            user_key = str(user_id)
+        else:
+            user_key = NEW_USER_KEY if user_ratings else COLD_START_KEY
+        return (version, user_key, ratings_hash, top_k, exclude_key, genres_key)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                # Se conserva para get_stale (respuesta degradada); put la sustituye y el LRU la acaba descartando
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """
+        Resultado guardado aunque haya expirado, como respuesta degradada
+
+        No cuenta como acierto ni fallo ni modifica el orden LRU.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def _invalidated_at(self, key: Hashable) -> int:
+        return self._user_invalidations.get(key[1], self._forgotten_invalidation)
+
+    def generation(self, key: Hashable) -> int:
+        """
+        Generación de las invalidaciones que afectan a key (una clave de make_key)
+
+        Se toma antes de calcular un resultado y se pasa a put: si mientras
+        tanto llegaron calificaciones del usuario (o se recargaron los datos)
+        el resultado ya no se guarda. Solo se recuerdan las invalidaciones de
+        los max_entries usuarios más recientes; para los demás cuenta la más
+        reciente de las olvidadas, así que la memoria está acotada y en el peor
+        caso se descarta un resultado válido, nunca se guarda uno obsoleto.
+        """
+        with self._lock:
+            return self._clock
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        if not self.enabled:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else None
+        with self._lock:
+            if generation is not None and self._invalidated_at(key) > generation:
+                self.discarded_puts += 1
+                return
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Descarta todos los resultados, p. ej. al recargar calificaciones o modelo"""
+        with self._lock:
+            self._entries.clear()
+            self._clock += 1
+            self._user_invalidations.clear()
+            self._forgotten_invalidation = self._clock
+            self.invalidations += 1
+
+    def invalidate_user(self, user_key: str):
+        """Descarta los resultados de un usuario (o de COLD_START_KEY / NEW_USER_KEY) tras nuevas calificaciones"""
+        with self._lock:
+            self._clock += 1
+            self._user_invalidations[user_key] = self._clock
+            self._user_invalidations.move_to_end(user_key)
+            while len(self._user_invalidations) > max(self.max_entries, 1):
+                _, invalidated_at = self._user_invalidations.popitem(last=False)
+                self._forgotten_invalidation = invalidated_at
+            for key in [key for key in self._entries if key[1] == user_key]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "discarded_puts": self.discarded_puts,
+            }
@@ -1,81 +1,222 @@
 import pandas as pd
 import numpy as np
-import torch
 import os
-from typing import Dict, List, Tuple, Union
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from models.data_processor import DataProcessor
+from models.artifacts import MODEL_FILENAME
+from models.inference import load_backend
+from models.metrics import timed
+from models.ann_index import IVFIndex
+from models.cold_start import ColdStartRanker, PopularityScores
+from models.similarity import SimilarityIndex
 
 class RecommendationModel:
-    def __init__(self, data_processor: DataProcessor):
+    def __init__(self, data_processor: DataProcessor, retrieval: str = None,
+                 ann_lists: int = None, ann_probes: int = None, backend: str = None):
         """
         Inicializa el modelo de recomendación cargando el modelo pre-entrenado
         
         Args:
             data_processor: Instancia del procesador de datos
+            retrieval: 'exact' puntúa todas las películas; 'ann' usa el índice IVF
+                (por defecto la variable de entorno RECOMMENDATION_RETRIEVAL)
+            ann_lists: Número de listas del índice IVF (RECOMMENDATION_ANN_LISTS)
+            ann_probes: Listas exploradas por consulta (RECOMMENDATION_ANN_PROBES)
+            backend: Backend de inferencia 'auto', 'numpy' o 'torch'
+                (por defecto la variable de entorno INFERENCE_BACKEND)
         """
         self.data_processor = data_processor
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model_path = os.path.join("data", "bert_gat_with_graphsage_finetuned.pt")
+        self.model_path = os.path.join(data_processor.data_dir, MODEL_FILENAME)
         
         # Preparar datos necesarios para hacer recomendaciones
         self._prepare_data()
         
-        # Cargar el modelo pre-entrenado
-        self.model = self._load_model()
+        # Cargar el modelo pre-entrenado en el backend de inferencia configurado
+        self.backend = load_backend(data_processor.data_dir, data_processor.artifacts, len(self.movie_ids), backend)
+        self.model_version = self.backend.version
+        
+        # Versión de los datos y del modelo cargados, para invalidar cachés
+        self.version = f"{data_processor.data_version}-{self.model_version}"
+        
+        # Índice aproximado opcional para la recuperación top-k
+        self.retrieval = (retrieval or os.getenv("RECOMMENDATION_RETRIEVAL", "exact")).lower()
+        self.ann_index = self._build_ann_index(
+            ann_lists or int(os.getenv("RECOMMENDATION_ANN_LISTS", "0")) or None,
+            ann_probes or int(os.getenv("RECOMMENDATION_ANN_PROBES", "8")),
+        ) if self.retrieval == "ann" else None
+        
+        # Vecinos precalculados para "más como esta" (python -m models.similarity)
+        self.similarity_index = SimilarityIndex.open(data_processor.data_dir)
+        
+        # Versión de las respuestas de "más como esta": recompilar el índice también la cambia
+        self.similar_version = (f"{self.version}-{self.similarity_index.version}"
+                                if self.similarity_index is not None else self.version)
     
     def _prepare_data(self):
         """Prepara los datos necesarios para las recomendaciones"""
-        ratings_df = self.data_processor.ratings_df
-        
-        # Crear la matriz usuario-película
-        user_movie_matrix = ratings_df.pivot(
-            index='userId',
-            columns='movieId',
-            values='rating'
-        ).fillna(0)
+        # Almacén disperso usuario-película (CSR) construido por el procesador de datos
+        self.ratings_store = self.data_processor.ratings_store
         
         # Guardar IDs de usuarios y películas
-        self.user_ids = user_movie_matrix.index.tolist()
-        self.movie_ids = user_movie_matrix.columns.tolist()
+        self.user_ids = self.ratings_store.user_ids.tolist()
+        self.movie_ids = self.ratings_store.movie_ids.tolist()
         
-        # Crear mapeos para acceso rápido
-        self.user_id_to_idx = {uid: idx for idx, uid in enumerate(self.user_ids)}
-        self.movie_id_to_idx = {mid: idx for idx, mid in enumerate(self.movie_ids)}
+        # Mapeos para acceso rápido
+        self.user_id_to_idx = self.ratings_store.user_id_to_idx
+        self.movie_id_to_idx = self.ratings_store.movie_id_to_idx
         
-        # Guardar la matriz para uso posterior
-        self.user_movie_matrix = user_movie_matrix
+        # Ranking de popularidad (media bayesiana) calculado una sola vez
+        # y actualizado de forma incremental con cada calificación nueva
+        self._update_lock = threading.Lock()
+        self.popular_indices = self._popularity_ranking()
 
-    def _load_model(self):
-        """Carga el modelo pre-entrenado desde el archivo"""
-        try:
-            print(f"Cargando modelo desde {self.model_path}")
-            model_data = torch.load(self.model_path, map_location=self.device)
-            print(f"Modelo cargado exitosamente. Tipo: {type(model_data)}")
-            return model_data
-        except Exception as e:
-            raise RuntimeError(f"Error al cargar el modelo pre-entrenado: {str(e)}")
+    def _popularity_ranking(self) -> np.ndarray:
+        """Índices de películas ordenados por calificación media suavizada descendente"""
+        store = self.ratings_store
+        self._rating_sums, self._rating_counts = store.movie_totals()
+        
+        # Prior y rankings por género para usuarios sin calificaciones
+        self.cold_start = ColdStartRanker.build(
+            self._rating_sums, self._rating_counts,
+            self.data_processor.catalog.genre_index.postings, self.movie_id_to_idx,
+        )
+        self._rating_means = self.cold_start.smoothed(self._rating_sums, self._rating_counts)
+        popular = np.argsort(-self._rating_means, kind='stable').astype(np.int64)
+        # Posición de cada película en el ranking, para actualizarlo en línea
+        self._popular_rank = np.empty_like(popular)
+        self._popular_rank[popular] = np.arange(len(popular))
+        return popular
+
+    def _reposition_popular(self, popular: np.ndarray, movie_idx: int):
+        """
+        Recoloca en su sitio una película del ranking tras cambiar su media
+
+        Equivale a repetir el argsort estable completo: el resto del ranking
+        sigue ordenado por (-media, índice), así que basta una búsqueda binaria
+        y desplazar el tramo entre la posición antigua y la nueva. Modifica
+        popular in situ; quien llama trabaja sobre una copia.
+        """
+        means, rank = self._rating_means, self._popular_rank
+        old = int(rank[movie_idx])
+        key = (-means[movie_idx], movie_idx)
+        
+        # Búsqueda binaria sobre el ranking sin la película
+        low, high = 0, len(popular) - 1
+        while low < high:
+            middle = (low + high) // 2
+            other = popular[middle if middle < old else middle + 1]
+            if (-means[other], other) < key:
+                low = middle + 1
+            else:
+                high = middle
+        new = low
+        
+        if new < old:
+            popular[new + 1:old + 1] = popular[new:old]
+        elif new > old:
+            popular[old:new] = popular[old + 1:new + 1]
+        popular[new] = movie_idx
+        first, last = min(old, new), max(old, new)
+        rank[popular[first:last + 1]] = np.arange(first, last + 1)
+
+    def add_ratings(self, user_id: int, ratings: Dict[int, float], timestamp: int) -> bool:
+        """
+        Incorpora calificaciones nuevas sin reconstruir el modelo
+
+        Las calificaciones se guardan en el delta del almacén, de modo que el
+        vector del usuario las incluye en la siguiente solicitud. La popularidad
+        se actualiza de forma incremental. Las películas nuevas reciben el
+        siguiente índice libre; no tienen embedding, así que solo pueden
+        aparecer como relleno por popularidad.
+        
+        Args:
+            user_id: ID del usuario (existente o nuevo)
+            ratings: Diccionario movieId -> calificación
+            timestamp: Marca de tiempo de las calificaciones
+            
+        Returns:
+            True si cambiaron las películas más populares, de las que dependen
+            las recomendaciones de usuarios sin calificaciones
+        """
+        with self._update_lock:
+            is_new_user = not self.ratings_store.has_user(user_id)
+            n_movies = len(self.movie_ids)
+            _, changes = self.ratings_store.add_ratings(user_id, ratings, timestamp)
+            
+            if is_new_user:
+                self.user_ids.append(int(user_id))
+            
+            # Copia sobre la que se aplican los cambios antes de publicarla
+            popular = self.popular_indices.copy()
+            head = popular[:5].copy()
+            
+            # Películas nuevas: se añaden al final del vocabulario con media 0
+            new_movie_ids = self.ratings_store.movie_ids[n_movies:].tolist()
+            if new_movie_ids:
+                self.movie_ids.extend(new_movie_ids)
+                padding = len(new_movie_ids)
+                self._rating_sums = np.concatenate([self._rating_sums, np.zeros(padding)])
+                self._rating_counts = np.concatenate([self._rating_counts, np.zeros(padding, dtype=self._rating_counts.dtype)])
+                self._rating_means = np.concatenate([self._rating_means, np.zeros(padding)])
+                # Con media 0 y el índice más alto, su sitio es el final del ranking
+                popular = np.concatenate([popular, np.arange(n_movies, n_movies + padding, dtype=np.int64)])
+                self._popular_rank = np.concatenate([self._popular_rank, np.arange(n_movies, n_movies + padding)])
+            
+            for movie_idx, previous, rating in changes:
+                if previous > 0:
+                    self._rating_sums[movie_idx] -= previous
+                else:
+                    self._rating_counts[movie_idx] += 1
+                self._rating_sums[movie_idx] += rating
+                self._rating_means[movie_idx] = self.cold_start.smoothed(self._rating_sums[movie_idx],
+                                                                         self._rating_counts[movie_idx])
+                self._reposition_popular(popular, movie_idx)
+            
+            # Se publica el ranking completo de una vez para las lecturas concurrentes
+            self.popular_indices = popular
+            return not np.array_equal(head, popular[:5])
+
+    def _build_ann_index(self, n_lists: int, n_probe: int):
+        """Construye el índice IVF sobre los embeddings normalizados"""
+        if not self.backend.has_embeddings:
+            print("La recuperación aproximada requiere un state_dict con embeddings. Se usará la búsqueda exacta.")
+            return None
+        
+        normalized = self.backend.normalized_embeddings
+        index = IVFIndex.build(normalized, n_lists=n_lists, n_probe=n_probe)
+        print(f"Índice IVF construido: {index.n_lists} listas, {index.n_probe} exploradas por consulta")
+        return index
     
-    def _get_user_vector(self, user_id: Union[str, int], user_ratings: Dict[str, float] = None) -> torch.Tensor:
+    @timed("user_vector")
+    def _get_user_vector(self, user_id: Union[str, int], user_ratings: Dict[str, float] = None,
+                         n_movies: int = None) -> np.ndarray:
         """
         Crea un vector de calificaciones para el usuario
         
         Args:
             user_id: ID del usuario o 'new' para usuario nuevo
             user_ratings: Diccionario de calificaciones para usuario nuevo
+            n_movies: Longitud del vector; por defecto el vocabulario actual.
+                Un lote fija la misma para todos sus usuarios aunque lleguen
+                películas nuevas mientras se construye
             
         Returns:
-            Tensor con las calificaciones del usuario
+            Array float32 (n_movies,) con las calificaciones del usuario; todo
+            ceros si no tiene ninguna (ver recommend_popular)
         """
+        n_movies = n_movies or len(self.movie_ids)
+        
         # Inicializar vector de calificaciones con ceros
-        user_vector = torch.zeros(len(self.movie_ids), dtype=torch.float32, device=self.device)
+        user_vector = np.zeros(n_movies, dtype=np.float32)
         
         # Caso 1: Usuario existente del dataset
-        if isinstance(user_id, (str, int)) and str(user_id).isdigit() and int(user_id) in self.user_ids:
+        if isinstance(user_id, (str, int)) and str(user_id).isdigit() and self.ratings_store.has_user(int(user_id)):
             user_idx = self.user_id_to_idx[int(user_id)]
-            # Obtener calificaciones del usuario de la matriz
-            for i, movie_id in enumerate(self.movie_ids):
-                rating = self.user_movie_matrix.iloc[user_idx][movie_id]
-                user_vector[i] = rating
+            # Obtener calificaciones del usuario del almacén disperso
+            indices, ratings = self.ratings_store.user_items(user_idx)
+            known = indices < n_movies
+            user_vector[indices[known]] = ratings[known]
         
         # Caso 2: Usuario nuevo con calificaciones proporcionadas
         elif user_ratings and len(user_ratings) > 0:
@@ -85,27 +226,13 @@ class RecommendationModel:
                     continue
                     
                 movie_id = int(movie_id_str)
-                if movie_id in self.movie_id_to_idx:
-                    idx = self.movie_id_to_idx[movie_id]
+                idx = self.movie_id_to_idx.get(movie_id)
+                if idx is not None and idx < n_movies:
                     user_vector[idx] = float(rating)
         
-        # Si no se pudo construir un vector de calificaciones, usar películas populares
-        if torch.sum(user_vector) == 0:
-            print(f"No se encontraron calificaciones para el usuario {user_id}. Utilizando películas populares.")
-            
-            # Obtener las películas más populares basadas en el promedio de calificaciones
-            popular_movies = self.data_processor.ratings_df.groupby('movieId')['rating'].mean().sort_values(ascending=False)
-            
-            # Asignar calificaciones "ficticias" a las 5 películas más populares
-            for i, movie_id in enumerate(popular_movies.index[:5]):
-                if movie_id in self.movie_id_to_idx:
-                    idx = self.movie_id_to_idx[movie_id]
-                    # Asignar calificación 5 a las películas más populares (como si al usuario le gustaran)
-                    user_vector[idx] = 5.0
-        
         return user_vector
     
-    def _predict_with_model(self, user_vector: torch.Tensor) -> np.ndarray:
+    def _predict_with_model(self, user_vector: np.ndarray) -> np.ndarray:
         """
         Realiza predicciones utilizando el modelo pre-entrenado
         
@@ -116,60 +243,199 @@ class RecommendationModel:
             Array con puntuaciones de predicción para todas las películas
         """
         # Asegurarse de que el vector tiene la forma correcta
-        if user_vector.dim() == 1:
-            user_vector = user_vector.unsqueeze(0)  # Añadir dimensión de batch
-        
-        # Determinar cómo usar el modelo según su tipo
-        if isinstance(self.model, torch.nn.Module):
-            # Es un modelo PyTorch completo
-            self.model.eval()
-            with torch.no_grad():
-                predictions = self.model(user_vector)
-                return predictions.cpu().numpy().flatten()
-                
-        elif isinstance(self.model, dict):
-            # Es un state_dict - extraer embeddings y hacer predicciones manuales
-            # Buscar embeddings de películas
-            item_embeddings = None
-            for key, value in self.model.items():
-                if 'item' in key.lower() and 'embedding' in key.lower():
-                    item_embeddings = value
-                    break
-            
-            if item_embeddings is None:
-                raise ValueError("No se encontraron embeddings de películas en el modelo")
-            
-            # Crear representación del usuario
-            rated_indices = torch.nonzero(user_vector[0]).flatten()
-            if len(rated_indices) == 0:
-                raise ValueError("El usuario no tiene calificaciones")
-            
-            user_profile = torch.zeros(item_embeddings.size(1), device=self.device)
-            
-            for idx in rated_indices:
-                if idx < item_embeddings.size(0):
-                    user_profile += user_vector[0, idx] * item_embeddings[idx]
+        if user_vector.ndim == 1:
+            user_vector = user_vector[np.newaxis, :]  # Añadir dimensión de batch
+        
+        return self._predict_batch(user_vector)[0]
+
+    @timed("score")
+    def _predict_batch(self, user_matrix: np.ndarray) -> np.ndarray:
+        """
+        Realiza predicciones para varios usuarios en una sola pasada
+        
+        Args:
+            user_matrix: Matriz (batch, n_movies) de calificaciones
             
-            user_profile = user_profile / len(rated_indices)
+        Returns:
+            Array (batch, n_movies) con puntuaciones de predicción
+        """
+        if self.backend.has_embeddings:
+            # Puntuación por embeddings: un usuario sin calificaciones no tiene perfil
+            empty_rows = np.count_nonzero(user_matrix, axis=1) == 0
+            if bool(empty_rows.any()):
+                raise ValueError("El usuario no tiene calificaciones")
+        
+        return self.backend.score(user_matrix)
+
+    def _exclusion_mask(self, user_id: str, user_ratings: Dict[str, float], exclude: List[str] = None) -> np.ndarray:
+        """
+        Marca las películas que no deben recomendarse: las ya calificadas y las excluidas explícitamente
+        
+        Returns:
+            Array booleano (n_movies,)
+        """
+        mask = np.zeros(len(self.movie_ids), dtype=bool)
+        
+        if user_id.isdigit() and self.ratings_store.has_user(int(user_id)):
+            # Usuario existente
+            user_idx = self.user_id_to_idx[int(user_id)]
+            indices, ratings = self.ratings_store.user_items(user_idx)
+            mask[indices[(ratings > 0) & (indices < len(mask))]] = True
+            movie_id_strs = exclude or []
+        else:
+            # Usuario nuevo
+            movie_id_strs = list(user_ratings.keys()) + list(exclude or [])
+        
+        for movie_id_str in movie_id_strs:
+            idx = self.movie_id_to_idx.get(int(movie_id_str)) if str(movie_id_str).isdigit() else None
+            if idx is not None and idx < len(mask):
+                mask[idx] = True
+        return mask
+
+    def _fill_with_popular(self, top_indices: np.ndarray, excluded: np.ndarray, top_k: int) -> np.ndarray:
+        """Completa los índices con películas populares hasta tener top_k recomendaciones"""
+        missing = top_k - len(top_indices)
+        if missing <= 0:
+            return top_indices
+        
+        taken = excluded.copy()
+        taken[top_indices] = True
+        popular = self.popular_indices
+        popular = popular[popular < len(taken)]
+        candidates = popular[~taken[popular]]
+        return np.concatenate([top_indices, candidates[:missing]])
+
+    def _format_ranking(self, top_indices: np.ndarray, predictions: np.ndarray, return_scores: bool,
+                        scores: np.ndarray = None) -> Union[List[str], Tuple[List[str], Dict[str, float]]]:
+        """Convierte índices de películas en IDs y, si se solicita, en un diccionario de puntuaciones"""
+        top_movie_ids = [str(movie_id) for movie_id in self.ratings_store.movie_ids[top_indices].tolist()]
+        if not return_scores:
+            return top_movie_ids
+        
+        if scores is None:
+            scores = predictions[top_indices] if predictions is not None else np.zeros(len(top_indices))
+        scores = np.where(np.isfinite(scores), scores, 0.0)
+        return top_movie_ids, dict(zip(top_movie_ids, scores.astype(float).tolist()))
+
+    @timed("ann_search")
+    def _recommend_ann(self, user_id: str, user_ratings: Dict[str, float], user_vector: np.ndarray,
+                       top_k: int, return_scores: bool,
+                       exclude: List[str] = None) -> Union[List[str], Tuple[List[str], Dict[str, float]]]:
+        """
+        Recupera las recomendaciones con el índice IVF en lugar de puntuar todo el catálogo
+        
+        Args:
+            user_id: ID del usuario
+            user_ratings: Diccionario de calificaciones para usuario nuevo
+            user_vector: Vector de calificaciones del usuario
+            top_k: Número de recomendaciones a devolver
+            return_scores: Si es True, devuelve también las puntuaciones
+            exclude: IDs de películas que no deben recomendarse
             
-            # Calcular similitud coseno entre perfil de usuario y embeddings de películas
-            similarities = torch.zeros(len(self.movie_ids), device=self.device)
+        Returns:
+            Lista de IDs de películas recomendadas y opcionalmente un diccionario de puntuaciones
+        """
+        if np.count_nonzero(user_vector) == 0:
+            raise ValueError("El usuario no tiene calificaciones")
+        
+        profile = self.backend.user_profiles(user_vector)[0]
+        norm = np.linalg.norm(profile)
+        if norm > 0:
+            profile = profile / norm
+        
+        excluded = self._exclusion_mask(user_id, user_ratings, exclude)
+        top_indices, top_scores = self.ann_index.search(profile, top_k, exclude=np.flatnonzero(excluded))
+        
+        # Si no hay suficientes recomendaciones, completar con películas populares
+        filled = self._fill_with_popular(top_indices, excluded, top_k)
+        scores = np.concatenate([top_scores, np.zeros(len(filled) - len(top_indices), dtype=np.float32)])
+        return self._format_ranking(filled, None, return_scores, scores=scores)
+
+    @timed("cold_start")
+    def recommend_popular(self, user_id: str, user_ratings: Dict[str, float], top_k: int,
+                          return_scores: bool, exclude: List[str] = None,
+                          genres: List[str] = None) -> Union[List[str], Tuple[List[str], Dict[str, float]]]:
+        """
+        Recomendaciones por popularidad, sin pasar por el modelo
+
+        Es el camino de los usuarios sin calificaciones utilizables y la
+        respuesta degradada cuando la puntuación no termina a tiempo: toma las
+        películas más populares (media bayesiana) de los géneros preferidos y
+        completa con el ranking global.
+        
+        Args:
+            user_id: ID del usuario; si está en el dataset se excluye lo que ya calificó
+            user_ratings: Calificaciones enviadas
+            top_k: Número de recomendaciones a devolver
+            return_scores: Si es True, devuelve también las puntuaciones (media
+                suavizada en la escala de las calificaciones, como PopularityScores)
+            exclude: IDs de películas que no deben recomendarse
+            genres: Géneros preferidos elegidos por el usuario
             
-            for i in range(len(self.movie_ids)):
-                if i < item_embeddings.size(0):
-                    item_emb = item_embeddings[i]
-                    # Similitud coseno
-                    cos_sim = torch.dot(user_profile, item_emb) / (
-                        torch.norm(user_profile) * torch.norm(item_emb) + 1e-8
-                    )
-                    similarities[i] = cos_sim
+        Returns:
+            Lista de IDs de películas recomendadas y opcionalmente un diccionario de puntuaciones
+        """
+        excluded = set()
+        user_idx = self.ratings_store.user_index(int(user_id)) if str(user_id).isdigit() else None
+        if user_idx is not None:
+            indices, ratings = self.ratings_store.user_items(user_idx)
+            excluded.update(indices[ratings > 0].tolist())
+        for movie_id_str in list(user_ratings or {}) + list(exclude or []):
+            idx = self.movie_id_to_idx.get(int(movie_id_str)) if str(movie_id_str).isdigit() else None
+            if idx is not None:
+                excluded.add(idx)
+        
+        top_indices, scores = self.cold_start.recommend(
+            self.popular_indices, self._rating_means, top_k, genres=genres, excluded=excluded
+        )
+        ranking = self._format_ranking(top_indices, None, return_scores, scores=scores)
+        if not return_scores:
+            return ranking
+        return ranking[0], PopularityScores(ranking[1])
+
+    @timed("rank")
+    def _rank_predictions(self, user_id: str, user_ratings: Dict[str, float], predictions: np.ndarray,
+                          top_k: int, return_scores: bool,
+                          exclude: List[str] = None) -> Union[List[str], Tuple[List[str], Dict[str, float]]]:
+        """
+        Excluye las películas ya calificadas y selecciona las mejores predicciones
+        
+        Args:
+            user_id: ID del usuario
+            user_ratings: Diccionario de calificaciones para usuario nuevo
+            predictions: Puntuaciones de predicción para todas las películas
+            top_k: Número de recomendaciones a devolver
+            return_scores: Si es True, devuelve también las puntuaciones
+            exclude: IDs de películas que no deben recomendarse
             
-            return similarities.cpu().numpy()
+        Returns:
+            Lista de IDs de películas recomendadas y opcionalmente un diccionario de puntuaciones
+        """
+        n_movies = min(len(predictions), len(self.movie_ids))
+        candidates = np.asarray(predictions[:n_movies], dtype=np.float32).copy()
+        
+        # Excluir películas ya calificadas con una máscara
+        excluded = self._exclusion_mask(user_id, user_ratings, exclude)
+        candidates[excluded[:n_movies]] = -np.inf
+        
+        # Selección parcial top-k en O(n) y orden solo de los k elegidos
+        k = min(top_k, n_movies)
+        if k > 0:
+            top_indices = np.argpartition(-candidates, k - 1)[:k]
+            top_indices = top_indices[np.argsort(-candidates[top_indices], kind='stable')]
+            top_indices = top_indices[np.isfinite(candidates[top_indices])]
         else:
-            raise TypeError(f"Formato de modelo no soportado: {type(self.model)}")
+            top_indices = np.empty(0, dtype=np.int64)
+        
+        # Si no hay suficientes recomendaciones, completar con películas populares
+        top_indices = self._fill_with_popular(top_indices, excluded, top_k)
+        
+        return self._format_ranking(top_indices, predictions, return_scores)
 
     def get_recommendations(self, user_id: str, user_ratings: Dict[str, float] = None, 
-                           top_k: int = 10, return_scores: bool = False) -> Union[List[str], Tuple[List[str], Dict[str, float]]]:
+                           top_k: int = 10, return_scores: bool = False,
+                           exclude: List[str] = None,
+                           genres: List[str] = None) -> Union[List[str], Tuple[List[str], Dict[str, float]]]:
         """
         Obtiene recomendaciones para un usuario
         
@@ -178,6 +444,8 @@ class RecommendationModel:
             user_ratings: Diccionario de calificaciones para usuario nuevo
             top_k: Número de recomendaciones a devolver
             return_scores: Si es True, devuelve también las puntuaciones
+            exclude: IDs de películas que no deben recomendarse
+            genres: Géneros preferidos; solo se usan si el usuario no tiene calificaciones
             
         Returns:
             Lista de IDs de películas recomendadas y opcionalmente un diccionario de puntuaciones
@@ -190,62 +458,184 @@ class RecommendationModel:
             # Obtener vector de calificaciones del usuario
             user_vector = self._get_user_vector(user_id, user_ratings)
             
+            # Sin calificaciones no hay perfil que puntuar: popularidad por géneros
+            if not user_vector.any():
+                return self.recommend_popular(user_id, user_ratings, top_k, return_scores, exclude, genres)
+            
+            # Recuperación aproximada con el índice IVF
+            if self.ann_index is not None:
+                return self._recommend_ann(user_id, user_ratings, user_vector, top_k, return_scores, exclude)
+            
             # Obtener predicciones del modelo
             predictions = self._predict_with_model(user_vector)
             
-            # Determinar qué películas ya ha calificado el usuario
-            rated_movies = set()
-            
-            if user_id.isdigit() and int(user_id) in self.user_ids:
-                # Usuario existente
-                user_idx = self.user_id_to_idx[int(user_id)]
-                for i, movie_id in enumerate(self.movie_ids):
-                    if self.user_movie_matrix.iloc[user_idx][movie_id] > 0:
-                        rated_movies.add(i)
-            else:
-                # Usuario nuevo
-                for movie_id_str in user_ratings.keys():
-                    if str(movie_id_str).isdigit() and int(movie_id_str) in self.movie_id_to_idx:
-                        movie_idx = self.movie_id_to_idx[int(movie_id_str)]
-                        rated_movies.add(movie_idx)
-            
-            # Excluir películas ya calificadas
-            for idx in rated_movies:
-                if idx < len(predictions):
-                    predictions[idx] = float('-inf')
-            
-            # Obtener los índices de las mejores predicciones
-            top_indices = np.argsort(predictions)[::-1][:top_k]
-            
-            # Convertir índices a IDs de películas
-            top_movie_ids = [str(self.movie_ids[idx]) for idx in top_indices if idx < len(self.movie_ids)]
-            
-            # Si no hay suficientes recomendaciones, completar con películas populares
-            if len(top_movie_ids) < top_k:
-                popular_movies = self.data_processor.ratings_df.groupby('movieId')['rating'].mean().sort_values(ascending=False)
-                for movie_id in popular_movies.index:
-                    movie_id_str = str(movie_id)
-                    if movie_id_str not in top_movie_ids and movie_id_str not in user_ratings:
-                        top_movie_ids.append(movie_id_str)
-                        if len(top_movie_ids) >= top_k:
-                            break
-            
-            # Limitar al número solicitado
-            top_movie_ids = top_movie_ids[:top_k]
-            
-            # Crear diccionario de puntuaciones si se solicita
-            if return_scores:
-                scores = {}
-                for i, movie_id in enumerate(top_movie_ids):
-                    idx = self.movie_ids.index(int(movie_id)) if int(movie_id) in self.movie_ids else -1
-                    if idx >= 0 and idx < len(predictions):
-                        scores[movie_id] = float(predictions[idx])
-                    else:
-                        scores[movie_id] = 0.0
-                return top_movie_ids, scores
-            else:
-                return top_movie_ids
+            return self._rank_predictions(user_id, user_ratings, predictions, top_k, return_scores, exclude)
                 
         except Exception as e:
             print(f"Error al generar recomendaciones: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    @timed("similar")
+    def similar_movies(self, movie_id: Union[str, int], limit: int = 10) -> Tuple[List[str], Dict[str, float]]:
+        """
+        Películas más parecidas a movie_id ("más como esta")
+
+        Usa el índice precalculado si existe, y entonces devuelve como mucho
+        top_m películas: calcular al vuelo las que faltan daría otra
+        puntuación (sin la mezcla de co-calificación) y otro orden. Sin índice
+        calcula la similitud coseno de la película con todo el catálogo, que
+        cuesta un producto matriz-vector.
+
+        Args:
+            movie_id: ID de la película de referencia
+            limit: Número máximo de películas a devolver
+
+        Returns:
+            Lista de IDs de películas y diccionario de similitudes; vacíos si la
+            película no tiene embedding
+        """
+        if self.similarity_index is not None:
+            movie_ids, scores = self.similarity_index.similar(int(movie_id), limit)
+            similar_ids = [str(similar_id) for similar_id in movie_ids.tolist()]
+            return similar_ids, dict(zip(similar_ids, scores.tolist()))
+
+        movie_idx = self.movie_id_to_idx.get(int(movie_id))
+        if not self.backend.has_embeddings or movie_idx is None or movie_idx >= self.backend.n_items:
+            return [], {}
+
+        normalized = self.backend.normalized_embeddings
+        similarities = normalized @ normalized[movie_idx]
+        similarities[movie_idx] = -np.inf
+        limit = max(0, min(limit, len(similarities) - 1))
+        top_indices = np.argpartition(-similarities, limit - 1)[:limit] if limit > 0 else np.empty(0, dtype=np.int64)
+        top_indices = top_indices[np.argsort(-similarities[top_indices], kind='stable')]
+
+        similar_ids = [str(self.movie_ids[idx]) for idx in top_indices]
+        return similar_ids, {movie: float(similarities[idx]) for movie, idx in zip(similar_ids, top_indices)}
+
+    def get_recommendations_batch(self, requests: List[Tuple], top_k: int = 10,
+                                  return_scores: bool = False) -> List[Union[List[str], Tuple[List[str], Dict[str, float]]]]:
+        """
+        Obtiene recomendaciones para varios usuarios puntuándolos en un único lote
+        
+        Args:
+            requests: Lista de tuplas (user_id, user_ratings), (user_id, user_ratings, exclude)
+                o (user_id, user_ratings, exclude, genres)
+            top_k: Número de recomendaciones a devolver por usuario
+            return_scores: Si es True, devuelve también las puntuaciones
+            
+        Returns:
+            Lista de resultados en el mismo orden que requests, con el mismo
+            formato que get_recommendations
+        """
+        try:
+            requests = [
+                (request[0], request[1] or {}, request[2] if len(request) > 2 else None,
+                 request[3] if len(request) > 3 else None)
+                for request in requests
+            ]
+            
+            # Apilar los vectores de todos los usuarios y puntuarlos juntos
+            n_movies = len(self.movie_ids)
+            user_matrix = np.stack([
+                self._get_user_vector(user_id, user_ratings, n_movies) for user_id, user_ratings, *_ in requests
+            ])
+            
+            # Los usuarios sin calificaciones no se puntúan con el modelo
+            results: List[Optional[Union[List[str], Tuple[List[str], Dict[str, float]]]]] = [None] * len(requests)
+            scored = np.flatnonzero(user_matrix.any(axis=1))
+            for i in np.flatnonzero(~user_matrix.any(axis=1)):
+                user_id, user_ratings, exclude, genres = requests[i]
+                results[i] = self.recommend_popular(user_id, user_ratings, top_k, return_scores, exclude, genres)
+            
+            if self.ann_index is not None:
+                for i in scored:
+                    user_id, user_ratings, exclude, _ = requests[i]
+                    results[i] = self._recommend_ann(user_id, user_ratings, user_matrix[i], top_k, return_scores, exclude)
+                return results
+            
+            if len(scored) > 0:
+                predictions = self._predict_batch(user_matrix[scored])
+                for row, i in enumerate(scored):
+                    user_id, user_ratings, exclude, _ = requests[i]
+                    results[i] = self._rank_predictions(user_id, user_ratings, predictions[row], top_k,
+                                                        return_scores, exclude)
+            
+            return results
+        
+        except Exception as e:
+            print(f"Error al generar recomendaciones en lote: {str(e)}")
+            raise
+
+    def recommend_users(self, user_ids: List[int], top_k: int = 10,
+                        batch_size: int = 256) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Genera recomendaciones para muchos usuarios del dataset en lotes matriciales
+        
+        Pensado para precalcular listas fuera de línea: los perfiles del lote se
+        calculan con un producto disperso sobre las filas del almacén, se
+        puntúan con una sola multiplicación de matrices y se ordenan de forma
+        vectorizada, con el mismo criterio que get_recommendations en modo
+        exacto. La memoria es proporcional a batch_size * n_movies.
+        
+        Args:
+            user_ids: IDs de usuario; los que no están en el dataset se omiten
+            top_k: Número de recomendaciones por usuario
+            batch_size: Usuarios puntuados por lote
+            
+        Returns:
+            Iterador de tuplas (userIds (n,), movieIds (n, top_k), puntuaciones
+            (n, top_k)); si no hay top_k películas disponibles, las posiciones
+            sobrantes tienen movieId -1 y puntuación NaN
+        """
+        store = self.ratings_store
+        n_movies = len(self.movie_ids)
+        
+        for start in range(0, len(user_ids), max(1, batch_size)):
+            batch = [(int(user_id), store.user_index(user_id)) for user_id in user_ids[start:start + batch_size]]
+            batch = [(user_id, user_idx) for user_id, user_idx in batch if user_idx is not None]
+            if not batch:
+                continue
+            
+            # Filas CSR del lote
+            rows = [store.user_items(user_idx) for _, user_idx in batch]
+            lengths = np.array([len(indices) for indices, _ in rows], dtype=np.int64)
+            indptr = np.zeros(len(batch) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=indptr[1:])
+            indices = np.concatenate([indices for indices, _ in rows]).astype(np.int64)
+            ratings = np.concatenate([ratings for _, ratings in rows])
+            row_of = np.repeat(np.arange(len(batch)), lengths)
+            
+            # Con embeddings, perfiles con un producto disperso sin la matriz densa de calificaciones
+            predictions = self.backend.score_sparse(indptr, indices, ratings)
+            width = min(predictions.shape[1], n_movies)
+            candidates = np.array(predictions[:, :width], dtype=np.float32)
+            
+            # Excluir películas ya calificadas y seleccionar el top-k de cada fila
+            rated = (ratings > 0) & (indices < width)
+            candidates[row_of[rated], indices[rated]] = -np.inf
+            k = min(top_k, width)
+            top = np.argpartition(-candidates, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(candidates, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            
+            movie_ids = np.full((len(batch), top_k), -1, dtype=np.int64)
+            scores = np.full((len(batch), top_k), np.nan, dtype=np.float32)
+            for row in range(len(batch)):
+                finite = np.isfinite(top_scores[row])
+                top_indices = top[row][finite]
+                
+                # Si no hay suficientes recomendaciones, completar con películas populares
+                filled = top_indices
+                if len(top_indices) < top_k:
+                    excluded = np.zeros(n_movies, dtype=bool)
+                    row_indices, row_ratings = rows[row]
+                    excluded[row_indices[(row_ratings > 0) & (row_indices < n_movies)]] = True
+                    filled = self._fill_with_popular(top_indices, excluded, top_k)
+                movie_ids[row, :len(filled)] = store.movie_ids[filled]
+                scores[row, :len(top_indices)] = top_scores[row][finite]
+                scores[row, len(top_indices):len(filled)] = 0.0
+            
+            yield np.array([user_id for user_id, _ in batch], dtype=np.int64), movie_ids, scores
@@ -0,0 +1,210 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from models.batching import RecommendationBatcher
+from models.catalog import get_catalog
+from models.data_processor import DataProcessor
+from models.executor import ComputeExecutor
+from models.metrics import timed_load
+from models.recommendation_cache import COLD_START_KEY, NEW_USER_KEY, RecommendationCache
+from models.recommendation_model import RecommendationModel
+
+
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+class AppState:
+    def __init__(self, data_processor: DataProcessor, recommendation_model: RecommendationModel):
+        """
+        Instantánea de datos y modelo servida por la API
+
+        Una recarga no la modifica: construye una nueva y la sustituye, así que
+        cada solicitud trabaja con la misma instantánea de principio a fin. Las
+        calificaciones en línea sí se añaden sobre la vigente.
+
+        Args:
+            data_processor: Calificaciones y catálogo cargados
+            recommendation_model: Modelo construido sobre ese data_processor
+        """
+        self.data_processor = data_processor
+        self.recommendation_model = recommendation_model
+
+    @property
+    def catalog(self):
+        return self.data_processor.catalog
+
+    @property
+    def ratings_store(self):
+        return self.data_processor.ratings_store
+
+    @property
+    def version(self) -> str:
+        return self.recommendation_model.version
+
+
+class DataRegistry:
+    def __init__(self, data_dir: str = "data"):
+        """
+        Registro único de datos y modelo para toda la aplicación
+
+        Sustituye a los DataProcessor que cada router cargaba por su cuenta: se
+        crea una vez por proceso (en el lifespan de FastAPI) y los routers lo
+        reciben con Depends. La caché de resultados y el batcher también viven
+        aquí porque su ciclo de vida es el de la aplicación, no el de los datos.
+
+        Args:
+            data_dir: Directorio con los CSV, el modelo y los artefactos compilados
+        """
+        self.data_dir = data_dir
+        self._state: Optional[AppState] = None
+        self._load_lock = threading.Lock()
+        self._update_lock: Optional[asyncio.Lock] = None
+        self._compaction_task: Optional[asyncio.Task] = None
+        self.reloads = 0
+        self.compactions = 0
+
+        # Segundos entre compactaciones del delta de calificaciones; 0 las desactiva
+        self.compaction_interval = float(os.getenv("RATINGS_COMPACTION_INTERVAL", "60"))
+
+        # Caché de resultados por usuario, calificaciones, top_k y versión de datos/modelo
+        self.recommendation_cache = RecommendationCache(
+            max_entries=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "1024")),
+            ttl_seconds=float(os.getenv("RECOMMENDATION_CACHE_TTL", "300")),
+        )
+
+        # Pool acotado para el cálculo de las solicitudes, con límites y tiempos por endpoint
+        self.executor = ComputeExecutor.from_env()
+
+        # Micro-batching opcional de solicitudes concurrentes
+        self.batcher: Optional[RecommendationBatcher] = None
+        if _env_flag("RECOMMENDATION_BATCHING"):
+            self.batcher = RecommendationBatcher(
+                None,
+                max_batch_size=int(os.getenv("RECOMMENDATION_BATCH_SIZE", "32")),
+                max_wait_ms=float(os.getenv("RECOMMENDATION_BATCH_WAIT_MS", "5")),
+            )
+
+    def _build(self, reload: bool = False) -> AppState:
+        """Carga datos y modelo desde disco sin tocar la instantánea publicada"""
+        with timed_load("catalog"):
+            catalog = get_catalog(self.data_dir, reload=reload)
+        with timed_load("data"):
+            data_processor = DataProcessor(self.data_dir, catalog=catalog)
+        with timed_load("model"):
+            recommendation_model = RecommendationModel(data_processor)
+        return AppState(data_processor, recommendation_model)
+
+    def _publish(self, state: AppState):
+        # Una sola asignación de referencia: atómica para las solicitudes concurrentes
+        self._state = state
+        if self.batcher is not None:
+            self.batcher.recommendation_model = state.recommendation_model
+
+    def load(self) -> AppState:
+        """Carga la instantánea inicial si aún no existe"""
+        with self._load_lock:
+            if self._state is None:
+                self._publish(self._build())
+        return self._state
+
+    @property
+    def loaded(self) -> bool:
+        return self._state is not None
+
+    @property
+    def current(self) -> AppState:
+        """
+        Instantánea vigente
+
+        Si el lifespan no se ejecutó (p. ej. un cliente ASGI sin lifespan) se
+        carga en el primer acceso.
+        """
+        state = self._state
+        return state if state is not None else self.load()
+
+    def _lock(self) -> asyncio.Lock:
+        # Se crea en el event loop que la usa por primera vez
+        if self._update_lock is None:
+            self._update_lock = asyncio.Lock()
+        return self._update_lock
+
+    async def add_ratings(self, user_id: int, ratings: Dict[int, float], timestamp: int = None) -> AppState:
+        """
+        Añade calificaciones en línea a la instantánea vigente
+
+        Espera a que termine una recarga en curso para que las calificaciones no
+        se pierdan con la instantánea anterior. Descarta de la caché los
+        resultados que dependen de ellas.
+        """
+        async with self._lock():
+            state = self.current
+            timestamp = int(time.time()) if timestamp is None else timestamp
+            popularity_changed = state.recommendation_model.add_ratings(user_id, ratings, timestamp)
+
+        self.recommendation_cache.invalidate_user(str(user_id))
+        if popularity_changed:
+            self.recommendation_cache.invalidate_user(COLD_START_KEY)
+            self.recommendation_cache.invalidate_user(NEW_USER_KEY)
+        return state
+
+    async def compact(self) -> int:
+        """Persiste y compacta en un hilo aparte las calificaciones pendientes de la instantánea vigente"""
+        state = self._state
+        if state is None or state.ratings_store.pending == 0:
+            return 0
+        compacted = await asyncio.get_running_loop().run_in_executor(None, state.data_processor.compact_ratings)
+        self.compactions += 1
+        return compacted
+
+    async def _compact_periodically(self):
+        while True:
+            await asyncio.sleep(self.compaction_interval)
+            try:
+                await self.compact()
+            except Exception as e:
+                print(f"Error compacting ratings: {str(e)}")
+
+    def start(self):
+        """Arranca la compactación periódica en el event loop actual"""
+        if self.compaction_interval > 0 and self._compaction_task is None:
+            self._compaction_task = asyncio.get_running_loop().create_task(self._compact_periodically())
+
+    async def reload(self) -> AppState:
+        """
+        Recarga datos y modelo en caliente
+
+        La nueva instantánea se construye en un hilo aparte, sin bloquear el
+        event loop, y se publica solo cuando está completa. Las solicitudes en
+        curso terminan con la anterior, que se libera al soltar su última
+        referencia. Si la carga falla se conserva la instantánea vigente.
+        Durante la recarga conviven ambas en memoria. Las calificaciones en
+        línea pendientes se persisten antes de leer de disco.
+        """
+        async with self._lock():
+            await self.compact()
+            loop = asyncio.get_running_loop()
+            state = await loop.run_in_executor(None, lambda: self._build(reload=True))
+            self._publish(state)
+            self.reloads += 1
+
+            # Las claves incluyen la versión, pero así se libera la memoria de inmediato
+            self.recommendation_cache.invalidate()
+            return state
+
+    async def close(self):
+        if self._compaction_task is not None:
+            self._compaction_task.cancel()
+            try:
+                await self._compaction_task
+            except asyncio.CancelledError:
+                pass
+            self._compaction_task = None
+        # Persistir lo pendiente antes de salir
+        await self.compact()
+        if self.batcher is not None:
+            await self.batcher.close()
+        self.executor.shutdown()
@@ -0,0 +1,212 @@
+import numpy as np
+import torch
+from typing import Optional
+from scipy import sparse
+
+from models.artifacts import CompiledArtifacts, file_fingerprint
+from models.inference import InferenceBackend
+
+
+def find_item_embeddings(state_dict: dict):
+    """Busca en un state_dict la matriz de embeddings de películas"""
+    for key, value in state_dict.items():
+        if 'item' in key.lower() and 'embedding' in key.lower():
+            return value
+    return None
+
+
+def normalize_rows(embeddings: torch.Tensor) -> torch.Tensor:
+    """Normaliza cada fila a norma 1; las filas nulas quedan en cero"""
+    norms = torch.norm(embeddings, dim=1, keepdim=True)
+    return torch.where(
+        norms > 0, embeddings / norms.clamp_min(1e-12), torch.zeros_like(embeddings)
+    ).contiguous()
+
+
+class ScoringEngine:
+    def __init__(self, item_embeddings: torch.Tensor, n_movies: int, device: torch.device = None,
+                 normalized_embeddings: torch.Tensor = None):
+        """
+        Motor de puntuación vectorizado sobre los embeddings de películas
+
+        Los embeddings se normalizan una sola vez al cargar el modelo, de modo que
+        puntuar uno o varios usuarios se reduce a una multiplicación de matrices.
+
+        Args:
+            item_embeddings: Matriz (n_items, dim) con los embeddings de películas
+            n_movies: Número de películas del catálogo de calificaciones
+            device: Dispositivo donde se realizan los cálculos
+            normalized_embeddings: Embeddings ya normalizados (p. ej. de los
+                artefactos compilados); si no se indican se calculan aquí
+        """
+        self.device = device or item_embeddings.device
+        self.n_movies = n_movies
+
+        embeddings = item_embeddings.detach().to(self.device, dtype=torch.float32)
+        # Solo las primeras n_movies filas corresponden a películas del catálogo
+        self.n_items = min(embeddings.size(0), n_movies)
+        self.item_embeddings = embeddings[:self.n_items].contiguous()
+
+        if normalized_embeddings is not None:
+            self.normalized_embeddings = normalized_embeddings.detach().to(self.device, dtype=torch.float32)[:self.n_items]
+        else:
+            self.normalized_embeddings = normalize_rows(self.item_embeddings)
+
+    @property
+    def dim(self) -> int:
+        return self.item_embeddings.size(1)
+
+    def user_profiles(self, user_vectors: torch.Tensor) -> torch.Tensor:
+        """
+        Calcula el perfil de cada usuario como el promedio de los embeddings
+        de las películas calificadas, ponderado por la calificación
+
+        Args:
+            user_vectors: Matriz (batch, n_movies) de calificaciones
+
+        Returns:
+            Matriz (batch, dim) con los perfiles de usuario
+        """
+        if user_vectors.dim() == 1:
+            user_vectors = user_vectors.unsqueeze(0)
+        user_vectors = user_vectors.to(self.device, dtype=torch.float32)
+
+        counts = torch.count_nonzero(user_vectors, dim=1).clamp_min(1).unsqueeze(1)
+        profiles = user_vectors[:, :self.n_items] @ self.item_embeddings
+        return profiles / counts
+
+    def score(self, user_vectors: torch.Tensor) -> np.ndarray:
+        """
+        Calcula la similitud coseno entre el perfil de cada usuario y todas las películas
+
+        Args:
+            user_vectors: Matriz (batch, n_movies) o vector (n_movies,) de calificaciones
+
+        Returns:
+            Array (batch, n_movies) con las puntuaciones; las películas sin
+            embedding reciben 0
+        """
+        return self.score_profiles(self.user_profiles(user_vectors))
+
+    def sparse_profiles(self, indptr: np.ndarray, indices: np.ndarray, ratings: np.ndarray) -> torch.Tensor:
+        """
+        Igual que user_profiles, pero a partir de filas CSR (p. ej. del RatingsStore)
+
+        Evita materializar la matriz densa (batch, n_movies) al puntuar muchos
+        usuarios a la vez.
+
+        Args:
+            indptr: Desplazamientos de inicio de fila (batch + 1)
+            indices: Índices de película de cada calificación
+            ratings: Valor de cada calificación
+
+        Returns:
+            Matriz (batch, dim) con los perfiles de usuario
+        """
+        counts = torch.from_numpy(np.diff(indptr)).to(self.device, dtype=torch.float32).clamp_min(1).unsqueeze(1)
+
+        # Solo las películas con embedding contribuyen al perfil
+        user_matrix = sparse.csr_matrix(
+            (np.asarray(ratings, dtype=np.float32), np.asarray(indices), np.asarray(indptr)),
+            shape=(len(indptr) - 1, max(int(indices.max(initial=-1)) + 1, self.n_items)),
+        )[:, :self.n_items]
+        profiles = user_matrix @ self.item_embeddings.cpu().numpy()
+        return torch.from_numpy(np.asarray(profiles, dtype=np.float32)).to(self.device) / counts
+
+    def score_profiles(self, profiles: torch.Tensor) -> np.ndarray:
+        """Similitud coseno entre perfiles (batch, dim) y todas las películas; ver score()"""
+        norms = torch.norm(profiles, dim=1, keepdim=True)
+        profiles = torch.where(norms > 0, profiles / norms.clamp_min(1e-12), torch.zeros_like(profiles))
+
+        with torch.no_grad():
+            similarities = profiles @ self.normalized_embeddings.T
+
+        scores = np.zeros((similarities.size(0), self.n_movies), dtype=np.float32)
+        scores[:, :self.n_items] = similarities.cpu().numpy()
+        return scores
+
+
+class TorchBackend(InferenceBackend):
+    name = "torch"
+
+    def __init__(self, model_path: str, artifacts: Optional[CompiledArtifacts], n_movies: int):
+        """
+        Backend original sobre torch
+
+        Carga los embeddings compilados si se indican artefactos (evita
+        torch.load del checkpoint completo) o el checkpoint con torch.load.
+        Los state_dict se puntúan con ScoringEngine; los nn.Module completos
+        se ejecutan tal cual.
+
+        Args:
+            model_path: Ruta del checkpoint del modelo
+            artifacts: Artefactos compilados con embeddings al día, o None
+            n_movies: Número de películas del catálogo de calificaciones
+        """
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.n_movies = n_movies
+        normalized_embeddings = None
+
+        if artifacts is not None:
+            # Embeddings mapeados en memoria: se evita torch.load del checkpoint completo
+            embeddings, normalized = artifacts.item_embeddings()
+            normalized_embeddings = torch.from_numpy(normalized)
+            self.version = artifacts.model_fingerprint
+            print(f"Embeddings cargados desde {artifacts.path}")
+            self.model = {"item_embedding.weight": torch.from_numpy(embeddings)}
+        else:
+            self.version = file_fingerprint([model_path])
+            try:
+                print(f"Cargando modelo desde {model_path}")
+                self.model = torch.load(model_path, map_location=self.device)
+                print(f"Modelo cargado exitosamente. Tipo: {type(self.model)}")
+            except Exception as e:
+                raise RuntimeError(f"Error al cargar el modelo pre-entrenado: {str(e)}")
+
+        self.scoring_engine = None
+        if isinstance(self.model, dict):
+            # Buscar embeddings de películas
+            item_embeddings = find_item_embeddings(self.model)
+            if item_embeddings is None:
+                raise ValueError("No se encontraron embeddings de películas en el modelo")
+            self.scoring_engine = ScoringEngine(item_embeddings, n_movies, device=self.device,
+                                                normalized_embeddings=normalized_embeddings)
+            self.n_items = self.scoring_engine.n_items
+        elif not isinstance(self.model, torch.nn.Module):
+            raise TypeError(f"Formato de modelo no soportado: {type(self.model)}")
+
+    @property
+    def has_embeddings(self) -> bool:
+        return self.scoring_engine is not None
+
+    @property
+    def normalized_embeddings(self) -> np.ndarray:
+        if self.scoring_engine is None:
+            return super().normalized_embeddings
+        return self.scoring_engine.normalized_embeddings.cpu().numpy()
+
+    def score(self, user_matrix: np.ndarray) -> np.ndarray:
+        user_matrix = torch.from_numpy(np.atleast_2d(np.asarray(user_matrix, dtype=np.float32))).to(self.device)
+        if self.scoring_engine is not None:
+            return self.scoring_engine.score(user_matrix)
+
+        self.model.eval()
+        with torch.no_grad():
+            predictions = self.model(user_matrix)
+            return predictions.cpu().numpy().reshape(user_matrix.size(0), -1)
+
+    def score_sparse(self, indptr: np.ndarray, indices: np.ndarray, ratings: np.ndarray) -> np.ndarray:
+        if self.scoring_engine is None:
+            return super().score_sparse(indptr, indices, ratings)
+        # Perfiles con un producto disperso, sin la matriz densa de calificaciones
+        profiles = self.scoring_engine.sparse_profiles(indptr, indices, ratings)
+        return self.scoring_engine.score_profiles(profiles)
+
+    def user_profiles(self, user_matrix: np.ndarray) -> np.ndarray:
+        if self.scoring_engine is None:
+            return super().user_profiles(user_matrix)
+        user_matrix = torch.from_numpy(np.atleast_2d(np.asarray(user_matrix, dtype=np.float32)))
+        return self.scoring_engine.user_profiles(user_matrix).cpu().numpy()
+
+    def limit_threads(self, threads: int):
+        torch.set_num_threads(threads)
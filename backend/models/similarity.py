@@ -0,0 +1,244 @@
+"""
+Vecinos precalculados película-película para "más como esta"
+
+Un trabajo fuera de línea calcula, para cada película con embedding, sus top-M
+películas más parecidas por similitud coseno entre embeddings, opcionalmente
+mezclada con la similitud de co-calificación (usuarios que calificaron ambas).
+Se calcula por bloques de filas, así que la memoria es O(block_size * n_movies)
+y no O(n_movies²). Las listas se guardan como dos matrices compactas
+(n_movies, M) junto a los artefactos compilados y se sirven con mmap.
+
+    python -m models.similarity [--data-dir data] [--top-m 50] [--co-rating-weight 0.0]
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from models.artifacts import MODEL_FILENAME, artifacts_dir, file_fingerprint
+
+SIMILARITY_FORMAT_VERSION = 1
+SIMILARITY_MANIFEST = "similar_manifest.json"
+NEIGHBORS_FILENAME = "similar_neighbors.npy"
+SCORES_FILENAME = "similar_scores.npy"
+MOVIE_IDS_FILENAME = "similar_movie_ids.npy"
+
+
+def _co_rating_block(ratings_matrix, counts: np.ndarray, start: int, end: int,
+                     n_items: int) -> np.ndarray:
+    """Coseno de co-calificación (bloque, n_items): co-ocurrencias / sqrt(n_i * n_j)"""
+    co_counts = (ratings_matrix[:, start:end].T @ ratings_matrix[:, :n_items]).toarray().astype(np.float32)
+    norms = np.sqrt(np.maximum(counts[start:end], 1))[:, None] * np.sqrt(np.maximum(counts[:n_items], 1))[None, :]
+    return co_counts / norms.astype(np.float32)
+
+
+def build_neighbors(normalized: np.ndarray, top_m: int = 50, block_size: int = 1024,
+                    ratings_matrix=None,
+                    co_rating_weight: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula los top-M vecinos de cada película por bloques de filas
+
+    Args:
+        normalized: Embeddings (n_items, dim) normalizados por filas
+        top_m: Vecinos por película
+        block_size: Filas por bloque; la memoria es block_size * n_items
+        ratings_matrix: Matriz binaria usuarios x películas para la co-calificación
+        co_rating_weight: Peso de la co-calificación en la mezcla (0 = solo embeddings)
+
+    Returns:
+        Tupla (vecinos (n_items, M) int32, similitudes (n_items, M) float16),
+        ordenados de mayor a menor similitud
+    """
+    n_items = normalized.shape[0]
+    top_m = max(1, min(top_m, n_items - 1))
+    neighbors = np.empty((n_items, top_m), dtype=np.int32)
+    scores = np.empty((n_items, top_m), dtype=np.float16)
+
+    blend = ratings_matrix is not None and co_rating_weight > 0
+    if blend:
+        ratings_matrix = ratings_matrix.tocsc()
+        counts = np.diff(ratings_matrix.indptr)
+
+    for start in range(0, n_items, block_size):
+        end = min(start + block_size, n_items)
+        similarities = normalized[start:end] @ normalized.T
+        if blend:
+            similarities = ((1 - co_rating_weight) * similarities
+                            + co_rating_weight * _co_rating_block(ratings_matrix, counts, start, end, n_items))
+
+        # Una película no es vecina de sí misma
+        rows = np.arange(end - start)
+        similarities[rows, rows + start] = -np.inf
+
+        top = np.argpartition(-similarities, top_m - 1, axis=1)[:, :top_m]
+        top_scores = np.take_along_axis(similarities, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        neighbors[start:end] = np.take_along_axis(top, order, axis=1)
+        scores[start:end] = np.take_along_axis(top_scores, order, axis=1)
+
+    return neighbors, scores
+
+
+class SimilarityIndex:
+    def __init__(self, movie_ids: np.ndarray, neighbors: np.ndarray, scores: np.ndarray,
+                 manifest: Optional[Dict] = None):
+        """
+        Listas de vecinos por película, en memoria o mapeadas desde disco
+
+        Args:
+            movie_ids: movieId de cada fila (y de cada índice de vecino)
+            neighbors: Matriz (n_items, M) de índices de vecinos
+            scores: Matriz (n_items, M) de similitudes
+            manifest: Metadatos de la compilación
+        """
+        self.movie_ids = movie_ids
+        self.neighbors = neighbors
+        self.scores = scores
+        self.manifest = manifest or {}
+        self.movie_id_to_row = {int(movie_id): row for row, movie_id in enumerate(movie_ids.tolist())}
+
+    @property
+    def top_m(self) -> int:
+        return self.neighbors.shape[1]
+
+    @property
+    def version(self) -> str:
+        """Huella del manifiesto: cambia con cada compilación del índice"""
+        return hashlib.blake2b(json.dumps(self.manifest, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+    def __contains__(self, movie_id) -> bool:
+        return int(movie_id) in self.movie_id_to_row
+
+    def similar(self, movie_id: int, limit: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Películas más parecidas a movie_id, de mayor a menor similitud
+
+        Returns:
+            Tupla (movieIds, similitudes); vacía si la película no tiene embedding
+        """
+        row = self.movie_id_to_row.get(int(movie_id))
+        if row is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        limit = max(0, min(limit, self.top_m))
+        return self.movie_ids[self.neighbors[row, :limit]], self.scores[row, :limit].astype(np.float32)
+
+    def save(self, out_dir: str):
+        os.makedirs(out_dir, exist_ok=True)
+        manifest_path = os.path.join(out_dir, SIMILARITY_MANIFEST)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        np.save(os.path.join(out_dir, MOVIE_IDS_FILENAME), np.ascontiguousarray(self.movie_ids))
+        np.save(os.path.join(out_dir, NEIGHBORS_FILENAME), np.ascontiguousarray(self.neighbors))
+        np.save(os.path.join(out_dir, SCORES_FILENAME), np.ascontiguousarray(self.scores))
+        # El manifiesto se escribe al final y de forma atómica
+        with open(manifest_path + ".tmp", 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    @classmethod
+    def open(cls, data_dir: str) -> Optional["SimilarityIndex"]:
+        """
+        Abre el índice compilado si existe y sigue al día con el modelo y las calificaciones
+
+        Returns:
+            El índice (mapeado en memoria) o None
+        """
+        path = artifacts_dir(data_dir)
+        manifest_path = os.path.join(path, SIMILARITY_MANIFEST)
+        if not os.path.exists(manifest_path):
+            return None
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != SIMILARITY_FORMAT_VERSION:
+            return None
+
+        model_path = os.path.join(data_dir, MODEL_FILENAME)
+        ratings_path = os.path.join(data_dir, 'ratings.csv')
+        stale = os.path.exists(model_path) and manifest.get('model_fingerprint') != file_fingerprint([model_path])
+        if manifest.get('co_rating_weight', 0) > 0 and os.path.exists(ratings_path):
+            stale = stale or manifest.get('ratings_fingerprint') != file_fingerprint([ratings_path])
+        if stale:
+            print(f"Índice de similitud en {path} desactualizado; ejecute python -m models.similarity")
+            return None
+
+        return cls(
+            np.load(os.path.join(path, MOVIE_IDS_FILENAME), mmap_mode='r'),
+            np.load(os.path.join(path, NEIGHBORS_FILENAME), mmap_mode='r'),
+            np.load(os.path.join(path, SCORES_FILENAME), mmap_mode='r'),
+            manifest,
+        )
+
+
+def build_similarity_index(data_dir: str = "data", top_m: int = 50, block_size: int = 1024,
+                           co_rating_weight: float = 0.0, out_dir: Optional[str] = None) -> SimilarityIndex:
+    """
+    Calcula y guarda el índice de similitud a partir del modelo cargado
+
+    Args:
+        data_dir: Directorio con las calificaciones y el modelo
+        top_m: Vecinos por película
+        block_size: Filas por bloque del producto de matrices
+        co_rating_weight: Peso de la co-calificación (0 = solo embeddings)
+        out_dir: Directorio de salida (por defecto el de los artefactos compilados)
+    """
+    from models.data_processor import DataProcessor
+    from models.recommendation_model import RecommendationModel
+
+    model = RecommendationModel(DataProcessor(data_dir))
+    if not model.backend.has_embeddings:
+        raise ValueError("El índice de similitud requiere un state_dict con embeddings de películas")
+
+    normalized = model.backend.normalized_embeddings
+    n_items = normalized.shape[0]
+    store = model.ratings_store
+
+    ratings_matrix = None
+    if co_rating_weight > 0:
+        from scipy import sparse
+        ratings_matrix = sparse.csr_matrix(
+            (np.ones(store.nnz, dtype=np.float32), np.asarray(store.indices), np.asarray(store.indptr)),
+            shape=(len(store.indptr) - 1, store.n_movies),
+        )
+
+    start = time.perf_counter()
+    neighbors, scores = build_neighbors(normalized, top_m=top_m, block_size=block_size,
+                                        ratings_matrix=ratings_matrix, co_rating_weight=co_rating_weight)
+    elapsed = time.perf_counter() - start
+
+    manifest = {
+        'format_version': SIMILARITY_FORMAT_VERSION,
+        'created_at': time.time(),
+        'model_fingerprint': file_fingerprint([os.path.join(data_dir, MODEL_FILENAME)]),
+        'ratings_fingerprint': file_fingerprint([os.path.join(data_dir, 'ratings.csv')]),
+        'top_m': int(neighbors.shape[1]),
+        'co_rating_weight': co_rating_weight,
+        'n_movies': n_items,
+        'build_seconds': elapsed,
+    }
+    index = SimilarityIndex(np.asarray(store.movie_ids[:n_items], dtype=np.int64), neighbors, scores, manifest)
+    index.save(out_dir or artifacts_dir(data_dir))
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--top-m", type=int, default=50)
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--co-rating-weight", type=float, default=0.0)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    index = build_similarity_index(args.data_dir, top_m=args.top_m, block_size=args.block_size,
+                                   co_rating_weight=args.co_rating_weight, out_dir=args.out)
+    print(f"Índice de similitud: {len(index.movie_ids)} películas x {index.top_m} vecinos "
+          f"en {index.manifest['build_seconds']:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
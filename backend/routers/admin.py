@@ -0,0 +1,46 @@
+import os
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from models.registry import DataRegistry
+from routers.dependencies import get_registry
+
+router = APIRouter()
+
+# When set, reload requests must send it in the X-Admin-Token header
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+@router.get("/admin/status", response_model=Dict)
+async def get_status(registry: DataRegistry = Depends(get_registry)):
+    """Version of the data and model currently served by this worker"""
+    return {
+        "loaded": registry.loaded,
+        "version": registry.current.version if registry.loaded else None,
+        "inference_backend": registry.current.recommendation_model.backend.name if registry.loaded else None,
+        "reloads": registry.reloads,
+    }
+
+@router.post("/admin/reload", response_model=Dict)
+async def reload_data(
+    registry: DataRegistry = Depends(get_registry),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Reload ratings, catalog and model from disk and swap them in atomically.
+
+    In-flight requests finish on the previous snapshot. Only the worker that
+    receives the request reloads; with several uvicorn workers, restart them or
+    call this once per worker.
+    """
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+    previous = registry.current.version if registry.loaded else None
+    try:
+        state = await registry.reload()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Data files not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reloading data: {str(e)}")
+
+    return {"previous_version": previous, "version": state.version, "reloads": registry.reloads}
@@ -0,0 +1,16 @@
+from fastapi import Depends, HTTPException, Request
+
+from models.registry import AppState, DataRegistry
+
+
+def get_registry(request: Request) -> DataRegistry:
+    """Application-scoped registry created in main.py"""
+    return request.app.state.registry
+
+
+def get_state(registry: DataRegistry = Depends(get_registry)) -> AppState:
+    """Data/model snapshot used for the whole request, even if a reload happens meanwhile"""
+    try:
+        return registry.current
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Data files not found")
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from models.metrics import METRICS
+from models.registry import DataRegistry
+from routers.dependencies import get_registry
+
+router = APIRouter()
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Snapshot values, refreshed from the registry on every scrape
+CACHE_LOOKUPS = METRICS.gauge("recommendation_cache_lookups", "Recommendation cache lookups since start", ("result",))
+CACHE_HIT_RATIO = METRICS.gauge("recommendation_cache_hit_ratio", "Recommendation cache hits / lookups")
+CACHE_ENTRIES = METRICS.gauge("recommendation_cache_entries", "Results held in the recommendation cache")
+CACHE_REMOVALS = METRICS.gauge("recommendation_cache_removals", "Cache entries dropped since start", ("reason",))
+RATINGS_PENDING = METRICS.gauge("ratings_pending", "Online ratings not yet compacted")
+RELOADS = METRICS.gauge("data_reloads", "Hot reloads since start")
+COMPACTIONS = METRICS.gauge("ratings_compactions", "Ratings compactions since start")
+MODEL_INFO = METRICS.gauge("model_info", "Data/model version and inference backend being served",
+                           ("version", "backend"))
+
+
+def _collect(registry: DataRegistry):
+    stats = registry.recommendation_cache.stats()
+    CACHE_LOOKUPS.set(stats["hits"], "hit")
+    CACHE_LOOKUPS.set(stats["misses"], "miss")
+    CACHE_HIT_RATIO.set(stats["hit_ratio"])
+    CACHE_ENTRIES.set(stats["entries"])
+    for reason in ("evictions", "expirations", "invalidations", "discarded_puts"):
+        CACHE_REMOVALS.set(stats[reason], reason)
+    RELOADS.set(registry.reloads)
+    COMPACTIONS.set(registry.compactions)
+
+    if registry.loaded:
+        state = registry.current
+        RATINGS_PENDING.set(state.ratings_store.pending)
+        MODEL_INFO.clear()
+        MODEL_INFO.set(1, state.version, state.recommendation_model.backend.name)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(registry: DataRegistry = Depends(get_registry)):
+    """Request, stage, cache and load metrics in Prometheus text format"""
+    _collect(registry)
+    return PlainTextResponse(METRICS.render(), media_type=CONTENT_TYPE)
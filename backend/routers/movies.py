@@ -1,46 +1,109 @@
-from fastapi import APIRouter, HTTPException
-import pandas as pd
-import os
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from typing import List, Optional
+from models.executor import ComputeTimeout
+from models.registry import AppState, DataRegistry
+from routers.dependencies import get_registry, get_state
+from routers.responses import CompactJSONResponse, catalog_response, field_selection, not_modified, select_fields
 
 router = APIRouter()
 
-# Path to the movies.csv file
-MOVIES_CSV_PATH = os.path.join("data", "movies.csv")
+# Largest page of similar movies; with a precomputed index at most its top_m are returned
+MAX_SIMILAR = 100
 
 @router.get("/movies")
-async def get_movies_by_genre(genre: str, limit: Optional[int] = 20):
-    """Return movies for a specific genre from movies.csv"""
-    try:
-        # Check if file exists
-        if not os.path.exists(MOVIES_CSV_PATH):
-            raise HTTPException(status_code=404, detail="Movies data file not found")
-
-        # Read the CSV file
-        df = pd.read_csv(MOVIES_CSV_PATH)
-
-        # Filter movies by genre
-        matching_movies = []
-        for _, movie in df.iterrows():
-            if 'genres' in df.columns and isinstance(movie.genres, str):
-                movie_genres = movie.genres.split('|')
-                if genre in movie_genres:
-                    # Format the movie object for frontend
-                    movie_data = {
-                        "id": movie.get("movieId", ""),
-                        "title": movie.get("title", ""),
-                        "genres": movie.get("genres", "").split('|'),
-                        # Add any additional fields you need
-                        "poster_path": "",  # If you have poster paths in your CSV
-                        "overview": ""      # If you have overviews in your CSV
-                    }
-                    matching_movies.append(movie_data)
-
-        # Apply limit and return random selection
-        import random
-        if len(matching_movies) > limit:
-            return random.sample(matching_movies, limit)
-        return matching_movies
+async def get_movies_by_genre(
+    request: Request,
+    genre: List[str] = Query(...),
+    limit: int = Query(20, ge=1, le=100),
+    match: str = "any",
+    seed: Optional[int] = None,
+    page: int = Query(1, ge=1),
+    fields: Optional[List[str]] = Depends(field_selection),
+    state: AppState = Depends(get_state),
+    registry: DataRegistry = Depends(get_registry),
+):
+    """Return movies for one or more genres from the in-memory genre index.
+
+    Repeat `genre` to query several genres; `match=all` requires every genre
+    (AND) and `match=any` accepts any of them (OR). Without `seed` a fresh
+    random selection is returned; with `seed` the matches follow a stable
+    random order that can be paged through with `page`. Seeded pages only
+    change on reload, so they carry an ETag; `fields` trims each movie.
+    """
+    if match not in ("any", "all"):
+        raise HTTPException(status_code=400, detail="match must be 'any' or 'all'")
+    if seed is not None:
+        cached = not_modified(request, state.version)
+        if cached is not None:
+            return cached
+
+    def find_movies():
+        # Use the shared in-memory catalog
+        catalog = state.catalog
+        genre_index = catalog.genre_index
+        match_all = match == "all"
+        if seed is None:
+            movie_ids = genre_index.sample(genre, limit, match_all=match_all)
+        else:
+            movie_ids = genre_index.page(genre, seed, page=page, limit=limit, match_all=match_all)
+
+        # Format the movie objects for frontend
+        movies = []
+        for movie_id in movie_ids:
+            movie = catalog.movies[movie_id]
+            movies.append({
+                "id": movie_id,
+                "title": movie["title"],
+                "genres": movie["genres"].split('|'),
+                # Add any additional fields you need
+                "poster_path": "",  # If you have poster paths in your CSV
+                "overview": ""      # If you have overviews in your CSV
+            })
+
+        return select_fields(movies, fields)
 
+    try:
+        # Seeded orders of large genres are built on first use, so keep this off the event loop
+        movies = await registry.executor.run("movies", find_movies)
+    except ComputeTimeout:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Movies data file not found")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching movies: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching movies: {str(e)}")
+    if seed is None:
+        return CompactJSONResponse(movies)
+    return catalog_response(movies, state.version)
+
+@router.get("/movies/{movie_id}/similar")
+async def get_similar_movies(
+    movie_id: int,
+    request: Request,
+    limit: int = Query(10, ge=1, le=MAX_SIMILAR),
+    fields: Optional[List[str]] = Depends(field_selection),
+    state: AppState = Depends(get_state),
+    registry: DataRegistry = Depends(get_registry),
+):
+    """Return the movies most similar to `movie_id` ("more like this").
+
+    Served from the neighbour lists precomputed by `python -m models.similarity`
+    (at most their `top_m` entries); without them the similarities are computed
+    on the fly from the embeddings. Cacheable until the next reload or index
+    rebuild (ETag / If-None-Match).
+    """
+    if movie_id not in state.catalog and movie_id not in state.ratings_store.movie_id_to_idx:
+        raise HTTPException(status_code=404, detail=f"Movie {movie_id} not found")
+    version = state.recommendation_model.similar_version
+    cached = not_modified(request, version)
+    if cached is not None:
+        return cached
+
+    def find_similar():
+        similar_ids, similarities = state.recommendation_model.similar_movies(movie_id, limit)
+        movies = state.catalog.movie_details(similar_ids)
+        for movie in movies:
+            movie['similarity'] = similarities.get(movie['movieId'])
+        return select_fields(movies, fields)
+
+    similar = await registry.executor.run("similar", find_similar)
+    return catalog_response({"movieId": str(movie_id), "similar": similar}, version)
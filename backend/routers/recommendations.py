@@ -1,34 +1,49 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Optional
-from pydantic import BaseModel
-import pandas as pd
-import os
-from models.data_processor import DataProcessor
-from models.recommendation_model import RecommendationModel
+from pydantic import BaseModel, Field
+from models.batch_recommendations import batch_size_for, ndjson_lines
+from models.cold_start import PopularityScores
+from models.executor import DEGRADED, ComputeTimeout
+from models.registry import AppState, DataRegistry
+from routers.dependencies import get_registry, get_state
+from routers.responses import CompactJSONResponse, field_selection, select_fields
 
 router = APIRouter()
-data_processor = DataProcessor()
-recommendation_model = RecommendationModel(data_processor)
-
-# Load ratings data
-ratings_path = os.path.join(data_processor.data_dir, 'ratings.csv')
-ratings_df = pd.read_csv(ratings_path) if os.path.exists(ratings_path) else pd.DataFrame()
 
 class UserRatingsInput(BaseModel):
     user_id: str
     ratings: Optional[Dict[str, float]] = None
+    top_k: int = Field(10, ge=1, le=1000)
+    # MovieLens IDs that must not be recommended (e.g. already shown)
+    exclude: Optional[List[str]] = None
+    # Preferred genres from the genre picker; used when the user has no ratings yet
+    genres: Optional[List[str]] = None
 
 class RecommendationResponse(BaseModel):
     recommendations: List[Dict]
+    # True when scoring timed out and the result comes from the cache or the popularity ranking
+    degraded: bool = False
+
+class BatchRecommendationsInput(BaseModel):
+    # Dataset user IDs to score; all users when omitted. Unknown IDs are skipped
+    user_ids: Optional[List[int]] = None
+    top_k: int = Field(10, ge=1, le=1000)
+    batch_size: Optional[int] = Field(None, ge=1, le=10000)
+
+def recommendation_response(movie_details: List[Dict], fields: Optional[List[str]], degraded: bool = False):
+    # Same shape as RecommendationResponse, without validating it again; cached lists are never modified
+    return CompactJSONResponse({"recommendations": select_fields(movie_details, fields), "degraded": degraded})
 
 @router.post("/validate-id", response_model=Dict)
-async def validate_user_id(user_id: int):
+async def validate_user_id(user_id: int, state: AppState = Depends(get_state)):
     """Validate if a user ID exists in the dataset"""
-    if ratings_df.empty:
+    ratings_store = state.ratings_store
+    if ratings_store.n_users == 0:
         raise HTTPException(status_code=404, detail="Ratings data not available")
 
-    user_exists = user_id in ratings_df['userId'].values
-    max_user_id = int(ratings_df['userId'].max())
+    user_exists = ratings_store.has_user(user_id)
+    max_user_id = ratings_store.max_user_id
 
     return {
         "valid": user_exists,
@@ -36,33 +51,131 @@ async def validate_user_id(user_id: int):
     }
 
 @router.post("/recommendations", response_model=RecommendationResponse)
-async def get_recommendations(input_data: UserRatingsInput):
-    """Get movie recommendations for a user"""
+async def get_recommendations(
+    input_data: UserRatingsInput,
+    fields: Optional[List[str]] = Depends(field_selection),
+    state: AppState = Depends(get_state),
+    registry: DataRegistry = Depends(get_registry),
+):
+    """Get movie recommendations for a user
+
+    `predicted_rating` is the model's score. Users without ratings get the
+    genre/popularity ranking instead, with `predicted_rating` null and a
+    `popularity_score`: the Bayesian-smoothed mean rating (0.5-5 scale), as
+    do degraded responses served from that ranking.
+
+    Responses are built as plain dicts and serialized directly (the response
+    model only documents the shape); `?fields=` trims each movie.
+    """
+    recommendation_model = state.recommendation_model
+    recommendation_cache = registry.recommendation_cache
     user_id = input_data.user_id
     user_ratings = input_data.ratings or {}
+    top_k = input_data.top_k
+    exclude = input_data.exclude
+    genres = input_data.genres
 
-    # Get recommendations with predicted ratings
-    recommendation_ids, predicted_ratings = recommendation_model.get_recommendations(
-        user_id=user_id,
-        user_ratings=user_ratings,
-        top_k=10,
-        return_scores=True
+    # Serve repeated requests from the cache
+    known_user = user_id.isdigit() and recommendation_model.ratings_store.has_user(int(user_id))
+    cache_key = recommendation_cache.make_key(
+        user_id, user_ratings, top_k, exclude, version=recommendation_model.version, known_user=known_user,
+        genres=genres,
     )
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None:
+        return recommendation_response(cached, fields)
+    # New ratings for this user while scoring must keep the (pre-write) result out of the cache
+    generation = recommendation_cache.generation(cache_key)
+
+    # Get recommendations with predicted ratings off the event loop; cold-start lookups are cheap enough to skip the batcher
+    degraded = False
+    try:
+        if registry.batcher is not None and (known_user or user_ratings):
+            recommendation_ids, predicted_ratings = await registry.executor.guard(
+                "recommendations",
+                lambda: registry.batcher.submit(
+                    user_id, user_ratings, top_k=top_k, exclude=exclude, recommendation_model=recommendation_model,
+                    genres=genres,
+                ),
+            )
+        else:
+            recommendation_ids, predicted_ratings = await registry.executor.run(
+                "recommendations",
+                lambda: recommendation_model.get_recommendations(
+                    user_id=user_id,
+                    user_ratings=user_ratings,
+                    top_k=top_k,
+                    return_scores=True,
+                    exclude=exclude,
+                    genres=genres,
+                ),
+            )
+    except ComputeTimeout:
+        # Degrade instead of failing: an expired cached result if there is one, else the popularity ranking
+        stale = recommendation_cache.get_stale(cache_key)
+        if stale is not None:
+            DEGRADED.inc("recommendations", "stale_cache")
+            return recommendation_response(stale, fields, degraded=True)
+        DEGRADED.inc("recommendations", "popular")
+        degraded = True
+        recommendation_ids, predicted_ratings = recommendation_model.recommend_popular(
+            user_id, user_ratings, top_k, return_scores=True, exclude=exclude, genres=genres
+        )
 
     # Get detailed information for recommended movies
-    movie_details = data_processor.get_movie_details(recommendation_ids)
+    movie_details = state.data_processor.get_movie_details(recommendation_ids)
+
+    # Popularity rankings (cold start, degraded) score on the 0.5-5 rating scale, not the model's:
+    # they go in popularity_score and predicted_rating stays null
+    popularity = isinstance(predicted_ratings, PopularityScores)
 
     # More explicit and direct matching approach
     for movie in movie_details:
         movie_id = str(movie.get('movieId', movie.get('id')))
-        rating_value = predicted_ratings.get(movie_id)
 
         # Direct access with exact key
-        if movie_id in predicted_ratings:
-            movie['predicted_rating'] = predicted_ratings[movie_id]
-        else:
-            movie['predicted_rating'] = None
+        score = predicted_ratings.get(movie_id)
+        movie['predicted_rating'] = None if popularity else score
+        if popularity:
+            movie['popularity_score'] = score
 
         movie['actual_rating'] = movie.get('vote_average')
 
-    return {"recommendations": movie_details}
\ No newline at end of file
+    if not degraded:
+        recommendation_cache.put(cache_key, movie_details, generation=generation)
+    return recommendation_response(movie_details, fields, degraded=degraded)
+
+@router.get("/recommendations/cache", response_model=Dict)
+async def get_recommendation_cache_stats(registry: DataRegistry = Depends(get_registry)):
+    """Hit/miss/eviction counters of the recommendation result cache"""
+    return registry.recommendation_cache.stats()
+
+@router.post("/recommendations/batch")
+async def get_batch_recommendations(
+    input_data: BatchRecommendationsInput,
+    state: AppState = Depends(get_state),
+    registry: DataRegistry = Depends(get_registry),
+):
+    """Stream top-k recommendations for many users as NDJSON, one line per user.
+
+    Records are slim, `{"userId", "recommendations": [{"movieId", "predicted_rating"}]}`,
+    without the catalog fields of /api/recommendations; join on movieId if needed.
+
+    Users are scored in matrix batches on the compute pool, so the event loop
+    stays free and memory is bounded by batch_size * n_movies. Each job holds
+    a `batch` slot (ENDPOINT_CONCURRENCY_BATCH) until it finishes; when none
+    frees up within REQUEST_TIMEOUT_MS_BATCH the request gets a 503. For
+    offline runs over a process pool use `python -m models.batch_recommendations`.
+    """
+    recommendation_model = state.recommendation_model
+    user_ids = input_data.user_ids
+    if user_ids is None:
+        user_ids = state.ratings_store.user_ids.tolist()
+    batch_size = input_data.batch_size or batch_size_for(len(recommendation_model.movie_ids), memory_mb=64)
+
+    def generate():
+        for batch in recommendation_model.recommend_users(user_ids, top_k=input_data.top_k, batch_size=batch_size):
+            yield ndjson_lines(batch)
+
+    lines = await registry.executor.stream("batch", generate())
+    return StreamingResponse(lines, media_type="application/x-ndjson")
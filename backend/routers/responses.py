@@ -0,0 +1,78 @@
+"""Compact JSON responses, field selection and conditional GETs.
+
+Routes that return a `CompactJSONResponse` directly skip FastAPI's
+`response_model` validation and `jsonable_encoder` pass: the payloads are
+plain dicts built by the catalog, so the only remaining cost is the dump
+itself, done by orjson when it is installed and by the stdlib otherwise.
+
+Catalog data (genres, seeded movie pages, similar movies) only changes when
+the data or model is reloaded, so those routes send a weak ETag derived from
+the snapshot version plus `Cache-Control`, and answer `If-None-Match` with
+304 before doing any work.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import Query, Request
+from fastapi.responses import JSONResponse, Response
+from models.metrics import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Seconds a client may reuse catalog responses before revalidating with If-None-Match
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", "60"))
+
+
+class CompactJSONResponse(JSONResponse):
+    """JSON without whitespace, serialized with orjson when available"""
+
+    @timed("serialize")
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def field_selection(
+    fields: Optional[str] = Query(None, description="Comma-separated movie fields to return, e.g. id,title,poster_path"),
+) -> Optional[List[str]]:
+    """Parse the `fields` query parameter; None returns every field"""
+    if fields is None:
+        return None
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    return selected or None
+
+
+def select_fields(movies: Iterable[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    """Keep only the requested fields of each movie; unknown fields are ignored.
+
+    Always builds new dicts, so cached results are never modified.
+    """
+    if fields is None:
+        return list(movies)
+    return [{field: movie[field] for field in fields if field in movie} for movie in movies]
+
+
+def catalog_headers(version: str) -> Dict[str, str]:
+    return {"ETag": f'W/"{version}"', "Cache-Control": f"public, max-age={CATALOG_MAX_AGE}"}
+
+
+def not_modified(request: Request, version: str) -> Optional[Response]:
+    """304 response if the client already holds the representation for `version`, else None"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    # Weak comparison: gzip changes the bytes but not the representation
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in tags or f'"{version}"' in tags:
+        return Response(status_code=304, headers=catalog_headers(version))
+    return None
+
+
+def catalog_response(content, version: str) -> CompactJSONResponse:
+    """Compact response with the ETag and Cache-Control of the data snapshot"""
+    return CompactJSONResponse(content, headers=catalog_headers(version))
@@ -1,30 +1,55 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-import pandas as pd
-import os
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 
-from models.data_processor import DataProcessor
+from models.executor import ComputeTimeout
+from models.registry import AppState, DataRegistry
+from routers.dependencies import get_registry, get_state
 
 router = APIRouter()
-data_processor = DataProcessor()
 
 class UserRatingRequest(BaseModel):
     user_id: str
-    page: Optional[int] = 1
-    limit: Optional[int] = 10
+    page: int = Field(1, ge=1)
+    limit: int = Field(10, ge=1)
+    # Cursor pagination: when set, the page starts right after this rating and `page` is ignored
+    after_timestamp: Optional[int] = None
+    after_movieId: Optional[int] = None
 
 class UserRating(BaseModel):
     movieId: str
     rating: float
     title: str
+    timestamp: Optional[int] = None
+
+class RatingsCursor(BaseModel):
+    after_timestamp: int
+    after_movieId: int
 
 class UserRatingsResponse(BaseModel):
     ratings: List[UserRating]
     total_count: int
+    next_cursor: Optional[RatingsCursor] = None
+
+class NewRatingsInput(BaseModel):
+    user_id: int
+    # MovieLens movieId -> rating (0.5 - 5.0)
+    ratings: Dict[str, float]
+    # Unix time of the ratings; defaults to now
+    timestamp: Optional[int] = None
+
+class NewRatingsResponse(BaseModel):
+    user_id: int
+    accepted: int
+    new_user: bool
+    pending: int
 
 @router.post("/user_ratings", response_model=UserRatingsResponse)
-async def get_user_ratings(request: UserRatingRequest):
+async def get_user_ratings(
+    request: UserRatingRequest,
+    state: AppState = Depends(get_state),
+    registry: DataRegistry = Depends(get_registry),
+):
     user_id = request.user_id
     page = request.page
     limit = request.limit
@@ -33,42 +58,82 @@ async def get_user_ratings(request: UserRatingRequest):
     if not user_id:
         raise HTTPException(status_code=400, detail="user_id is required")
 
-    try:
-        # Load ratings and movies data
-        ratings_path = os.path.join(data_processor.data_dir, 'ratings.csv')
-        movies_path = os.path.join(data_processor.data_dir, 'movies.csv')
-
-        ratings_df = pd.read_csv(ratings_path)
-        movies_df = pd.read_csv(movies_path)
+    if (request.after_timestamp is None) != (request.after_movieId is None):
+        raise HTTPException(status_code=400, detail="after_timestamp and after_movieId must be given together")
 
-        # Filter ratings for this user
-        user_ratings = ratings_df[ratings_df['userId'] == int(user_id)]
+    def user_page():
+        # Per-user timeline index over the in-memory ratings
+        ratings_store = state.ratings_store
+        catalog = state.catalog
 
-        if user_ratings.empty:
+        user_idx = ratings_store.user_index(int(user_id))
+        if user_idx is None:
             return {"ratings": [], "total_count": 0}
 
         # Get total count before pagination
-        total_count = len(user_ratings)
-
-        # Apply pagination
-        user_ratings = user_ratings.sort_values(by='timestamp', ascending=False)
-        paginated_ratings = user_ratings.iloc[offset:offset + limit]
-
-        # Join with movies data to get titles
-        result = paginated_ratings.merge(movies_df, on='movieId', how='left')
-
-        # Convert to list of dictionaries
+        total_count = ratings_store.user_count(user_idx)
+
+        # Apply pagination, most recent first
+        after = None
+        if request.after_timestamp is not None:
+            after = (request.after_timestamp, request.after_movieId)
+        # One extra row tells whether another page follows
+        movie_ids, ratings, timestamps = ratings_store.user_timeline(user_idx, offset=offset, limit=limit + 1, after=after)
+        has_more = len(movie_ids) > limit
+        movie_ids, ratings, timestamps = movie_ids[:limit], ratings[:limit], timestamps[:limit]
+
+        # Look up titles in the catalog
         ratings_list = []
-        for _, row in result.iterrows():
+        for movie_id, rating, timestamp in zip(movie_ids.tolist(), ratings.tolist(), timestamps.tolist()):
             ratings_list.append({
-                "movieId": str(row['movieId']),
-                "rating": float(row['rating']),
-                "title": row['title'] if not pd.isna(row['title']) else "Unknown Movie"
+                "movieId": str(movie_id),
+                "rating": float(rating),
+                "title": catalog.title(movie_id),
+                "timestamp": timestamp
             })
 
-        return {"ratings": ratings_list, "total_count": total_count}
+        next_cursor = None
+        if has_more:
+            next_cursor = {"after_timestamp": timestamps[-1].item(), "after_movieId": movie_ids[-1].item()}
 
+        return {"ratings": ratings_list, "total_count": total_count, "next_cursor": next_cursor}
+
+    try:
+        # Merging online ratings into a page walks the user's delta; keep it off the event loop
+        return await registry.executor.run("user_ratings", user_page)
+    except ComputeTimeout:
+        raise
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid user_id format")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/ratings", response_model=NewRatingsResponse)
+async def add_ratings(
+    input_data: NewRatingsInput,
+    state: AppState = Depends(get_state),
+    registry: DataRegistry = Depends(get_registry),
+):
+    """Add or update ratings online; they are visible to the next recommendation or user_ratings request"""
+    if input_data.user_id <= 0:
+        raise HTTPException(status_code=400, detail="user_id must be a positive integer")
+    if not input_data.ratings:
+        raise HTTPException(status_code=400, detail="ratings must not be empty")
+
+    ratings = {}
+    for movie_id, rating in input_data.ratings.items():
+        if not movie_id.isdigit() or (int(movie_id) not in state.catalog and int(movie_id) not in state.ratings_store.movie_id_to_idx):
+            raise HTTPException(status_code=400, detail=f"Unknown movieId: {movie_id}")
+        if not 0.5 <= rating <= 5.0:
+            raise HTTPException(status_code=400, detail=f"Rating for movieId {movie_id} must be between 0.5 and 5.0")
+        ratings[int(movie_id)] = rating
+
+    new_user = not state.ratings_store.has_user(input_data.user_id)
+    state = await registry.add_ratings(input_data.user_id, ratings, input_data.timestamp)
+
+    return {
+        "user_id": input_data.user_id,
+        "accepted": len(ratings),
+        "new_user": new_user,
+        "pending": state.ratings_store.pending,
+    }
@@ -0,0 +1,100 @@
+"""
+Preforking server: load data and model once, then fork the uvicorn workers.
+
+`uvicorn main:app --workers N` starts every worker from scratch: each one
+imports the libraries, maps the compiled arrays and builds the catalog, ID
+maps, popularity ranking and model structures on its own. Here the parent
+loads the registry once, freezes the garbage collector so collections do not
+write to (and copy) the shared objects, and forks the workers, which accept
+connections on the same listening socket. Workers share everything loaded
+before the fork copy-on-write; only what they allocate while serving (caches,
+online ratings, a hot-reloaded snapshot) is private.
+
+As with `uvicorn --workers`, online ratings and POST /api/admin/reload apply
+to the worker that handles the request.
+
+    python serve.py [--host 0.0.0.0] [--port 8000] [--workers 2]
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+from main import app
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, log_level: str):
+    # Back to the default handlers; uvicorn installs its own for a graceful shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level, timeout_graceful_shutdown=10)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count())
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    # Everything the workers read is built here, before the fork
+    start = time.perf_counter()
+    app.state.registry.load()
+    print(f"Data and model loaded in {time.perf_counter() - start:.2f} s; starting {args.workers} workers")
+    gc.collect()
+    gc.freeze()
+
+    sock = bind_socket(args.host, args.port)
+    workers = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(sock, args.log_level)
+            finally:
+                os._exit(0)
+        workers.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(args.workers):
+        spawn()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}; starting a new one")
+            spawn()
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+# The app imports `models`/`routers` relative to backend/, as when run with uvicorn from there
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Small synthetic MovieLens-shaped dataset with a stand-in model"""
+    from benchmarks.synthetic import write_dataset
+
+    path = str(tmp_path / "data")
+    write_dataset(path, n_users=60, n_movies=300, n_ratings=3000)
+    return path
+
+
+@pytest.fixture
+def client(data_dir, monkeypatch):
+    """TestClient over the app, serving data_dir"""
+    from fastapi.testclient import TestClient
+
+    import main
+    from models.registry import DataRegistry
+
+    monkeypatch.setattr(main.app.state, "registry", DataRegistry(data_dir))
+    with TestClient(main.app) as test_client:
+        yield test_client
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from models.ann_index import IVFIndex
+from models.data_processor import DataProcessor
+from models.recommendation_model import RecommendationModel
+
+
+@pytest.fixture
+def models(data_dir):
+    data_processor = DataProcessor(data_dir)
+    return RecommendationModel(data_processor), lambda **options: RecommendationModel(
+        data_processor, retrieval="ann", **options)
+
+
+def test_probing_every_list_is_exact_search():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = IVFIndex.build(vectors, n_lists=20, n_probe=3)
+    exclude = np.array([3, 17, 250])
+
+    for query in vectors[:25]:
+        movie_indices, scores = index.search(query, 10, exclude=exclude, n_probe=index.n_lists)
+        similarities = vectors @ query
+        similarities[exclude] = -np.inf
+        expected = np.argsort(-similarities, kind="stable")[:10]
+        np.testing.assert_array_equal(movie_indices, expected)
+        np.testing.assert_allclose(scores, similarities[expected], rtol=1e-5)
+
+
+def test_ann_recommendations_match_exact_with_every_list_probed(models):
+    exact, ann = models
+    model = ann(ann_probes=10**6)
+    assert model.ann_index.n_probe >= model.ann_index.n_lists
+    for user_id in exact.user_ids:
+        assert model.get_recommendations(str(user_id), top_k=10) == exact.get_recommendations(str(user_id), top_k=10)
+
+
+def test_recall_at_the_default_probes(models):
+    exact, ann = models
+    model = ann()
+    assert model.ann_index.n_probe < model.ann_index.n_lists
+    recalls = [
+        len(set(model.get_recommendations(str(user_id), top_k=10))
+            & set(exact.get_recommendations(str(user_id), top_k=10))) / 10
+        for user_id in exact.user_ids
+    ]
+    # About 0.77 on the fixture data with 8 of 17 lists probed
+    assert np.mean(recalls) >= 0.65
@@ -0,0 +1,38 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from models.artifacts import CompiledArtifacts, artifacts_dir, compile_artifacts
+from models.catalog import MovieCatalog, _clean
+
+
+def test_compiled_catalog_matches_the_csv_catalog(data_dir):
+    # Non-ASCII titles, missing genres and movies without TMDb data survive the columnar format
+    movies_path = os.path.join(data_dir, "movies.csv")
+    movies = pd.read_csv(movies_path)
+    movies.loc[0, "title"] = "Amélie (2001) — 天使"
+    movies.loc[1, "genres"] = None
+    movies.to_csv(movies_path, index=False)
+    links_path = os.path.join(data_dir, "links.csv")
+    pd.read_csv(links_path).iloc[10:].to_csv(links_path, index=False)
+
+    compile_artifacts(data_dir)
+    assert not [name for name in os.listdir(artifacts_dir(data_dir)) if name.endswith(".pkl")]
+
+    columnar = MovieCatalog(data_dir, movies=CompiledArtifacts.open(data_dir).catalog_movies())
+    expected = MovieCatalog(data_dir)
+
+    assert isinstance(columnar.movies._ids, np.memmap)
+    assert list(columnar.movies) == sorted(expected.movies)
+    for movie_id, entry in expected.movies.items():
+        # The CSV catalog keeps pandas' NaN for missing genres; the columns store None
+        assert columnar.movies[movie_id] == dict(entry, genres=_clean(entry["genres"]))
+    assert columnar.movies[int(movies.loc[0, "movieId"])]["title"] == "Amélie (2001) — 天使"
+    assert columnar.tmdb_to_movie == expected.tmdb_to_movie
+    assert columnar.genres == expected.genres
+    for genre in expected.genres:
+        assert columnar.genre_index.postings[genre].tolist() == expected.genre_index.postings[genre].tolist()
+    movie_ids = [str(movie_id) for movie_id in movies["movieId"][:20]] + ["999999"]
+    assert columnar.movie_details(movie_ids) == expected.movie_details(movie_ids)
+    assert 999999 not in columnar.movies
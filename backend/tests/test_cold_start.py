@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from models.cold_start import ColdStartRanker, bayesian_means
+
+# movieId -> index: 10 -> 0, 20 -> 1, ...
+MOVIE_ID_TO_IDX = {10: 0, 20: 1, 30: 2, 40: 3, 50: 4, 60: 5}
+
+
+def test_smoothing_pulls_sparse_movies_towards_the_prior():
+    # One 5-star rating against fifty 4-star ratings, m = 4 ratings of μ = 3
+    means = bayesian_means([5.0, 200.0, 0.0], [1, 50, 0], prior_mean=3.0, prior_weight=4.0)
+    np.testing.assert_allclose(means, [(5 + 12) / 5, (200 + 12) / 54, 0.0])
+    assert means[1] > means[0]
+
+
+def small_ranker() -> ColdStartRanker:
+    sums = np.array([5.0, 45.0, 45.0, 20.0, 16.0, 0.0])
+    counts = np.array([1, 10, 10, 10, 4, 0])
+    postings = {"Drama": [10, 20, 30, 40, 60, 999], "Comedy": [40, 50], "Empty": [60]}
+    return ColdStartRanker.build(sums, counts, postings, MOVIE_ID_TO_IDX, prior_weight=2.0)
+
+
+def test_genre_rankings_follow_the_smoothed_mean():
+    ranker = small_ranker()
+    assert ranker.prior_mean == pytest.approx(131 / 35)
+    # Unknown and unrated movies, and genres left without movies, are dropped
+    assert set(ranker.genre_rankings) == {"Drama", "Comedy"}
+
+    indices, scores = ranker.genre_rankings["Drama"]
+    expected = bayesian_means([5.0, 45.0, 45.0, 20.0], [1, 10, 10, 10], prior_mean=115 / 31, prior_weight=2.0)
+    # The single 5-star rating ranks below the well-rated movies; 20 and 30 tie and keep the catalogue order
+    assert indices.tolist() == [1, 2, 0, 3]
+    np.testing.assert_allclose(scores, expected[[1, 2, 0, 3]], rtol=1e-6)
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_recommend_interleaves_genres_then_fills_from_the_global_ranking():
+    ranker = small_ranker()
+    popular = np.array([1, 2, 3, 4, 0, 5])
+    popular_scores = ranker.smoothed([5.0, 45.0, 45.0, 20.0, 16.0, 0.0], [1, 10, 10, 10, 4, 0])
+
+    indices, scores = ranker.recommend(popular, popular_scores, top_k=4, genres=["Comedy", "Drama", "Comedy"])
+    assert indices.tolist() == [4, 1, 3, 2]
+    assert scores[0] == pytest.approx(ranker.genre_rankings["Comedy"][1][0])
+
+    # Excluded movies are skipped; once the genres run out the global ranking fills in
+    indices, scores = ranker.recommend(popular, popular_scores, top_k=5, genres=["Comedy", "Unknown"],
+                                       excluded={3})
+    assert indices.tolist() == [4, 1, 2, 0, 5]
+    np.testing.assert_allclose(scores[1:], popular_scores[[1, 2, 0, 5]], rtol=1e-6)
+
+    indices, _ = ranker.recommend(popular, popular_scores, top_k=3)
+    assert indices.tolist() == [1, 2, 3]
+
+
+def test_cold_start_users_get_a_popularity_score(client):
+    response = client.post("/api/recommendations", json={"user_id": "999999", "top_k": 10, "genres": ["Drama"]})
+    assert response.status_code == 200
+    movies = response.json()["recommendations"]
+    assert movies
+    for movie in movies:
+        assert movie["predicted_rating"] is None
+        assert 0.5 <= movie["popularity_score"] <= 5
+
+    movies = client.post("/api/recommendations", json={"user_id": "1", "top_k": 10}).json()["recommendations"]
+    assert movies
+    assert all(movie["predicted_rating"] is not None and "popularity_score" not in movie for movie in movies)
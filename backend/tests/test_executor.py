@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from models.batching import RecommendationBatcher
+from models.executor import ComputeExecutor, ComputeTimeout
+
+
+class BlockingModel:
+    """Stand-in model whose batches block until `release` is set"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.scored = []
+
+    def get_recommendations_batch(self, requests, top_k, return_scores):
+        self.scored.extend(user_id for user_id, *_ in requests)
+        self.release.wait(5)
+        return [([user_id], {user_id: 1.0}) for user_id, *_ in requests]
+
+
+def test_run_keeps_the_slot_until_the_thread_finishes():
+    executor = ComputeExecutor(threads=1, concurrency=1, timeout_ms=50)
+    release = threading.Event()
+
+    async def scenario():
+        with pytest.raises(ComputeTimeout):
+            await executor.run("recommendations", release.wait, 5)
+        assert executor._semaphore("recommendations").locked()
+        release.set()
+        await asyncio.sleep(0.1)
+        assert not executor._semaphore("recommendations").locked()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+
+def test_guard_holds_the_slot_while_the_batch_is_scored():
+    executor = ComputeExecutor(threads=1, concurrency=1, timeout_ms=50)
+    model = BlockingModel()
+    batcher = RecommendationBatcher(model, max_wait_ms=0)
+
+    async def scenario():
+        with pytest.raises(ComputeTimeout):
+            await executor.guard("recommendations", lambda: batcher.submit("1"))
+        # Timed out, but the batch is still being scored: the slot stays taken
+        semaphore = executor._semaphore("recommendations")
+        assert semaphore.locked()
+        model.release.set()
+        await asyncio.sleep(0.1)
+        assert not semaphore.locked()
+        await batcher.close()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert model.scored == ["1"]
+
+
+def test_requests_abandoned_in_the_queue_are_not_scored():
+    executor = ComputeExecutor(threads=1, concurrency=2, timeout_ms=50)
+    model = BlockingModel()
+    batcher = RecommendationBatcher(model, max_batch_size=1, max_wait_ms=0)
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.guard("recommendations", lambda: batcher.submit("1")))
+        await asyncio.sleep(0.01)
+        # "2" waits behind the blocked batch of "1" and times out before it is collected
+        with pytest.raises(ComputeTimeout):
+            await executor.guard("recommendations", lambda: batcher.submit("2"))
+        with pytest.raises(ComputeTimeout):
+            await first
+        model.release.set()
+        # Both slots come back: "1" once its batch finishes, "2" once the batcher drops it
+        semaphore = executor._semaphore("recommendations")
+        deadline = time.monotonic() + 2
+        while semaphore._value < 2:
+            assert time.monotonic() < deadline
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        await batcher.close()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert model.scored == ["1"]
+
+
+def test_stream_holds_one_slot_for_the_whole_iteration():
+    executor = ComputeExecutor(threads=1, concurrency=1, timeout_ms=50)
+
+    async def scenario():
+        lines = await executor.stream("batch", iter(["a", "b"]))
+        assert await lines.__anext__() == "a"
+        # A second job cannot start while the first is streaming
+        with pytest.raises(ComputeTimeout):
+            await executor.stream("batch", iter(["c"]))
+        assert [line async for line in lines] == ["b"]
+        assert not executor._semaphore("batch").locked()
+        assert [line async for line in await executor.stream("batch", iter(["c"]))] == ["c"]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+
+def test_stream_slot_is_released_when_never_iterated():
+    executor = ComputeExecutor(threads=1, concurrency=1, timeout_ms=50)
+
+    async def scenario():
+        # Closed before the first chunk, e.g. the response was never started
+        lines = await executor.stream("batch", iter(["a"]))
+        await lines.aclose()
+        assert not executor._semaphore("batch").locked()
+
+        # Dropped without being iterated or closed, e.g. the client disconnected first
+        lines = await executor.stream("batch", iter(["a"]))
+        del lines
+        await asyncio.sleep(0)
+        assert not executor._semaphore("batch").locked()
+        assert [line async for line in await executor.stream("batch", iter(["b"]))] == ["b"]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from models.genre_index import GenreIndex
+
+
+@pytest.mark.parametrize("params", [
+    {"limit": -3, "seed": 1},
+    {"limit": 0},
+    {"limit": 101},
+    {"page": 0, "seed": 1},
+])
+def test_movies_rejects_invalid_paging(client, params):
+    response = client.get("/api/movies", params=dict(params, genre="Drama"))
+    assert response.status_code == 422
+
+
+def test_seeded_orders_are_shared_safely_between_threads():
+    index = GenreIndex({"Drama": np.arange(1, 200, dtype=np.int64)}, max_cached_orders=2)
+    expected = {seed: index.page(["Drama"], seed, limit=200) for seed in range(8)}
+
+    def read(i):
+        seed = i % 8
+        return seed, index.page(["Drama"], seed, limit=200)
+
+    with ThreadPoolExecutor(8) as pool:
+        for seed, movie_ids in pool.map(read, range(4000)):
+            assert movie_ids == expected[seed]
+    assert len(index._orders) <= 2
+
+
+def small_index() -> GenreIndex:
+    return GenreIndex.from_movies({
+        1: {"genres": "Drama|War"},
+        2: {"genres": "Drama"},
+        3: {"genres": "Comedy|Drama"},
+        4: {"genres": "War"},
+        5: {"genres": "Comedy"},
+        6: {"genres": "(no genres listed)"},
+    })
+
+
+def test_matching_any_and_all():
+    index = small_index()
+    assert index.matching(["Drama"]).tolist() == [1, 2, 3]
+    assert index.matching(["Drama", "War"]).tolist() == [1, 2, 3, 4]
+    assert index.matching(["Drama", "War"], match_all=True).tolist() == [1]
+    assert index.matching(["Comedy", "War"], match_all=True).tolist() == []
+    assert index.matching(["Drama", "Unknown"]).tolist() == [1, 2, 3]
+    assert index.matching(["Drama", "Unknown"], match_all=True).tolist() == []
+    assert index.count(["Comedy", "Drama"], match_all=True) == 1
+
+
+def test_seeded_pages_are_stable_disjoint_and_cover_the_matches():
+    index = GenreIndex({"Drama": np.arange(1, 48, dtype=np.int64)})
+    pages = [index.page(["Drama"], seed=7, page=page, limit=10) for page in range(1, 7)]
+
+    assert [len(page) for page in pages] == [10, 10, 10, 10, 7, 0]
+    walked = [movie_id for page in pages for movie_id in page]
+    assert sorted(walked) == list(range(1, 48))
+    # The same seed gives the same pages, from a fresh index too; another seed another order
+    assert index.page(["Drama"], seed=7, page=2, limit=10) == pages[1]
+    assert GenreIndex({"Drama": np.arange(1, 48, dtype=np.int64)}).page(["Drama"], seed=7, limit=47) == walked
+    assert index.page(["Drama"], seed=8, limit=47) != walked
+
+
+def test_movies_pages_walk_the_genre(client):
+    genres = ["Drama", "Comedy"]
+    expected = set()
+    for genre in genres:
+        expected |= {movie["id"] for movie in client.get("/api/movies", params={"genre": genre, "limit": 100,
+                                                                                 "seed": 1, "page": 1}).json()}
+        expected |= {movie["id"] for movie in client.get("/api/movies", params={"genre": genre, "limit": 100,
+                                                                                 "seed": 1, "page": 2}).json()}
+
+    walked, page = [], 1
+    while True:
+        movies = client.get("/api/movies", params={"genre": genres, "limit": 7, "seed": 3, "page": page}).json()
+        if not movies:
+            break
+        assert all(set(genres) & set(movie["genres"]) for movie in movies)
+        walked.extend(movie["id"] for movie in movies)
+        page += 1
+
+    assert len(walked) == len(set(walked))
+    assert set(walked) == expected
+    both = client.get("/api/movies", params={"genre": genres, "match": "all", "limit": 100, "seed": 3}).json()
+    assert all(set(genres) <= set(movie["genres"]) for movie in both)
+    assert {movie["id"] for movie in both} < set(walked)
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_ratings
+from models.ratings_store import DENSE_ID_LIMIT, RatingsStore
+
+
+def assert_same_store(store: RatingsStore, expected: RatingsStore):
+    np.testing.assert_array_equal(store.user_ids, expected.user_ids)
+    np.testing.assert_array_equal(store.movie_ids, expected.movie_ids)
+    np.testing.assert_array_equal(store.indptr, expected.indptr)
+    np.testing.assert_array_equal(store.indices, expected.indices)
+    np.testing.assert_allclose(store.ratings, expected.ratings)
+    for actual, reference in zip(store.movie_totals(), expected.movie_totals()):
+        np.testing.assert_allclose(actual, reference)
+
+
+def write_csv(tmp_path, ratings_df: pd.DataFrame) -> str:
+    path = str(tmp_path / "ratings.csv")
+    ratings_df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("presorted", [True, False])
+def test_from_csv_matches_from_dataframe(tmp_path, presorted):
+    ratings_df = make_ratings(n_users=200, n_movies=500, n_ratings=5000)
+    if presorted:
+        ratings_df = ratings_df.sort_values(["userId", "movieId"])
+    path = write_csv(tmp_path, ratings_df)
+
+    store = RatingsStore.from_csv(path, chunk_rows=700)
+
+    assert_same_store(store, RatingsStore.from_dataframe(ratings_df))
+    assert store.nnz == len(ratings_df)
+
+
+def test_from_csv_keeps_ratings_that_are_not_half_stars(tmp_path):
+    ratings_df = pd.DataFrame({"userId": [1, 1, 2], "movieId": [10, 20, 10], "rating": [3.5, 4.25, 1.0]})
+    store = RatingsStore.from_csv(write_csv(tmp_path, ratings_df), chunk_rows=2)
+
+    movie_ids, ratings = store.user_items(store.user_index(1))
+    np.testing.assert_array_equal(store.movie_ids[movie_ids], [10, 20])
+    np.testing.assert_allclose(ratings, [3.5, 4.25])
+
+
+def test_from_csv_large_sparse_movie_ids(tmp_path):
+    # IDs past the dense table limit must not size the popularity aggregates by the raw ID
+    big = 1_500_000_000
+    assert big >= DENSE_ID_LIMIT
+    ratings_df = pd.DataFrame({"userId": [1, 1, 2], "movieId": [7, big, big], "rating": [4.0, 5.0, 3.0]})
+
+    store = RatingsStore.from_csv(write_csv(tmp_path, ratings_df))
+
+    np.testing.assert_array_equal(store.movie_ids, [7, big])
+    sums, counts = store.movie_totals()
+    np.testing.assert_allclose(sums, [4.0, 8.0])
+    np.testing.assert_array_equal(counts, [1, 2])
+    assert_same_store(store, RatingsStore.from_dataframe(ratings_df))
+
+
+def small_store() -> RatingsStore:
+    return RatingsStore.from_arrays(np.array([1, 1, 2]), np.array([10, 20, 10]), np.array([4.0, 3.0, 2.0]),
+                                    np.array([100, 200, 300]))
+
+
+def user_ratings(store: RatingsStore, user_id: int) -> dict:
+    indices, ratings = store.user_items(store.user_index(user_id))
+    return dict(zip(store.movie_ids[indices].tolist(), ratings.tolist()))
+
+
+def test_online_ratings_are_visible_before_compaction():
+    store = small_store()
+    # Update, new movie, new user
+    store.add_ratings(1, {20: 5.0, 30: 1.5}, 400)
+    store.add_ratings(3, {10: 4.5}, 500)
+
+    assert store.pending == 3
+    assert user_ratings(store, 1) == {10: 4.0, 20: 5.0, 30: 1.5}
+    assert user_ratings(store, 3) == {10: 4.5}
+    assert store.user_count(store.user_index(1)) == 3
+
+
+def test_compaction_merges_the_delta_into_the_csr():
+    store = small_store()
+    store.add_ratings(1, {20: 5.0, 30: 1.5}, 400)
+    store.add_ratings(3, {10: 4.5}, 500)
+    before = {user_id: user_ratings(store, user_id) for user_id in (1, 2, 3)}
+
+    assert store.compact() == 3
+    assert store.pending == 0
+    assert {user_id: user_ratings(store, user_id) for user_id in (1, 2, 3)} == before
+
+    expected = RatingsStore.from_arrays(np.array([1, 1, 1, 2, 3]), np.array([10, 20, 30, 10, 10]),
+                                        np.array([4.0, 5.0, 1.5, 2.0, 4.5]), np.array([100, 400, 400, 300, 500]))
+    for actual, reference in zip(store.movie_totals(), expected.movie_totals()):
+        np.testing.assert_allclose(actual, reference)
+    movie_ids, _, timestamps = store.user_timeline(store.user_index(1), limit=10)
+    assert list(zip(timestamps.tolist(), movie_ids.tolist())) == [(400, 20), (400, 30), (100, 10)]
+
+
+def test_compaction_up_to_a_sequence_keeps_later_ratings_pending():
+    store = small_store()
+    store.add_ratings(1, {30: 1.5}, 400)
+    upto, rows = store.pending_rows()
+    assert rows == [(1, 30, 1.5, 400)]
+    store.add_ratings(2, {20: 3.5}, 500)
+
+    assert store.compact(upto) == 1
+    assert store.pending == 1
+    assert user_ratings(store, 2) == {10: 2.0, 20: 3.5}
+
+
+def test_compacted_ratings_are_persisted_and_replayed(data_dir):
+    from models.data_processor import DataProcessor
+
+    data_processor = DataProcessor(data_dir)
+    data_processor.ratings_store.add_ratings(1, {1: 0.5}, 2_000_000_000)
+    data_processor.ratings_store.add_ratings(10_000, {2: 5.0}, 2_000_000_000)
+    assert data_processor.compact_ratings() == 2
+
+    reloaded = DataProcessor(data_dir)
+    assert reloaded.data_version != data_processor.data_version
+    assert user_ratings(reloaded.ratings_store, 1)[1] == 0.5
+    assert user_ratings(reloaded.ratings_store, 10_000) == {2: 5.0}
+    assert reloaded.ratings_store.pending == 0
+
+
+def test_half_star_ratings_stay_one_byte(tmp_path):
+    ratings_df = make_ratings(n_users=50, n_movies=200, n_ratings=2000)
+    store = RatingsStore.from_csv(write_csv(tmp_path, ratings_df.sort_values(["userId", "movieId"])))
+
+    assert store.ratings.dtype == np.uint8
+    assert "timeline_keys" not in store.arrays()
+    user_id = int(ratings_df["userId"].iloc[0])
+    expected = ratings_df[ratings_df["userId"] == user_id].set_index("movieId")["rating"].to_dict()
+    assert user_ratings(store, user_id) == expected
+    _, ratings, _ = store.user_timeline(store.user_index(user_id), limit=len(expected))
+    assert ratings.dtype == np.float32
+    assert sorted(ratings.tolist()) == sorted(expected.values())
+
+
+def test_compaction_widens_only_for_ratings_that_are_not_half_stars():
+    store = small_store()
+    assert store.ratings.dtype == np.uint8
+    store.add_ratings(1, {30: 1.5}, 400)
+    store.compact()
+    assert store.ratings.dtype == np.uint8
+
+    store.add_ratings(2, {20: 3.25}, 500)
+    store.compact()
+    assert store.ratings.dtype == np.float32
+    assert user_ratings(store, 1) == {10: 4.0, 20: 3.0, 30: 1.5}
+    assert user_ratings(store, 2) == {10: 2.0, 20: 3.25}
@@ -0,0 +1,131 @@
+import pytest
+
+from models import recommendation_cache
+from models.recommendation_cache import COLD_START_KEY, NEW_USER_KEY, RecommendationCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(recommendation_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_expired_entry_is_a_miss_but_stays_available_as_stale(clock):
+    cache = RecommendationCache(max_entries=4, ttl_seconds=10)
+    key = cache.make_key("1", None, 10)
+    cache.put(key, ["a"])
+
+    clock[0] += 11
+    assert cache.get(key) is None
+    assert cache.get_stale(key) == ["a"]
+    assert cache.stats()["expirations"] == 1
+
+    cache.put(key, ["b"])
+    assert cache.get(key) == ["b"]
+
+
+def test_expired_entries_are_evicted_by_lru(clock):
+    cache = RecommendationCache(max_entries=1, ttl_seconds=10)
+    cache.put("old", ["a"])
+    clock[0] += 11
+    cache.get("old")
+    cache.put("new", ["b"])
+
+    assert cache.get_stale("old") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_key_ignores_order_of_ratings_and_exclusions():
+    make_key = RecommendationCache.make_key
+    assert (make_key("1", {"10": 4.0, "20": 3}, 10, ["5", "6"])
+            == make_key("1", {"20": 3.0, "10": 4}, 10, ["6", "5"]))
+    assert make_key("1", {"10": 4.0}, 10) != make_key("1", {"10": 3.5}, 10)
+    assert make_key("1", None, 10) != make_key("1", None, 20)
+
+
+def test_key_depends_on_data_and_model_version():
+    assert RecommendationCache.make_key("1", None, 10, version="a") != RecommendationCache.make_key(
+        "1", None, 10, version="b")
+
+
+def test_unknown_users_share_keys_by_ratings_and_genres():
+    make_key = RecommendationCache.make_key
+    # Without ratings: the popularity ranking of the chosen genres, in the order they were chosen
+    assert make_key("x", None, 10, known_user=False) == make_key("y", {}, 10, known_user=False)
+    assert make_key("x", None, 10, known_user=False)[1] == COLD_START_KEY
+    assert (make_key("x", None, 10, known_user=False, genres=["Drama", "Comedy"])
+            != make_key("x", None, 10, known_user=False, genres=["Comedy", "Drama"]))
+    # With ratings: keyed by the ratings only
+    assert make_key("x", {"1": 5.0}, 10, known_user=False) == make_key("y", {"1": 5.0}, 10, known_user=False)
+    assert make_key("x", {"1": 5.0}, 10, known_user=False)[1] == NEW_USER_KEY
+
+
+def test_lru_eviction_and_disabled_cache():
+    cache = RecommendationCache(max_entries=2, ttl_seconds=0)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    disabled = RecommendationCache(max_entries=0)
+    disabled.put("a", 1)
+    assert disabled.get("a") is None
+
+
+def test_invalidate_user_only_drops_that_user():
+    cache = RecommendationCache()
+    keys = {user: cache.make_key(user, None, 10, version="v") for user in ("1", "2")}
+    cold = cache.make_key("x", None, 10, version="v", known_user=False)
+    for key in [*keys.values(), cold]:
+        cache.put(key, ["m"])
+
+    cache.invalidate_user("1")
+    assert cache.get(keys["1"]) is None
+    assert cache.get_stale(keys["1"]) is None
+    assert cache.get(keys["2"]) == ["m"]
+    assert cache.get(cold) == ["m"]
+
+    cache.invalidate()
+    assert cache.stats()["entries"] == 0
+
+
+def test_results_computed_before_an_invalidation_are_not_stored():
+    cache = RecommendationCache()
+    key = cache.make_key("1", None, 10, version="v")
+    other = cache.make_key("2", None, 10, version="v")
+
+    generation = cache.generation(key)
+    other_generation = cache.generation(other)
+    # New ratings for user 1 arrive while its recommendations are being scored
+    cache.invalidate_user("1")
+    cache.put(key, ["pre-write"], generation=generation)
+    cache.put(other, ["m"], generation=other_generation)
+
+    assert cache.get_stale(key) is None
+    assert cache.get(other) == ["m"]
+    assert cache.stats()["discarded_puts"] == 1
+
+    generation = cache.generation(other)
+    cache.invalidate()
+    cache.put(other, ["m"], generation=generation)
+    assert cache.get_stale(other) is None
+
+
+def test_invalidations_of_many_users_are_bounded_and_stay_safe():
+    cache = RecommendationCache(max_entries=4)
+    key = cache.make_key("0", None, 10, version="v")
+    generation = cache.generation(key)
+    cache.invalidate_user("0")
+    # Writes from many other users push user 0 out of the remembered invalidations
+    for user_id in range(1, 1000):
+        cache.invalidate_user(str(user_id))
+    assert len(cache._user_invalidations) == 4
+
+    # Its pre-write result is still rejected, and results computed from now on are stored
+    cache.put(key, ["pre-write"], generation=generation)
+    assert cache.get_stale(key) is None
+    cache.put(key, ["m"], generation=cache.generation(key))
+    assert cache.get(key) == ["m"]
@@ -0,0 +1,48 @@
+import numpy as np
+
+from models.data_processor import DataProcessor
+from models.recommendation_model import RecommendationModel
+
+
+def recommended_ids(client, user_id: str) -> list:
+    response = client.post("/api/recommendations", json={"user_id": user_id, "top_k": 10})
+    assert response.status_code == 200
+    return [movie["movieId"] for movie in response.json()["recommendations"]]
+
+
+def test_new_ratings_are_read_after_write(client):
+    first = recommended_ids(client, "1")
+    assert recommended_ids(client, "1") == first
+    assert client.get("/api/recommendations/cache").json()["hits"] == 1
+
+    # Rating a recommended movie removes it from the (cached) recommendations right away
+    response = client.post("/api/ratings", json={"user_id": 1, "ratings": {first[0]: 5.0}})
+    assert response.status_code == 200
+
+    assert first[0] not in recommended_ids(client, "1")
+    ratings = client.post("/api/user_ratings", json={"user_id": "1", "limit": 1000}).json()["ratings"]
+    assert {"movieId": first[0], "rating": 5.0} in [{k: r[k] for k in ("movieId", "rating")} for r in ratings]
+
+
+def test_incremental_popularity_matches_a_full_stable_argsort(data_dir):
+    model = RecommendationModel(DataProcessor(data_dir))
+    rng = np.random.default_rng(0)
+    movie_ids = model.movie_ids[:]
+    for step in range(200):
+        # Existing and new users, re-ratings, and now and then a movie never rated before
+        user_id = int(rng.integers(1, 80))
+        chosen = rng.choice(movie_ids, size=int(rng.integers(1, 6)), replace=False).tolist()
+        if step % 25 == 0:
+            chosen.append(100_000 + step)
+        model.add_ratings(user_id, {movie_id: float(rng.integers(1, 11)) / 2 for movie_id in chosen}, step)
+
+        popular = model.popular_indices
+        np.testing.assert_array_equal(popular, np.argsort(-model._rating_means, kind="stable"))
+        np.testing.assert_array_equal(model._popular_rank[popular], np.arange(len(popular)))
+
+    # The incremental means are those of the full ratings, recomputed from scratch
+    model.ratings_store.compact()
+    sums, counts = model.ratings_store.movie_totals()
+    np.testing.assert_allclose(model._rating_means, model.cold_start.smoothed(sums, counts))
+    np.testing.assert_array_equal(model.popular_indices,
+                                  np.argsort(-model.cold_start.smoothed(sums, counts), kind="stable"))
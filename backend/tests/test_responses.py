@@ -0,0 +1,81 @@
+import os
+
+import pandas as pd
+import pytest
+
+SEEDED = {"genre": "Drama", "seed": 1, "limit": 10}
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/genres", {}),
+    ("/api/movies", SEEDED),
+    ("/api/movies/1/similar", {}),
+])
+def test_catalog_responses_answer_if_none_match_with_304(client, path, params):
+    response = client.get(path, params=params)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    assert "max-age" in response.headers["cache-control"]
+
+    for if_none_match in (etag, etag.removeprefix("W/"), f'"other", {etag}', "*"):
+        cached = client.get(path, params=params, headers={"If-None-Match": if_none_match})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+    assert client.get(path, params=params, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_unseeded_movies_are_not_cacheable(client):
+    response = client.get("/api/movies", params={"genre": "Drama"})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert client.get("/api/movies", params={"genre": "Drama"}, headers={"If-None-Match": "*"}).status_code == 200
+
+
+def test_etag_changes_after_reload(client, data_dir):
+    etags = {path: client.get(path, params=params).headers["etag"]
+             for path, params in [("/api/genres", {}), ("/api/movies", SEEDED)]}
+    # Without changes to the data the snapshot, and so the ETag, stays the same
+    assert client.post("/api/admin/reload").status_code == 200
+    assert client.get("/api/genres").headers["etag"] == etags["/api/genres"]
+
+    movies_path = os.path.join(data_dir, "movies.csv")
+    movies = pd.read_csv(movies_path)
+    movies.loc[movies["genres"].str.contains("Drama"), "title"] += " (Director's Cut)"
+    movies.to_csv(movies_path, index=False)
+    assert client.post("/api/admin/reload").status_code == 200
+
+    for path, params in [("/api/genres", {}), ("/api/movies", SEEDED)]:
+        response = client.get(path, params=params, headers={"If-None-Match": etags[path]})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etags[path]
+    assert all(movie["title"].endswith("(Director's Cut)") for movie in response.json())
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/movies", {"genre": "Drama", "seed": 1}),
+    ("/api/movies", {"genre": "Drama"}),
+])
+def test_fields_projects_each_movie(client, path, params):
+    full = client.get(path, params=params).json()
+    assert set(full[0]) == {"id", "title", "genres", "poster_path", "overview"}
+
+    projected = client.get(path, params=dict(params, fields=" id, title ,unknown")).json()
+    assert projected and all(set(movie) == {"id", "title"} for movie in projected)
+    # Unknown names are ignored; a selection with no known field leaves empty movies
+    assert all(movie == {} for movie in client.get(path, params=dict(params, fields="nope")).json())
+    # An empty selection returns every field
+    assert all(set(movie) == set(full[0]) for movie in client.get(path, params=dict(params, fields=" , ")).json())
+
+
+def test_fields_on_similar_movies_and_recommendations(client):
+    similar = client.get("/api/movies/1/similar", params={"fields": "movieId,similarity,bogus"}).json()["similar"]
+    assert similar and all(set(movie) == {"movieId", "similarity"} for movie in similar)
+
+    response = client.post("/api/recommendations", params={"fields": "movieId,predicted_rating,bogus"},
+                           json={"user_id": "1", "top_k": 5})
+    assert response.status_code == 200
+    movies = response.json()["recommendations"]
+    assert len(movies) == 5
+    assert all(set(movie) == {"movieId", "predicted_rating"} for movie in movies)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from benchmarks.bench_scoring import reference_scores
+from models.artifacts import compile_artifacts
+from models.data_processor import DataProcessor
+from models.recommendation_model import RecommendationModel
+
+TOP_K = 20
+
+
+@pytest.fixture
+def models(data_dir):
+    """The same data scored by the torch engine (from the checkpoint) and the numpy backend (compiled)"""
+    torch_model = RecommendationModel(DataProcessor(data_dir), backend="torch")
+    compile_artifacts(data_dir)
+    numpy_model = RecommendationModel(DataProcessor(data_dir), backend="numpy")
+    return torch_model, numpy_model
+
+
+def top_ranking(scores: np.ndarray) -> list:
+    return np.argsort(-scores, kind="stable")[:TOP_K].tolist()
+
+
+def test_backends_match_the_legacy_per_item_loop(models):
+    torch_model, numpy_model = models
+    for user_id in torch_model.user_ids[:5]:
+        vector = torch_model._get_user_vector(str(user_id))
+        expected = reference_scores(torch_model, vector)
+
+        for model in (torch_model, numpy_model):
+            actual = model._predict_with_model(vector)
+            np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-5)
+            assert top_ranking(actual) == top_ranking(expected)
+
+
+@pytest.mark.parametrize("backend", [0, 1], ids=["torch", "numpy"])
+def test_sparse_scoring_matches_dense(models, backend):
+    model = models[backend]
+    store = model.ratings_store
+    rows = [store.user_items(user_idx) for user_idx in range(4)]
+    indptr = np.cumsum([0] + [len(indices) for indices, _ in rows])
+    indices = np.concatenate([indices for indices, _ in rows]).astype(np.int64)
+    ratings = np.concatenate([ratings for _, ratings in rows])
+
+    dense = model.backend.score(np.stack([store.user_vector(user_idx) for user_idx in range(4)]))
+    np.testing.assert_allclose(model.backend.score_sparse(indptr, indices, ratings), dense, rtol=1e-4, atol=1e-5)
@@ -0,0 +1,44 @@
+import pytest
+
+from models.similarity import build_similarity_index
+
+TOP_M = 5
+
+
+@pytest.fixture
+def similarity_index(data_dir):
+    """Blended neighbour lists, built before the app loads"""
+    return build_similarity_index(data_dir, top_m=TOP_M, co_rating_weight=0.5)
+
+
+def similar_ids(client, movie_id: int, limit: int) -> list:
+    response = client.get(f"/api/movies/{movie_id}/similar", params={"limit": limit})
+    assert response.status_code == 200
+    return [movie["movieId"] for movie in response.json()["similar"]]
+
+
+def test_limits_past_top_m_keep_the_index_ranking(similarity_index, client):
+    movie_id = int(similarity_index.movie_ids[0])
+    expected = [str(neighbor) for neighbor in similarity_index.similar(movie_id, TOP_M)[0].tolist()]
+
+    assert similar_ids(client, movie_id, 3) == expected[:3]
+    assert similar_ids(client, movie_id, TOP_M) == expected
+    assert similar_ids(client, movie_id, 50) == expected
+
+
+def test_limit_is_bounded(client):
+    assert client.get("/api/movies/1/similar", params={"limit": 0}).status_code == 422
+    assert client.get("/api/movies/1/similar", params={"limit": 5000}).status_code == 422
+
+
+def test_etag_changes_when_the_index_is_rebuilt(similarity_index, client, data_dir):
+    movie_id = int(similarity_index.movie_ids[0])
+    etag = client.get(f"/api/movies/{movie_id}/similar").headers["etag"]
+    assert client.get(f"/api/movies/{movie_id}/similar", headers={"If-None-Match": etag}).status_code == 304
+
+    build_similarity_index(data_dir, top_m=TOP_M + 1, co_rating_weight=0.5)
+    assert client.post("/api/admin/reload").status_code == 200
+
+    response = client.get(f"/api/movies/{movie_id}/similar", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from models.ratings_store import RatingsStore
+
+
+def walk_cursor(store: RatingsStore, user_idx: int, limit: int):
+    rows, after = [], None
+    while True:
+        movie_ids, _, timestamps = store.user_timeline(user_idx, limit=limit, after=after)
+        if len(movie_ids) == 0:
+            return rows
+        rows.extend(zip(timestamps.tolist(), movie_ids.tolist()))
+        after = (int(timestamps[-1]), int(movie_ids[-1]))
+
+
+@pytest.mark.parametrize("with_delta", [False, True])
+def test_cursor_pages_cover_the_timeline_once_with_ties(with_delta):
+    # Several ratings share a timestamp: ties are ordered by movieId
+    movie_ids = np.array([5, 3, 9, 1, 7, 2, 8])
+    timestamps = np.array([100, 200, 200, 200, 50, 300, 200])
+    store = RatingsStore.from_arrays(np.ones(7, dtype=np.int64), movie_ids, np.full(7, 4.0), timestamps)
+    if with_delta:
+        store.add_ratings(1, {4: 3.0}, 200)
+
+    expected = sorted(zip(timestamps.tolist(), movie_ids.tolist()), key=lambda row: (-row[0], row[1]))
+    if with_delta:
+        expected = sorted(expected + [(200, 4)], key=lambda row: (-row[0], row[1]))
+    for limit in (1, 2, 3, len(expected)):
+        assert walk_cursor(store, store.user_index(1), limit) == expected
+
+
+def test_pages_and_cursor_agree(client):
+    user_id = "1"
+    first = client.post("/api/user_ratings", json={"user_id": user_id, "limit": 7}).json()
+    total = first["total_count"]
+    assert total > 7
+
+    by_page, page = [], 1
+    while len(by_page) < total:
+        body = client.post("/api/user_ratings", json={"user_id": user_id, "page": page, "limit": 7}).json()
+        by_page.extend(body["ratings"])
+        page += 1
+
+    by_cursor, body = list(first["ratings"]), first
+    while body["next_cursor"] is not None:
+        body = client.post("/api/user_ratings", json=dict(body["next_cursor"], user_id=user_id, limit=7)).json()
+        by_cursor.extend(body["ratings"])
+
+    assert by_cursor == by_page
+    assert len({rating["movieId"] for rating in by_cursor}) == total
+
+
+def test_no_cursor_when_the_page_ends_the_timeline(client):
+    total = client.post("/api/user_ratings", json={"user_id": "1", "limit": 1}).json()["total_count"]
+
+    exact = client.post("/api/user_ratings", json={"user_id": "1", "limit": total}).json()
+    assert len(exact["ratings"]) == total
+    assert exact["next_cursor"] is None
+
+    last_page = client.post("/api/user_ratings", json={"user_id": "1", "page": 2, "limit": total - 1}).json()
+    assert len(last_page["ratings"]) == 1
+    assert last_page["next_cursor"] is None
+
+
+@pytest.mark.parametrize("params", [{"limit": 0}, {"limit": -1}, {"page": 0}])
+def test_invalid_page_or_limit_is_rejected(client, params):
+    response = client.post("/api/user_ratings", json=dict(params, user_id="1"))
+    assert response.status_code == 422